@@ -0,0 +1,48 @@
+"""
+Shared setup for benchmarks that need the Django project.
+
+    from _django import setup_django, temporary_database
+    setup_django()
+    with temporary_database():
+        ...  # migrated throwaway database (in-memory for SQLite)
+    with temporary_database(on_disk=True):
+        ...  # the same, in a file, for benchmarks that use several threads
+"""
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fms_project.settings')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def temporary_database(on_disk=False):
+    """
+    Creates and migrates a test database, and destroys it afterwards.
+    The real development database is never touched.
+    With on_disk an SQLite test database is a temporary file instead of
+    shared-cache memory, so concurrent connections lock it the way they
+    lock the real database (waiting on the busy timeout).
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if on_disk and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = str(BACKEND_DIR / 'benchmark_test.sqlite3')
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+"""
+Concurrency benchmark: many simultaneous polling clients, WSGI vs ASGI.
+
+Opens --clients keep-alive connections at once (default 500), each polling
+the read endpoints dashboards poll (student request list, staff task feed,
+admin lists) for --duration seconds, and reports throughput, p50/p95/p99
+latency and errors per URL name, like loadtest.py. Clients are asyncio
+coroutines, so one client process can hold all connections open.
+With --slow-fraction some clients trickle their requests in over
+--slow-seconds; a sync worker thread is tied up for that long, an ASGI
+server is not.
+
+With --serve it also starts the server itself, once per mode, on --port:
+  wsgi  gunicorn fms_project.wsgi:application, --workers x --threads
+  asgi  uvicorn fms_project.asgi:application, --workers
+(pip install gunicorn uvicorn). Otherwise point --base-url at a running one.
+
+    python manage.py seed_fms --requests 100000
+    python benchmarks/bench_concurrency.py --serve wsgi,asgi --clients 500 --output concurrency.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from loadtest import (
+    ADMIN_USERNAME, DEFAULT_PASSWORD, STAFF_USERNAME, STUDENT_USERNAME, URLS,
+    Client, Stats, classify_error, parse_mix, percentile, print_report, summarise,
+)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Read endpoints polled per role
+POLLS = {
+    'student': ['request-list-student'],
+    'staff': ['task-list-staff'],
+    'admin': ['admin-staff-list', 'admin-request-list'],
+}
+
+TRICKLE_PIECES = 10
+
+
+def server_command(mode, port, args):
+    if mode == 'wsgi':
+        return ['gunicorn', 'fms_project.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                '--workers', str(args.workers), '--threads', str(args.threads),
+                '--timeout', str(int(args.timeout) + 30), '--log-level', 'warning']
+    return ['uvicorn', 'fms_project.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(args.workers), '--backlog', str(max(2048, args.clients * 2)),
+            '--log-level', 'warning', '--no-access-log']
+
+
+def start_server(mode, port, args):
+    command = server_command(mode, port, args)
+    if shutil.which(command[0]) is None:
+        sys.exit(f"{command[0]} is not installed (pip install {command[0]}).")
+    python_path = os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get('PYTHONPATH')]))
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, 'PYTHONPATH': python_path})
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                sys.exit(f"{mode} server exited with code {process.returncode}.")
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"{mode} server did not start listening on port {port}.")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def login_tokens(base_url, role, count, args):
+    """
+    Logs in `count` seeded accounts of one role (once each; clients share them).
+    """
+    client = Client(base_url, Stats(), args.timeout)
+    tokens = []
+    for index in range(count):
+        if role == 'student':
+            username = STUDENT_USERNAME.format(index)
+        elif role == 'staff':
+            username = STAFF_USERNAME.format(index)
+        else:
+            username = ADMIN_USERNAME
+        client.token = None
+        if client.login(username, args.password):
+            tokens.append(client.token)
+    if not tokens:
+        sys.exit(f"No {role} account could log in; run `manage.py seed_fms` first.")
+    return tokens
+
+
+async def read_response(reader):
+    """
+    Reads one HTTP/1.1 response; returns (status, body).
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            chunks.append(chunk[:-2])
+        body = b''.join(chunks)
+    else:
+        body = await reader.read()
+    return status, body
+
+
+async def send(connection, request, args, parts, trickle=0):
+    """
+    Sends one request on the client's keep-alive connection ([reader, writer],
+    reopened when needed) and returns (status, body). A connection the
+    server closed while idle is retried once on a new one.
+    With `trickle` seconds, the request is written in TRICKLE_PIECES pieces
+    spread over that time, like a client on a bad mobile link.
+    """
+    for attempt in range(2):
+        reused = connection[1] is not None
+        try:
+            if not reused:
+                connection[:] = await asyncio.wait_for(
+                    asyncio.open_connection(parts.hostname, parts.port or 80), args.timeout
+                )
+            if trickle:
+                step = -(-len(request) // TRICKLE_PIECES)
+                for offset in range(0, len(request), step):
+                    connection[1].write(request[offset:offset + step])
+                    await connection[1].drain()
+                    await asyncio.sleep(trickle / TRICKLE_PIECES)
+            else:
+                connection[1].write(request)
+                await connection[1].drain()
+            return await asyncio.wait_for(read_response(connection[0]), args.timeout)
+        except (OSError, ConnectionError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            if connection[1] is not None:
+                connection[1].close()
+            connection[:] = [None, None]
+            if not reused:
+                break
+    return None, b''
+
+
+async def polling_client(index, role, token, args, stats, deadline, start_gate):
+    rng = random.Random(args.seed * 100_003 + index)
+    # Slow clients are reported separately, as '<url name> (slow)'
+    slow = rng.random() < args.slow_fraction
+    trickle = args.slow_seconds if slow else 0
+    parts = urlsplit(args.base_url)
+    prefix = parts.path.rstrip('/') + '/'
+    connection = [None, None]
+    # Connect before the start, like a dashboard that is already open
+    try:
+        connection[:] = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, parts.port or 80), args.timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        pass
+    await start_gate.wait()
+    # Polls are spread out, as on dashboards opened at different times
+    await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+
+    while time.monotonic() < deadline:
+        for name in POLLS[role]:
+            request = (
+                f"GET {prefix}{URLS[name]} HTTP/1.1\r\nHost: {parts.hostname}\r\n"
+                f"Authorization: Token {token}\r\nAccept: application/json\r\n\r\n"
+            ).encode()
+            started = time.perf_counter()
+            status, body = await send(connection, request, args, parts, trickle)
+            label = f'{name} (slow)' if slow else name
+            stats.record(label, time.perf_counter() - started, classify_error(status, body))
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+
+    if connection[1] is not None:
+        connection[1].close()
+
+
+async def run_clients(roles, tokens, args, stats):
+    start_gate = asyncio.Event()
+    deadline = time.monotonic() + args.connect_time + args.duration
+    clients = [
+        asyncio.create_task(polling_client(
+            index, role, tokens[role][index % len(tokens[role])], args, stats, deadline, start_gate
+        ))
+        for index, role in enumerate(roles)
+    ]
+    # Let every client connect, then start them all together
+    await asyncio.sleep(args.connect_time)
+    start_gate.set()
+    await asyncio.gather(*clients)
+
+
+def run(label, args):
+    rng = random.Random(args.seed)
+    roles = rng.choices(list(args.mix), weights=list(args.mix.values()), k=args.clients)
+    accounts = {'student': args.students, 'staff': args.staff, 'admin': 1}
+    tokens = {role: login_tokens(args.base_url, role, accounts[role], args) for role in set(roles)}
+
+    stats = Stats()
+    started = time.monotonic()
+    asyncio.run(run_clients(roles, tokens, args, stats))
+    elapsed = time.monotonic() - started - args.connect_time
+
+    summary = summarise(stats, elapsed)
+    everything = sorted(value for values in stats.latencies.values() for value in values)
+    summary['overall'] = {
+        'p50_ms': round(percentile(everything, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(everything, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(everything, 0.99) * 1000, 2),
+        'errors': sum(sum(errors.values()) for errors in stats.errors.values()),
+    }
+    print(f"\n=== {label}: {args.clients} clients, {args.duration:g}s ===")
+    print_report(summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default=None,
+                        help="Server to test (default: http://127.0.0.1:<port>/api/).")
+    parser.add_argument('--serve', default=None,
+                        help="Start and test these servers in turn: wsgi, asgi or wsgi,asgi.")
+    parser.add_argument('--port', type=int, default=8765, help="Port for --serve (default: 8765).")
+    parser.add_argument('--workers', type=int, default=2, help="Server processes for --serve (default: 2).")
+    parser.add_argument('--threads', type=int, default=8, help="Threads per WSGI worker (default: 8).")
+    parser.add_argument('--clients', type=int, default=500, help="Simultaneous clients (default: 500).")
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run (default: 30).")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('student=70,staff=25,admin=5'),
+                        help="Role weights (default: student=70,staff=25,admin=5).")
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help="Mean pause between polls per client, in seconds (default: 1.0).")
+    parser.add_argument('--slow-fraction', type=float, default=0.0,
+                        help="Fraction of clients that send their requests slowly (default: 0).")
+    parser.add_argument('--slow-seconds', type=float, default=5.0,
+                        help="Seconds a slow client takes to send one request (default: 5).")
+    parser.add_argument('--students', type=int, default=50, help="Seeded student accounts to log in.")
+    parser.add_argument('--staff', type=int, default=20, help="Seeded staff accounts to log in.")
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--connect-time', type=float, default=5,
+                        help="Seconds allowed for all clients to connect before polling starts (default: 5).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    args.base_url = args.base_url or f'http://127.0.0.1:{args.port}/api/'
+    results = {}
+    if args.serve:
+        for mode in args.serve.split(','):
+            process = start_server(mode, args.port, args)
+            try:
+                results[mode] = run(mode, args)
+            finally:
+                stop_server(process)
+    else:
+        results['server'] = run(args.base_url, args)
+
+    if len(results) > 1:
+        print(f"\n{'server':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+        for mode, summary in results.items():
+            overall = summary['overall']
+            print(f"{mode:<10}{summary['total_throughput_rps']:>10}{overall['p50_ms']:>10}"
+                  f"{overall['p95_ms']:>10}{overall['p99_ms']:>10}{overall['errors']:>9}")
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ('password', 'output')}
+        config['python'] = platform.python_version()
+        with open(args.output, 'w') as handle:
+            json.dump({'config': config, 'results': results}, handle, indent=2, sort_keys=True)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Rows serialized per second: DRF ModelSerializer + JSONRenderer (before)
+versus the values_list() RowMapper + FastJSONRenderer (after).
+Also checks that both paths produce byte-identical JSON.
+
+    python benchmarks/bench_serialization.py --requests 50000
+"""
+import argparse
+import time
+
+from _django import setup_django, temporary_database
+
+
+def best_of(repeat, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from fms_api.fast_serializers import REQUEST_MAPPER, STAFF_MAPPER
+    from fms_api.models import Request, Staff
+    from fms_api.renderers import FastJSONRenderer, orjson
+    from fms_api.seeding import seed_dataset
+    from fms_api.serializers import RequestSerializer, StaffSerializer
+
+    with temporary_database():
+        seed_dataset(requests=args.requests, staff=200, seed=1)
+
+        cases = [
+            ('requests', Request.objects.order_by('-registration_time'), RequestSerializer, REQUEST_MAPPER,
+             ('submitted_by', 'assigned_to')),
+            ('staff', Staff.objects.all(), StaffSerializer, STAFF_MAPPER, ('user',)),
+        ]
+        print(f"orjson installed: {orjson is not None}")
+        print(f"{'list':<10}{'rows':>9}{'path':>8}{'seconds':>10}{'rows/s':>12}{'speedup':>9}")
+        for label, queryset, serializer_class, mapper, related in cases:
+            rows = queryset.count()
+
+            def before():
+                # select_related so only serialization cost is compared, not N+1 queries
+                data = serializer_class(queryset.select_related(*related), many=True).data
+                return JSONRenderer().render(data)
+
+            def after():
+                return FastJSONRenderer().render(mapper.serialize(queryset))
+
+            slow, slow_bytes = best_of(args.repeat, before)
+            fast, fast_bytes = best_of(args.repeat, after)
+            assert slow_bytes == fast_bytes, f"{label}: fast path output differs from the serializer"
+
+            print(f"{label:<10}{rows:>9}{'before':>8}{slow:>10.3f}{rows / slow:>12.0f}")
+            print(f"{'':<10}{'':>9}{'after':>8}{fast:>10.3f}{rows / fast:>12.0f}{slow / fast:>8.1f}x")
+        print("Output is byte-identical on both paths.")
+
+
+if __name__ == '__main__':
+    main()
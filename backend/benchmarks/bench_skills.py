@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Multi-skill staff: waits and utilisation as more workers get a second skill.
+
+Seeds a throwaway database (--requests over --days with --staff workers,
+all single-skilled), then replays the same history (scheduler/replay.py)
+once per --shares value, giving that share of the workers --extra-skills
+additional task types picked at random. The first share should be 0: the
+single-skill baseline. Reports mean/p95 wait, utilisation (worker time
+spent travelling or on site) and decision CPU per run, and the change
+against the baseline. With spare capacity the same work gets done, so
+waits fall while utilisation barely moves; with a shorter --days (more
+load than single-skilled staff can carry) utilisation rises too.
+
+    python benchmarks/bench_skills.py --requests 20000 --days 28 --staff 40 --shares 0,0.25,0.5,1
+"""
+import argparse
+import json
+import random
+
+from _django import setup_django, temporary_database
+
+
+def with_extra_skills(workers, share, extra_skills, task_types, rng):
+    """
+    Copies of `workers` where `share` of them can also take
+    `extra_skills` other task types.
+    """
+    from fms_api.models import skill_mask
+    from scheduler.replay import _copy_workers
+
+    workers = _copy_workers(workers)
+    for worker in rng.sample(workers, round(len(workers) * share)):
+        others = [task_type for task_type in task_types if task_type != worker.task_type]
+        worker.skills |= skill_mask(rng.sample(others, min(extra_skills, len(others))))
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--days', type=int, default=28, help="Span of the seeded history (default: 28).")
+    parser.add_argument('--staff', type=int, default=40)
+    parser.add_argument('--shares', default='0,0.25,0.5,1',
+                        help="Shares of workers with extra skills, one replay each (default: 0,0.25,0.5,1).")
+    parser.add_argument('--extra-skills', type=int, default=1,
+                        help="Extra task types per multi-skilled worker (default: 1).")
+    parser.add_argument('--policy', default='greedy_nearest')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+    shares = [float(share) for share in args.shares.split(',')]
+
+    setup_django()
+    from fms_api.models import TaskTypeChoices
+    from fms_api.seeding import seed_dataset
+    from scheduler.policies import make_policy
+    from scheduler.replay import REPLAY_LIMITATIONS, load_history_from_events, load_workers, replay
+
+    policy = make_policy(args.policy)
+    results = []
+    with temporary_database():
+        seed_dataset(requests=args.requests, staff=args.staff, days=args.days, seed=args.seed)
+        tasks = load_history_from_events()
+        workers = load_workers()
+        print(f"{len(tasks)} tasks, {len(workers)} workers, policy {policy.name}, "
+              f"+{args.extra_skills} skill(s) per multi-skilled worker")
+
+        for share in shares:
+            rng = random.Random(args.seed)
+            staffed = with_extra_skills(workers, share, args.extra_skills, TaskTypeChoices.values, rng)
+            result = replay(policy, tasks, staffed).as_dict()
+            result['multi_skill_share'] = share
+            results.append(result)
+
+    baseline = results[0]
+    print(f"{'share':>7}{'mean wait s':>13}{'p95 wait s':>12}{'utilisation':>13}"
+          f"{'unassigned':>12}{'us/decision':>13}{'mean wait':>11}{'p95 wait':>10}")
+    for result in results:
+        mean_change = result['mean_wait_seconds'] / (baseline['mean_wait_seconds'] or 1) - 1
+        p95_change = result['p95_wait_seconds'] / (baseline['p95_wait_seconds'] or 1) - 1
+        print(f"{result['multi_skill_share']:>7.0%}{result['mean_wait_seconds']:>13.1f}"
+              f"{result['p95_wait_seconds']:>12.1f}{result['utilisation']:>13.1%}"
+              f"{result['tasks_unassigned']:>12}{result['decision_cpu_us_per_decision']:>13.1f}"
+              f"{mean_change:>+11.1%}{p95_change:>+10.1%}")
+    print(REPLAY_LIMITATIONS)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'config': vars(args), 'results': results}, handle, indent=2, sort_keys=True)
+        print(f"Saved results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
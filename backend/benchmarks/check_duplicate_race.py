@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Concurrency check: simultaneous reports of the same issue.
+
+Starts --reporters threads, each with its own database connection and
+student, which all submit the same request at once through
+RequestCreateSerializer. The duplicate lookup is slowed by --delay
+seconds so the check-then-insert windows overlap on every run. With the
+fingerprint lock exactly one request is created and every other report is
+merged into it, with no errors. --no-lock replaces lock_fingerprint() with
+a no-op to show the race it closes: several requests for the one issue
+and/or 'database is locked' errors on SQLite.
+
+Exits non-zero when the outcome is wrong, so it can gate a change.
+
+    python benchmarks/check_duplicate_race.py --reporters 8
+    python benchmarks/check_duplicate_race.py --reporters 8 --no-lock
+"""
+import argparse
+import sys
+import threading
+import time
+
+from _django import setup_django, temporary_database
+
+
+def submit_reports(students):
+    """
+    Submits the same report once per student, all at once.
+    Returns (merged flags, error messages).
+    """
+    from django.db import connection
+    from fms_api.buildings import get_registry
+    from fms_api.serializers import RequestCreateSerializer
+
+    building = get_registry().get(get_registry().codes[0])
+    payload = {
+        'task_type': 'plumbing', 'building': building.code,
+        'wing': building.wings[0] if building.wings else '', 'location_floor': 1,
+        'description': 'Washroom tap is leaking',
+    }
+    barrier = threading.Barrier(len(students))
+    merged, errors = [], []
+
+    def report(student):
+        try:
+            serializer = RequestCreateSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            barrier.wait()
+            serializer.save(submitted_by=student)
+            merged.append(serializer.duplicate_of is not None)
+        except Exception as exc:
+            errors.append(f"{type(exc).__name__}: {exc}")
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=report, args=(student,)) for student in students]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return merged, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reporters', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=0.2,
+                        help="Seconds added to each duplicate lookup (default: 0.2).")
+    parser.add_argument('--no-lock', action='store_true', help="Disable the fingerprint lock.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from fms_api import serializers
+    from fms_api.models import Request
+
+    find_open_duplicate = serializers.find_open_duplicate
+
+    def slow_find_open_duplicate(fingerprint):
+        existing = find_open_duplicate(fingerprint)
+        time.sleep(args.delay)
+        return existing
+
+    serializers.find_open_duplicate = slow_find_open_duplicate
+    if args.no_lock:
+        serializers.lock_fingerprint = lambda fingerprint: None
+
+    with temporary_database(on_disk=True):
+        students = [User.objects.create_user(f'race_student_{i}') for i in range(args.reporters)]
+        merged, errors = submit_reports(students)
+        created = Request.objects.count()
+        extra_reporters = sum(request.extra_reporters.count() for request in Request.objects.all())
+
+    print(f"{args.reporters} simultaneous reports, fingerprint lock {'off' if args.no_lock else 'on'}")
+    print(f"  requests created  {created}")
+    print(f"  reports merged    {sum(merged)} ({extra_reporters} extra reporters recorded)")
+    print(f"  errors            {len(errors)}")
+    for error in sorted(set(errors)):
+        print(f"    {error}")
+
+    ok = created == 1 and not errors and sum(merged) == args.reporters - 1
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
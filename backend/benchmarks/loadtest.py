@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+"""
+HTTP load generator for a locally running FMS Connect backend.
+
+Simulates students, staff and admins logging in via /login/ and then
+driving a realistic mix of traffic:
+  * students create requests and poll their request list
+  * staff poll their task list and complete in-progress tasks
+  * admins refresh the dashboard (all requests + all staff)
+
+Reports throughput and p50/p95/p99 latency per URL name (the names used in
+fms_api/urls.py) plus error counts, including SQLite "database is locked"
+failures. Results can be saved as a JSON baseline and compared later.
+
+Only the standard library is used. Typical run against seeded data:
+
+    python manage.py seed_fms --requests 100000
+    python manage.py runserver --noreload
+    python benchmarks/loadtest.py --duration 60 --users 30 --output baseline.json
+    # ... change code, restart server ...
+    python benchmarks/loadtest.py --duration 60 --users 30 --compare baseline.json
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Mirrors fms_api/urls.py (name -> path under the API prefix)
+URLS = {
+    'api-login': 'login/',
+    'request-create': 'requests/create/',
+    'request-list-student': 'requests/my-requests/',
+    'task-list-staff': 'staff/my-tasks/',
+    'task-complete': 'staff/task/complete/{pk}/',
+    'admin-request-list': 'admin/all-requests/',
+    'admin-staff-list': 'admin/all-staff/',
+}
+
+# Accounts created by `manage.py seed_fms`
+DEFAULT_PASSWORD = 'fms-seed-password'
+STUDENT_USERNAME = 'seed_student_{:07d}'
+STAFF_USERNAME = 'seed_staff_{:05d}'
+ADMIN_USERNAME = 'seed_admin'
+
+TASK_TYPES = ['cleaning', 'water', 'maintenance', 'plumbing', 'electrical', 'pest', 'other']
+BUILDINGS = {
+    'girls_hostel': 6, 'boys_hostel_old': 7, 'boys_hostel_h1': 11, 'boys_hostel_h2': 11,
+    'lhc': 5, 'rnd': 8, 'academic': 6, 'guest_house': 1, 'library': 4,
+}
+
+
+class Stats:
+    """
+    Thread-safe collector of latencies and errors per URL name.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name, seconds, error=None):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if error:
+                per_name = self.errors.setdefault(name, {})
+                per_name[error] = per_name.get(error, 0) + 1
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def classify_error(status, body):
+    if status is None:
+        return 'connection'
+    if b'database is locked' in body:
+        return 'sqlite_locked'
+    if status == 429:
+        return 'http_429'
+    if status >= 500:
+        return 'http_5xx'
+    if status >= 400:
+        return 'http_4xx'
+    return None
+
+
+class Client:
+    """
+    One keep-alive HTTP connection per virtual user.
+    """
+    def __init__(self, base_url, stats, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/') + '/'
+        self.stats = stats
+        self.timeout = timeout
+        self.token = None
+        self.conn = None
+
+    def _connection(self):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self.conn
+
+    def call(self, method, name, body=None, **path_kwargs):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        path = self.prefix + URLS[name].format(**path_kwargs)
+        payload = json.dumps(body).encode() if body is not None else None
+
+        started = time.perf_counter()
+        status, data = None, b''
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            status, data = response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the connection; the next call reconnects
+            if self.conn is not None:
+                self.conn.close()
+            self.conn = None
+        elapsed = time.perf_counter() - started
+
+        self.stats.record(name, elapsed, classify_error(status, data))
+        if status is None or status >= 400 or not data:
+            return status, None
+        try:
+            return status, json.loads(data)
+        except ValueError:
+            return status, None
+
+    def login(self, username, password):
+        status, data = self.call('POST', 'api-login', {'username': username, 'password': password})
+        if data and 'token' in data:
+            self.token = data['token']
+            return True
+        return False
+
+
+# --- Virtual user behaviour ---
+
+def student_step(client, rng):
+    if rng.random() < 0.2:
+        building = rng.choice(list(BUILDINGS))
+        client.call('POST', 'request-create', {
+            'task_type': rng.choice(TASK_TYPES),
+            'building': building,
+            'wing': rng.choice(['A', 'B', 'C']) if building == 'boys_hostel_old' else '',
+            'location_floor': rng.randint(1, BUILDINGS[building]),
+            'description': f'load test issue {rng.randint(1, 10_000)}',
+        })
+    else:
+        client.call('GET', 'request-list-student')
+
+
+def staff_step(client, rng):
+    status, tasks = client.call('GET', 'task-list-staff')
+    in_progress = [task for task in (tasks or []) if task.get('status') == 'in_progress']
+    if in_progress and rng.random() < 0.5:
+        client.call('POST', 'task-complete', pk=in_progress[0]['id'])
+
+
+def admin_step(client, rng):
+    client.call('GET', 'admin-request-list')
+    client.call('GET', 'admin-staff-list')
+
+
+ROLES = {
+    'student': student_step,
+    'staff': staff_step,
+    'admin': admin_step,
+}
+
+
+def virtual_user(index, role, args, stats, deadline):
+    rng = random.Random(args.seed * 100_003 + index)
+    client = Client(args.base_url, stats, args.timeout)
+
+    if role == 'student':
+        username = STUDENT_USERNAME.format(rng.randrange(args.students))
+    elif role == 'staff':
+        username = STAFF_USERNAME.format(index % args.staff)
+    else:
+        username = ADMIN_USERNAME
+    if not client.login(username, args.password):
+        print(f"Login failed for {username} ({role}); this virtual user is idle.", file=sys.stderr)
+        return
+
+    step = ROLES[role]
+    while time.monotonic() < deadline:
+        step(client, rng)
+        if args.think_time:
+            time.sleep(rng.uniform(0, 2 * args.think_time))
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        role, _, weight = part.partition('=')
+        if role not in ROLES:
+            raise argparse.ArgumentTypeError(f"unknown role '{role}'")
+        mix[role] = float(weight)
+    return mix
+
+
+def summarise(stats, elapsed):
+    endpoints = {}
+    for name in sorted(stats.latencies):
+        values = sorted(stats.latencies[name])
+        errors = stats.errors.get(name, {})
+        endpoints[name] = {
+            'count': len(values),
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+            'error_rate': round(sum(errors.values()) / len(values), 4),
+            'errors': errors,
+        }
+    total = sum(endpoint['count'] for endpoint in endpoints.values())
+    return {
+        'total_requests': total,
+        'total_throughput_rps': round(total / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+
+def print_report(summary):
+    print(f"{'url name':<24}{'count':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for name, row in summary['endpoints'].items():
+        print(f"{name:<24}{row['count']:>8}{row['throughput_rps']:>9}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['error_rate']:>9.2%}")
+        for error, count in sorted(row['errors'].items()):
+            print(f"{'':<26}{error}: {count}")
+    print(f"Total: {summary['total_requests']} requests, {summary['total_throughput_rps']} req/s")
+
+
+def compare(summary, baseline, max_regression):
+    """
+    Prints p95 and error-rate changes against a baseline.
+    Returns True if any endpoint regressed more than max_regression.
+    """
+    regressed = False
+    print(f"\n{'url name':<24}{'p95 base':>10}{'p95 now':>10}{'change':>9}{'err base':>10}{'err now':>9}")
+    for name, row in summary['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            print(f"{name:<24}{'-':>10}{row['p95_ms']:>10}{'new':>9}")
+            continue
+        change = (row['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+        flag = ''
+        if change > max_regression or row['error_rate'] > base['error_rate'] + 0.01:
+            regressed = True
+            flag = '  <-- regression'
+        print(f"{name:<24}{base['p95_ms']:>10}{row['p95_ms']:>10}{change:>+9.1%}"
+              f"{base['error_rate']:>10.2%}{row['error_rate']:>9.2%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/')
+    parser.add_argument('--duration', type=float, default=30, help="Seconds to run (default: 30).")
+    parser.add_argument('--users', type=int, default=20, help="Concurrent virtual users (default: 20).")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('student=70,staff=25,admin=5'),
+                        help="Role weights (default: student=70,staff=25,admin=5).")
+    parser.add_argument('--think-time', type=float, default=0.5,
+                        help="Mean pause between actions per user, in seconds (default: 0.5).")
+    parser.add_argument('--students', type=int, default=100, help="Seeded student accounts to use.")
+    parser.add_argument('--staff', type=int, default=60, help="Seeded staff accounts to use.")
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the results as a JSON baseline to this file.")
+    parser.add_argument('--compare', help="Compare against a JSON baseline written earlier.")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Allowed p95 increase before --compare fails (default: 0.2 = 20%%).")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    roles = rng.choices(list(args.mix), weights=list(args.mix.values()), k=args.users)
+
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=virtual_user, args=(index, role, args, stats, deadline), daemon=True)
+        for index, role in enumerate(roles)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    summary = summarise(stats, elapsed)
+    summary['config'] = {
+        'base_url': args.base_url,
+        'duration_s': args.duration,
+        'users': args.users,
+        'mix': args.mix,
+        'think_time_s': args.think_time,
+        'seed': args.seed,
+        'python': platform.python_version(),
+    }
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(summary, handle, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if compare(summary, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,79 @@
+from django import forms
 from django.contrib import admin
-from .models import Staff, Request
+from .models import (
+    Building, Staff, Shift, Request, IdempotencyKey, TaskEvent, TaskSlaRollup,
+    TaskTypeChoices, skill_mask, skill_names
+)
+from .search import search_requests
+
+@admin.register(Building)
+class BuildingAdmin(admin.ModelAdmin):
+    """
+    Campus buildings. Changes reach every server process within seconds
+    (see fms_api/buildings.py).
+    """
+    list_display = ('name', 'code', 'floors', 'wings', 'gender_restriction', 'campus_position')
+    list_filter = ('gender_restriction',)
+    ordering = ('campus_position', 'code')
+
+class StaffAdminForm(forms.ModelForm):
+    """
+    Edits the skills bitmask as checkboxes.
+    """
+    skills = forms.MultipleChoiceField(
+        choices=TaskTypeChoices.choices,
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        help_text="Task types this worker can take. Their task_type is always included."
+    )
+
+    class Meta:
+        model = Staff
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial['skills'] = skill_names(self.instance.skills)
+
+    def clean_skills(self):
+        return skill_mask(self.cleaned_data['skills'])
+
+class ShiftInline(admin.TabularInline):
+    model = Shift
+    extra = 1
+    ordering = ('-start',)
 
 @admin.register(Staff)
 class StaffAdmin(admin.ModelAdmin):
     """
     Configuration for the Staff model in the Django admin panel.
     """
+    form = StaffAdminForm
+    inlines = [ShiftInline]
     list_display = (
-        'name', 'task_type', 'gender', 'status', 
+        'name', 'task_type', 'skill_list', 'gender', 'status', 
         'current_building', 'current_location_floor', 'user'
     )
     list_filter = ('status', 'task_type', 'gender', 'current_building')
     search_fields = ('name', 'user__username')
     ordering = ('name',)
 
+    @admin.display(description='skills')
+    def skill_list(self, obj):
+        return ', '.join(skill_names(obj.skills))
+
+@admin.register(Shift)
+class ShiftAdmin(admin.ModelAdmin):
+    """
+    Staff shifts. Changes reach every scheduler process within seconds
+    (see scheduler/shifts.py).
+    """
+    list_display = ('staff', 'start', 'end')
+    list_filter = ('staff__task_type', 'start')
+    search_fields = ('staff__name',)
+    date_hierarchy = 'start'
+    ordering = ('-start',)
+
 @admin.register(Request)
 class RequestAdmin(admin.ModelAdmin):
     """
@@ -28,4 +88,60 @@ class RequestAdmin(admin.ModelAdmin):
     ordering = ('-registration_time',)
     
     # Make some fields read-only in the admin detail view
-    readonly_fields = ('registration_time', 'submitted_by')
\ No newline at end of file
+    readonly_fields = ('registration_time', 'submitted_by', 'fingerprint')
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Uses the full-text index instead of LIKE '%...%' over search_fields.
+        A purely numeric term also matches the request id.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+
+        matches = queryset.filter(id__in=search_requests(queryset, search_term).values('id'))
+        if search_term.isdigit():
+            matches = matches | queryset.filter(id=int(search_term))
+        return matches, False
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    """
+    Read-only view of stored Idempotency-Key responses.
+    """
+    list_display = ('key', 'scope', 'user', 'status_code', 'created_at')
+    list_filter = ('scope', 'status_code')
+    search_fields = ('key', 'user__username')
+    ordering = ('-created_at',)
+    readonly_fields = ('user', 'scope', 'key', 'request_fingerprint', 'status_code', 'response_body', 'created_at')
+
+
+@admin.register(TaskEvent)
+class TaskEventAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the task event log (it is append-only).
+    """
+    list_display = ('occurred_at', 'request_id', 'event_type', 'task_type', 'building', 'staff_id', 'travel_distance')
+    list_filter = ('event_type', 'task_type', 'building')
+    search_fields = ('request_id',)
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(TaskSlaRollup)
+class TaskSlaRollupAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the hourly wait/service time rollups.
+    """
+    list_display = ('hour', 'metric', 'building', 'task_type', 'count', 'max_seconds')
+    list_filter = ('metric', 'building', 'task_type')
+    ordering = ('-hour',)
+    readonly_fields = ('metric', 'hour', 'building', 'task_type', 'count', 'total_seconds',
+                       'min_seconds', 'max_seconds', 'histogram')
@@ -0,0 +1,230 @@
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AnalyticsCursor, TaskEvent, TaskEventType, TaskSlaRollup
+
+# --- SLA Rollups ---
+# Wait time (registered -> assigned, from 'assigned' events) and service time
+# (assigned -> completed, from 'completed' events) are pre-aggregated per
+# hour x building x task_type into TaskSlaRollup rows. update_rollups() folds
+# in only the events added since its last run (a cursor on TaskEvent.id), so
+# a dashboard reads a few rollup rows per hour instead of the raw log.
+# Readers never fold events in themselves; keep
+# `python manage.py update_sla_rollups --loop` running to keep them current.
+#
+# Percentiles come from a log-scale histogram whose buckets are 10% wide,
+# so a reported percentile is within about 5% of the exact value.
+
+# metric -> (event type, TaskEvent field holding the duration)
+METRICS = {
+    'wait': (TaskEventType.ASSIGNED, 'wait_seconds'),
+    'service': (TaskEventType.COMPLETED, 'service_seconds'),
+}
+
+GROUP_BY_FIELDS = ('building', 'task_type', 'hour', 'hour_of_day')
+PERCENTILES = (50, 90, 95, 99)
+
+HISTOGRAM_GROWTH = 1.1
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+CURSOR_NAME = 'sla-rollups'
+DEFAULT_BATCH_SIZE = 5000
+# Events inserted less than this long ago are left for the next run, so
+# that inserts still in flight with lower ids (committing after a higher
+# id, possible outside SQLite) are not skipped by the cursor. Judged by
+# TaskEvent.recorded_at, the database's insert time; occurred_at can be far
+# older than the insert (buffered, or backdated by the seeder).
+SETTLE_SECONDS = 10
+
+
+def histogram_bucket(seconds):
+    """
+    Bucket 0 holds [0, 1s); bucket n >= 1 holds [1.1**(n-1), 1.1**n) seconds.
+    """
+    if seconds < 1:
+        return 0
+    return int(math.log(seconds) / _LOG_GROWTH) + 1
+
+
+def bucket_midpoint(bucket):
+    if bucket == 0:
+        return 0.5
+    return HISTOGRAM_GROWTH ** (bucket - 0.5)
+
+
+class SlaSummary:
+    """
+    Count, mean, min/max and histogram of a set of durations; mergeable.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = {}
+
+    def add(self, seconds):
+        self.merge(1, seconds, seconds, seconds, {histogram_bucket(seconds): 1})
+
+    def merge(self, count, total, minimum, maximum, histogram):
+        self.count += count
+        self.total += total
+        if minimum is not None and (self.min is None or minimum < self.min):
+            self.min = minimum
+        if maximum is not None and (self.max is None or maximum > self.max):
+            self.max = maximum
+        for bucket, bucket_count in histogram.items():
+            bucket = int(bucket)  # JSON object keys come back as strings
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + bucket_count
+
+    def merge_rollup(self, rollup):
+        self.merge(rollup.count, rollup.total_seconds, rollup.min_seconds,
+                   rollup.max_seconds, rollup.histogram)
+
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return min(max(bucket_midpoint(bucket), self.min), self.max)
+        return self.max
+
+    def as_dict(self):
+        data = {
+            'count': self.count,
+            'mean_seconds': self.total / self.count if self.count else None,
+            'min_seconds': self.min,
+        }
+        for percent in PERCENTILES:
+            data[f'p{percent}_seconds'] = self.percentile(percent)
+        data['max_seconds'] = self.max
+        return data
+
+
+def _hour_of(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def update_rollups(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Folds up to `batch_size` new events into the rollups.
+    Returns the number of events consumed (0 when up to date).
+    Safe to call concurrently: the cursor is advanced with a compare-and-set,
+    so a batch is only ever counted once.
+    """
+    cursor, _ = AnalyticsCursor.objects.get_or_create(name=CURSOR_NAME)
+    start = cursor.last_event_id
+    settled_before = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+
+    rows = TaskEvent.objects.filter(id__gt=start).order_by('id').values_list(
+        'id', 'event_type', 'occurred_at', 'recorded_at', 'building', 'task_type',
+        'wait_seconds', 'service_seconds'
+    )[:batch_size]
+
+    # 1. Aggregate the batch in memory
+    summaries = {}
+    last_id = start
+    consumed = 0
+    for event_id, event_type, occurred_at, recorded_at, building, task_type, wait, service in rows:
+        if recorded_at >= settled_before:
+            break
+        last_id = event_id
+        consumed += 1
+        for metric, seconds in (('wait', wait), ('service', service)):
+            if seconds is None or event_type != METRICS[metric][0]:
+                continue
+            key = (metric, _hour_of(occurred_at), building, task_type)
+            summaries.setdefault(key, SlaSummary()).add(seconds)
+    if not consumed:
+        return 0
+
+    # 2. Merge into the stored rollups
+    with transaction.atomic():
+        claimed = AnalyticsCursor.objects.filter(
+            name=CURSOR_NAME, last_event_id=start
+        ).update(last_event_id=last_id)
+        if not claimed:
+            return 0  # Another run folded this batch first
+
+        existing = {
+            (rollup.metric, rollup.hour, rollup.building, rollup.task_type): rollup
+            for rollup in TaskSlaRollup.objects.filter(
+                metric__in={key[0] for key in summaries},
+                hour__in={key[1] for key in summaries},
+            )
+        }
+        created, updated = [], []
+        for key, summary in summaries.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                metric, hour, building, task_type = key
+                rollup = TaskSlaRollup(metric=metric, hour=hour, building=building, task_type=task_type)
+                created.append(rollup)
+            else:
+                updated.append(rollup)
+            merged = SlaSummary()
+            merged.merge_rollup(rollup)
+            merged.merge(summary.count, summary.total, summary.min, summary.max, summary.histogram)
+            rollup.count = merged.count
+            rollup.total_seconds = merged.total
+            rollup.min_seconds = merged.min
+            rollup.max_seconds = merged.max
+            rollup.histogram = {str(bucket): count for bucket, count in sorted(merged.histogram.items())}
+        TaskSlaRollup.objects.bulk_create(created)
+        TaskSlaRollup.objects.bulk_update(
+            updated, ['count', 'total_seconds', 'min_seconds', 'max_seconds', 'histogram']
+        )
+    return consumed
+
+
+def rollups_as_of():
+    """
+    When the newest event folded into the rollups happened, or None if
+    nothing has been folded in yet.
+    """
+    last_event_id = (
+        AnalyticsCursor.objects.filter(name=CURSOR_NAME).values_list('last_event_id', flat=True).first()
+    )
+    if not last_event_id:
+        return None
+    return TaskEvent.objects.filter(id=last_event_id).values_list('occurred_at', flat=True).first()
+
+
+def reset_rollups():
+    """
+    Drops every rollup; the next update_rollups() calls rebuild them from
+    the whole event log.
+    """
+    with transaction.atomic():
+        TaskSlaRollup.objects.all().delete()
+        AnalyticsCursor.objects.filter(name=CURSOR_NAME).update(last_event_id=0)
+
+
+def sla_summary(metric, group_by, start, end, filters=None):
+    """
+    Percentiles of `metric` ('wait' or 'service') for events in [start, end),
+    one entry per combination of the `group_by` fields.
+    """
+    rollups = TaskSlaRollup.objects.filter(
+        metric=metric, hour__gte=start, hour__lt=end, **(filters or {})
+    ).values_list('building', 'task_type', 'hour', 'count', 'total_seconds',
+                  'min_seconds', 'max_seconds', 'histogram')
+
+    groups = {}
+    for building, task_type, hour, count, total, minimum, maximum, histogram in rollups.iterator():
+        values = {'building': building, 'task_type': task_type, 'hour': hour}
+        if 'hour_of_day' in group_by:
+            values['hour_of_day'] = timezone.localtime(hour).hour
+        key = tuple(values[field] for field in group_by)
+        groups.setdefault(key, SlaSummary()).merge(count, total, minimum, maximum, histogram)
+
+    return [
+        {**dict(zip(group_by, key)), **summary.as_dict()}
+        for key, summary in sorted(groups.items())
+    ]
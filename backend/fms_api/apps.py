@@ -1,5 +1,27 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 class FmsApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'fms_api'
\ No newline at end of file
+    name = 'fms_api'
+
+    def ready(self):
+        # Keep the full-text search triggers in place after every migrate
+        from .search import ensure_search_index
+        post_migrate.connect(ensure_search_index, sender=self)
+
+        # ... and the triggers that keep the task event log append-only
+        from .events import ensure_append_only
+        post_migrate.connect(ensure_append_only, sender=self)
+
+        # Every process reloads its building registry after a change
+        from .buildings import invalidate_registry
+        from .models import Building
+        post_save.connect(invalidate_registry, sender=Building)
+        post_delete.connect(invalidate_registry, sender=Building)
+
+        # ... and its shift calendar after a shift changes
+        from scheduler.shifts import invalidate_calendar
+        from .models import Shift
+        post_save.connect(invalidate_calendar, sender=Shift)
+        post_delete.connect(invalidate_calendar, sender=Shift)
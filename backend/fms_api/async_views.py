@@ -0,0 +1,167 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, permissions
+from rest_framework.request import Request as APIRequest
+from rest_framework.settings import api_settings
+
+from .fast_serializers import REQUEST_MAPPER, STAFF_MAPPER, select_field_names
+from .models import Request, Staff, TaskStatus
+from .renderers import FastJSONRenderer
+from .serializers import RequestSerializer
+from scheduler.logic import get_upcoming_tasks_for_worker
+
+# --- Async Read Views ---
+# The list endpoints dashboards poll all day. Under ASGI (fms_project/asgi.py)
+# they run on the event loop and only hop to a thread for authentication and
+# for the database work, so a slow client or a slow SQLite read does not hold
+# a worker thread for the whole request. Under WSGI Django runs them with
+# async_to_sync; the responses are the same either way.
+#
+# Authentication and permissions are DRF's own classes (run on the request's
+# thread, as they may hit the database), so tokens, sessions and error
+# responses behave exactly like the other API views. Output matches the
+# DRF serializers, including ?fields= / ?omit=. Unlike DRF views they always
+# render JSON: there is no browsable API page and no content negotiation
+# (Accept / ?format=).
+
+
+class AsyncAPIView(View):
+    """
+    Base class for read-only async API views. Subclasses implement
+    `async def get_data(self, request)` returning JSON-ready data.
+    """
+    http_method_names = ['get', 'head', 'options']
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = [permissions.IsAuthenticated]
+    renderer = FastJSONRenderer()
+
+    def check_access(self, request):
+        """
+        Authenticates the request and applies the permission classes,
+        like APIView.initial(). Raises NotAuthenticated / PermissionDenied.
+        """
+        request.user  # runs the authenticators
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(detail=getattr(permission, 'message', None))
+
+    def render(self, data, status=200):
+        return HttpResponse(self.renderer.render(data), status=status, content_type='application/json')
+
+    def error_response(self, exc, request):
+        # Same status rules as APIView.handle_exception()
+        response = self.render({'detail': exc.detail}, status=exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+            if header:
+                response['WWW-Authenticate'] = header
+            else:
+                response.status_code = 403
+        return response
+
+    async def get(self, request, *args, **kwargs):
+        api_request = APIRequest(
+            request, authenticators=[authenticator() for authenticator in self.authentication_classes]
+        )
+        try:
+            await sync_to_async(self.check_access)(api_request)
+        except exceptions.APIException as exc:
+            return self.error_response(exc, api_request)
+        return self.render(await self.get_data(api_request))
+
+    async def get_data(self, request):
+        raise NotImplementedError
+
+
+class AsyncMappedListView(AsyncAPIView):
+    """
+    Lists `get_queryset()` through `row_mapper`, honouring ?fields= / ?omit=.
+    """
+    row_mapper = None
+
+    def get_queryset(self, request):
+        raise NotImplementedError
+
+    async def get_data(self, request):
+        names = select_field_names(self.row_mapper.names, request.query_params)
+        return await self.row_mapper.subset(names).aserialize(self.get_queryset(request))
+
+
+# --- Student ---
+
+class StudentRequestListView(AsyncMappedListView):
+    """
+    API endpoint for a student to see *their own* submitted requests.
+    """
+    row_mapper = REQUEST_MAPPER
+
+    def get_queryset(self, request):
+        # Requests submitted by the logged-in user, including open requests
+        # their duplicate reports were merged into. The subquery (rather than
+        # a join + DISTINCT) lets SQLite use an index for each side of the OR.
+        user = request.user
+        merged_into = Request.extra_reporters.through.objects.filter(user=user).values('request_id')
+        return Request.objects.filter(
+            Q(submitted_by=user) | Q(pk__in=merged_into)
+        ).order_by('-registration_time')
+
+
+# --- Staff ---
+
+class StaffTaskListView(AsyncAPIView):
+    """
+    API endpoint for a staff member's task feed: their current assignment
+    followed by the next few pending tasks they are eligible for, in the
+    order the scheduler would hand them out.
+    """
+    def get_feed(self, request):
+        # Find the Staff profile linked to the logged-in User
+        try:
+            staff_member = request.user.staff
+        except Staff.DoesNotExist:
+            return [] # Not a staff member, return nothing
+
+        # 1. Current assignment(s)
+        current = list(
+            Request.objects
+            .select_related('submitted_by', 'assigned_to')
+            .filter(assigned_to=staff_member, status=TaskStatus.IN_PROGRESS)
+            .order_by('registration_time')
+        )
+        # 2. Top-N upcoming eligible tasks, served from the queue index
+        feed_size = getattr(settings, 'FMS_STAFF_FEED_SIZE', 10)
+        tasks = current + get_upcoming_tasks_for_worker(staff_member, feed_size)
+        return RequestSerializer(tasks, many=True, context={'request': request}).data
+
+    async def get_data(self, request):
+        # The feed is built by the (sync) scheduler code: one thread hop
+        return await sync_to_async(self.get_feed)(request)
+
+
+# --- Admin ---
+
+class AdminRequestListView(AsyncMappedListView):
+    """
+    API endpoint for Admins to see *all* requests.
+    """
+    row_mapper = REQUEST_MAPPER
+    permission_classes = [permissions.IsAdminUser] # Only Admin users
+
+    def get_queryset(self, request):
+        return Request.objects.all().order_by('-registration_time')
+
+
+class AdminStaffListView(AsyncMappedListView):
+    """
+    API endpoint for Admins to see *all* staff.
+    """
+    row_mapper = STAFF_MAPPER
+    permission_classes = [permissions.IsAdminUser] # Only Admin users
+
+    def get_queryset(self, request):
+        return Staff.objects.all()
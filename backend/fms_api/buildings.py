@@ -0,0 +1,152 @@
+import time
+import uuid
+from types import MappingProxyType
+from typing import NamedTuple
+
+from .models import Building, GenderChoices
+from .throttling import get_shared_cache
+
+# --- Building Registry ---
+# Building facts (floors, wings, gender rules, campus position) live in the
+# Building table. Each process keeps an immutable snapshot of it in memory,
+# so validation, eligibility and distance checks are plain dict lookups.
+#
+# The snapshot is tagged with a version token stored in the shared cache.
+# Saving or deleting a Building replaces the token (signal handlers below);
+# every process compares tokens at most once per VERSION_CHECK_SECONDS and
+# reloads when it changed. Bulk QuerySet.update() does not send signals:
+# call invalidate_registry() after one.
+
+VERSION_KEY = 'fms:buildings:version'
+VERSION_CHECK_SECONDS = 2
+
+# Position used for buildings the registry does not know (far from everything)
+UNKNOWN_POSITION = 99
+
+
+class BuildingInfo(NamedTuple):
+    code: str
+    name: str
+    floors: int
+    wings: tuple
+    gender_restriction: str  # '' when any worker may go there
+    campus_position: int
+
+
+class BuildingRegistry:
+    """
+    Read-only view of every building, with the derived lookups precomputed.
+    """
+    def __init__(self, buildings, version):
+        self.version = version
+        self.buildings = MappingProxyType({building.code: building for building in buildings})
+        self.codes = tuple(self.buildings)
+
+        # Buildings a worker of each gender may not be sent to
+        self.excluded_by_gender = MappingProxyType({
+            gender: frozenset(
+                building.code for building in buildings
+                if building.gender_restriction and building.gender_restriction != gender
+            )
+            for gender in GenderChoices.values
+        })
+
+        # Travel distance between every pair of known buildings
+        self.distances = MappingProxyType({
+            (a.code, b.code): abs(a.campus_position - b.campus_position)
+            for a in buildings for b in buildings
+        })
+
+    def get(self, code):
+        return self.buildings.get(code)
+
+    def display_name(self, code):
+        building = self.buildings.get(code)
+        return building.name if building is not None else code
+
+    def floor_limit(self, code):
+        building = self.buildings.get(code)
+        return building.floors if building is not None else 1
+
+    def allowed_genders(self, code):
+        """
+        Genders of workers who may be sent to this building.
+        """
+        building = self.buildings.get(code)
+        if building is not None and building.gender_restriction:
+            return (building.gender_restriction,)
+        return tuple(GenderChoices.values)
+
+    def excluded_buildings(self, gender):
+        """
+        Buildings a worker of this gender may not be sent to,
+        or None if the gender is not set.
+        """
+        return self.excluded_by_gender.get(gender)
+
+    def distance(self, code1, code2):
+        distance = self.distances.get((code1, code2))
+        if distance is not None:
+            return distance
+        # Same rule for unknown buildings as before the registry existed
+        positions = [
+            self.buildings[code].campus_position if code in self.buildings else UNKNOWN_POSITION
+            for code in (code1, code2)
+        ]
+        return abs(positions[0] - positions[1])
+
+
+def load_registry(version=None):
+    buildings = [
+        BuildingInfo(
+            code=building.code,
+            name=building.name,
+            floors=building.floors,
+            wings=tuple(building.wings or ()),
+            gender_restriction=building.gender_restriction,
+            campus_position=building.campus_position,
+        )
+        for building in Building.objects.order_by('campus_position', 'code')
+    ]
+    return BuildingRegistry(buildings, version)
+
+
+def _current_version():
+    cache = get_shared_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # First use, or the cache was cleared: start a new version
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+_registry = None
+_checked_at = 0.0
+
+
+def get_registry():
+    """
+    Returns this process's building snapshot, reloading it if another
+    process changed the buildings since it was loaded.
+    """
+    global _registry, _checked_at
+    now = time.monotonic()
+    if _registry is not None and now - _checked_at < VERSION_CHECK_SECONDS:
+        return _registry
+
+    version = _current_version()
+    if _registry is None or _registry.version != version:
+        _registry = load_registry(version)
+    _checked_at = now
+    return _registry
+
+
+def invalidate_registry(**kwargs):
+    """
+    Makes every process reload the buildings. Connected to Building
+    post_save / post_delete in apps.py.
+    """
+    global _registry
+    get_shared_cache().set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _registry = None
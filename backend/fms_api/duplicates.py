@@ -0,0 +1,101 @@
+import hashlib
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Request, TaskStatus
+
+# --- Duplicate Detection ---
+# Two requests are treated as the same issue when they share the same
+# task type and location and their descriptions reduce to the same set
+# of word shingles. The fingerprint is stored on the request and indexed,
+# so finding an open duplicate is a single index lookup.
+#
+# Check-then-insert must not interleave for the same issue, or two
+# simultaneous reports both find no duplicate and both create a request.
+# lock_fingerprint() serialises them inside the caller's transaction:
+#   PostgreSQL - a transaction-level advisory lock on the fingerprint;
+#   SQLite     - the database write lock, taken up front. A transaction that
+#                reads first and writes later cannot wait for another
+#                writer (it fails with 'database is locked'); one that
+#                writes first just waits its turn (the busy timeout).
+
+# Words that carry no information about the actual issue
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'at', 'be', 'been', 'but', 'by', 'can', 'do',
+    'for', 'from', 'has', 'have', 'in', 'is', 'it', 'its', 'me', 'my', 'near',
+    'not', 'of', 'on', 'or', 'our', 'please', 'since', 'so', 'the', 'there',
+    'this', 'to', 'very', 'was', 'we', 'with',
+])
+
+# Requests that can still absorb extra reporters
+OPEN_STATUSES = [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
+
+DEFAULT_DUPLICATE_WINDOW_MINUTES = 120
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def description_shingles(description):
+    """
+    Reduces a free-text description to a sorted set of normalised words.
+    'Washroom tap is LEAKING!!' and 'leaking tap in washroom' give the same result.
+    """
+    words = _WORD_RE.findall((description or '').lower())
+    return sorted({word for word in words if word not in STOP_WORDS})
+
+
+def compute_fingerprint(task_type, building, wing, location_floor, description):
+    """
+    Returns the hex digest used to match a request against open duplicates.
+    """
+    parts = [
+        (task_type or '').strip().lower(),
+        (building or '').strip().lower(),
+        (wing or '').strip().lower(),
+        str(location_floor),
+        ' '.join(description_shingles(description)),
+    ]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_duplicate_window():
+    minutes = getattr(settings, 'FMS_DUPLICATE_WINDOW_MINUTES', DEFAULT_DUPLICATE_WINDOW_MINUTES)
+    return timedelta(minutes=minutes)
+
+
+def find_open_duplicate(fingerprint):
+    """
+    Returns the oldest open request with this fingerprint registered inside
+    the duplicate window, or None.
+    Served by the (fingerprint, registration_time) index.
+    """
+    cutoff = timezone.now() - get_duplicate_window()
+    return (
+        Request.objects
+        .filter(
+            fingerprint=fingerprint,
+            registration_time__gte=cutoff,
+            status__in=OPEN_STATUSES,
+        )
+        .order_by('registration_time', 'pk')
+        .first()
+    )
+
+
+def lock_fingerprint(fingerprint):
+    """
+    Blocks until no other transaction is checking or creating a request with
+    this fingerprint; held until the current transaction ends. Must be
+    called inside transaction.atomic(), before find_open_duplicate().
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # 60 bits of the digest fit a bigint lock key
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [int(fingerprint[:15], 16)])
+        elif connection.vendor == 'sqlite':
+            # A write that touches no row still takes the write lock
+            cursor.execute(f"UPDATE {Request._meta.db_table} SET id = id WHERE 0")
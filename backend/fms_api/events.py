@@ -0,0 +1,183 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connections, transaction
+from django.db.transaction import TransactionManagementError
+from django.utils import timezone
+
+from .models import TaskEvent, TaskEventType
+
+logger = logging.getLogger(__name__)
+
+# --- Task Lifecycle Event Log ---
+# Every transition of a request (created, assigned, reassigned, completed,
+# cancelled, deleted) is recorded as an immutable TaskEvent row. Events are
+# buffered per thread and written with one bulk INSERT:
+#   - at the end of every HTTP request (TaskEventMiddleware),
+#   - as soon as the buffer holds FMS_EVENT_BATCH_SIZE events,
+#   - at interpreter exit, for management commands and scripts.
+# The event log is telemetry: a failed flush is logged, never raised. When
+# the failure is transient (database locked or down) the events stay in the
+# buffer and the next flush retries them; only past FMS_EVENT_BUFFER_LIMIT
+# buffered events are the oldest dropped, with an error.
+#
+# On SQLite the log is append-only in the database itself: triggers reject
+# every UPDATE and DELETE of fms_api_taskevent, whatever the code path
+# (QuerySet.update/delete, raw SQL, the admin). Other backends only have the
+# TaskEvent.save()/delete() checks. Deliberate purges (e.g. clearing seeded
+# data) go through allow_event_deletes().
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_BUFFER_LIMIT = 10_000
+
+# Flush failures that a later flush can get past
+RETRYABLE_ERRORS = (OperationalError, InterfaceError, TransactionManagementError)
+
+_local = threading.local()
+
+
+def _get_buffer():
+    buffer = getattr(_local, 'events', None)
+    if buffer is None:
+        buffer = _local.events = []
+    return buffer
+
+
+def _seconds_between(start, end):
+    if start is None or end is None:
+        return None
+    return max(0.0, (end - start).total_seconds())
+
+
+def build_event(event_type, task, staff=None, origin=None, travel_distance=None, when=None):
+    """
+    Returns an unsaved TaskEvent for `task`.
+      staff   - the worker involved (default: the task's assignee)
+      origin  - (building, wing, floor) the worker moved from
+                (default: the worker's current position)
+      when    - event time (default: now)
+    """
+    if origin is None and staff is not None:
+        origin = (staff.current_building, staff.current_wing, staff.current_location_floor)
+    building, wing, floor = origin or (None, None, None)
+
+    event = TaskEvent(
+        request_id=task.pk,
+        event_type=event_type,
+        occurred_at=when or timezone.now(),
+        task_type=task.task_type,
+        building=task.building,
+        wing=task.wing,
+        location_floor=task.location_floor,
+        staff_id=staff.pk if staff is not None else task.assigned_to_id,
+        staff_building=building,
+        staff_wing=wing,
+        staff_floor=floor,
+        travel_distance=travel_distance,
+        floor_distance=abs(task.location_floor - floor) if floor is not None else None,
+    )
+    if event_type == TaskEventType.ASSIGNED:
+        event.wait_seconds = _seconds_between(task.registration_time, task.assigned_at)
+    elif event_type == TaskEventType.COMPLETED:
+        event.service_seconds = _seconds_between(task.assigned_at, task.completed_at)
+    return event
+
+
+def record_event(event_type, task, **kwargs):
+    """
+    Buffers one event (see build_event for the arguments).
+        record_event(TaskEventType.COMPLETED, task, staff=staff_member)
+    """
+    buffer = _get_buffer()
+    buffer.append(build_event(event_type, task, **kwargs))
+    # Every full batch, not every event once a failed flush left the buffer full
+    if len(buffer) % getattr(settings, 'FMS_EVENT_BATCH_SIZE', DEFAULT_BATCH_SIZE) == 0:
+        flush_events()
+
+
+def flush_events():
+    """
+    Writes this thread's buffered events. Returns the number written; on
+    failure the events stay buffered for the next flush.
+    """
+    buffer = _get_buffer()
+    if not buffer:
+        return 0
+    events = buffer[:]
+    try:
+        TaskEvent.objects.bulk_create(events)
+    except RETRYABLE_ERRORS as e:
+        # Locked or unreachable database, or a broken outer transaction
+        limit = getattr(settings, 'FMS_EVENT_BUFFER_LIMIT', DEFAULT_BUFFER_LIMIT)
+        dropped = max(0, len(buffer) - limit)
+        del buffer[:dropped]
+        logger.error(f"Failed to write {len(events)} task events, keeping them for the next flush: {e}")
+        if dropped:
+            logger.error(f"Task event buffer over {limit} events; dropped the {dropped} oldest")
+        return 0
+    except Exception as e:
+        # A retry would fail the same way (e.g. a bad value)
+        buffer.clear()
+        logger.error(f"Failed to write {len(events)} task events, dropped them: {e}")
+        return 0
+    buffer.clear()
+    return len(events)
+
+
+# Events recorded outside a request (commands, shell) still reach the log
+atexit.register(flush_events)
+
+
+# --- Append-only guard (SQLite) ---
+
+GUARD_TRIGGER = 'fms_api_taskevent_append_only'
+
+SQLITE_UPDATE_GUARD = f"""
+    CREATE TRIGGER IF NOT EXISTS {GUARD_TRIGGER}_bu BEFORE UPDATE ON fms_api_taskevent BEGIN
+        SELECT RAISE(ABORT, 'Task events are append-only and cannot be changed.');
+    END
+"""
+
+SQLITE_DELETE_GUARD = f"""
+    CREATE TRIGGER IF NOT EXISTS {GUARD_TRIGGER}_bd BEFORE DELETE ON fms_api_taskevent BEGIN
+        SELECT RAISE(ABORT, 'Task events are append-only and cannot be deleted.');
+    END
+"""
+
+SQLITE_DROP_DELETE_GUARD = f"DROP TRIGGER IF EXISTS {GUARD_TRIGGER}_bd"
+
+
+def ensure_append_only(sender=None, using='default', **kwargs):
+    """
+    post_migrate handler that re-creates the guard triggers if they are
+    missing (a migration that rebuilds the event table drops them).
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite' or TaskEvent._meta.db_table not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        cursor.execute(SQLITE_UPDATE_GUARD)
+        cursor.execute(SQLITE_DELETE_GUARD)
+
+
+@contextmanager
+def allow_event_deletes(using='default'):
+    """
+    Lifts the DELETE guard for the block, inside one transaction; the guard
+    is back when the block ends, and never lifted if it fails.
+        with allow_event_deletes():
+            TaskEvent.objects.filter(...).delete()
+    """
+    db = connections[using]
+    with transaction.atomic(using=using):
+        if db.vendor != 'sqlite':
+            yield
+            return
+        with db.cursor() as cursor:
+            cursor.execute(SQLITE_DROP_DELETE_GUARD)
+        yield
+        with db.cursor() as cursor:
+            cursor.execute(SQLITE_DELETE_GUARD)
@@ -0,0 +1,170 @@
+import csv
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+
+# --- Streaming Request Export ---
+# Rows are read with values_list(...).iterator(chunk_size=...) so Django
+# fetches them in chunks from the database cursor, and encoded output is
+# yielded in ~64 KB pieces. Memory use stays flat however many rows match.
+# Under ASGI the stream must be an async iterator: Django would otherwise
+# collect a sync one into a list before sending the first byte. Each chunk
+# is then produced on Django's sync thread, one at a time, so the flat
+# memory use holds there too.
+
+EXPORT_CHUNK_SIZE = 2000
+# Roughly how much encoded output to collect before yielding it
+FLUSH_BYTES = 64 * 1024
+
+# (output column, values_list lookup)
+EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('task_type', 'task_type'),
+    ('building', 'building'),
+    ('wing', 'wing'),
+    ('location_floor', 'location_floor'),
+    ('status', 'status'),
+    ('description', 'description'),
+    ('submitted_by', 'submitted_by__username'),
+    ('assigned_to', 'assigned_to__name'),
+    ('registration_time', 'registration_time'),
+    ('assigned_at', 'assigned_at'),
+    ('completed_at', 'completed_at'),
+]
+
+# Derived columns appended after EXPORT_FIELDS
+EXPORT_COLUMNS = [name for name, _ in EXPORT_FIELDS] + ['wait_seconds', 'service_seconds']
+
+_REGISTERED = 9
+_ASSIGNED = 10
+_COMPLETED = 11
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def _seconds_between(start, end):
+    if start is None or end is None:
+        return None
+    return round((end - start).total_seconds(), 3)
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields one list per request, in EXPORT_COLUMNS order.
+    """
+    lookups = [lookup for _, lookup in EXPORT_FIELDS]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        registered, assigned, completed = row[_REGISTERED], row[_ASSIGNED], row[_COMPLETED]
+        values = list(row)
+        values[_REGISTERED] = _isoformat(registered)
+        values[_ASSIGNED] = _isoformat(assigned)
+        values[_COMPLETED] = _isoformat(completed)
+        values.append(_seconds_between(registered, assigned))
+        values.append(_seconds_between(assigned, completed))
+        yield values
+
+
+def _buffered(pieces):
+    """
+    Joins small string pieces into larger UTF-8 chunks before yielding.
+    """
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= FLUSH_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+# Spreadsheet apps run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """
+    Renders one CSV value. Text that a spreadsheet would evaluate as a
+    formula (descriptions, usernames and names are user input) is prefixed
+    with a quote so it is shown as plain text.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_lines(rows):
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    def render(values):
+        line.seek(0)
+        line.truncate(0)
+        writer.writerow(values)
+        return line.getvalue()
+
+    yield render(EXPORT_COLUMNS)
+    for values in rows:
+        yield render([_csv_cell(value) for value in values])
+
+
+def _ndjson_lines(rows):
+    for values in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False) + '\n'
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _next_chunk(chunks):
+    return next(chunks, None)
+
+
+async def _async_chunks(chunks):
+    """
+    Async iterator over a sync chunk iterator. The database cursor is only
+    touched from Django's sync thread (sync_to_async is thread-sensitive).
+    """
+    try:
+        while True:
+            chunk = await sync_to_async(_next_chunk)(chunks)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Client went away or the stream ended: release the cursor
+        await sync_to_async(chunks.close)()
+
+
+def stream_export(queryset, export_type, compress=False, asynchronous=False):
+    """
+    Returns an iterator of bytes for a StreamingHttpResponse (an async
+    iterator with asynchronous=True, for ASGI).
+    export_type is 'csv' or 'ndjson'.
+    """
+    rows = export_rows(queryset)
+    lines = _csv_lines(rows) if export_type == 'csv' else _ndjson_lines(rows)
+    chunks = _buffered(lines)
+    if compress:
+        chunks = _gzip(chunks)
+    return _async_chunks(chunks) if asynchronous else chunks
@@ -0,0 +1,194 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import skill_names
+
+# --- Fast-Path (Read-Only) Serialization ---
+# Instantiating a DRF ModelSerializer per row dominates CPU time on large
+# list endpoints. A RowMapper reads plain tuples with values_list() and turns
+# them into dicts with a function generated once per field list, producing
+# exactly what the matching ModelSerializer would (same keys, same order,
+# same value formats). Use it for read-only list responses only.
+
+
+def _datetime(value):
+    """
+    Same output as DRF's DateTimeField (ISO 8601, 'Z' for UTC).
+    """
+    if not value:
+        return None
+    current = timezone.get_current_timezone()
+    if timezone.is_aware(value):
+        value = value.astimezone(current)
+    elif settings.USE_TZ:
+        value = timezone.make_aware(value, current)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+# Upper bound on compiled ?fields= combinations kept per mapper
+MAX_CACHED_SUBSETS = 256
+
+# Converters available to generated mapper code, by name
+CONVERTERS = {
+    '_datetime': _datetime,
+    '_skill_names': skill_names,
+}
+
+
+def parse_field_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def select_field_names(available, query_params):
+    """
+    Applies ?fields=a,b (keep only these) and ?omit=c,d (drop these) to
+    the ordered list of `available` field names. Unknown names are ignored.
+    """
+    wanted = parse_field_list(query_params.get('fields'))
+    omitted = set(parse_field_list(query_params.get('omit')))
+    names = [
+        name for name in available
+        if (not wanted or name in wanted) and name not in omitted
+    ]
+    # Never answer with empty objects
+    return names or ['id']
+
+
+class FastField:
+    """
+    One output key of a RowMapper.
+      name     - output key
+      lookup   - values_list() lookup (may span relations: 'submitted_by__username')
+      convert  - name of a CONVERTERS function applied to the value, if any
+      omit_if_null - lookup whose NULL value drops this key entirely; mirrors
+                     DRF skipping a dotted-source field when the relation is NULL
+      only     - field path for QuerySet.only() when the full model is loaded
+                 (defaults to `lookup`)
+    """
+    def __init__(self, name, lookup=None, convert=None, omit_if_null=None, only=None):
+        self.name = name
+        self.lookup = lookup or name
+        self.convert = convert
+        self.omit_if_null = omit_if_null
+        self.only = only or self.lookup
+
+
+class RowMapper:
+    """
+    Precompiled mapping from values_list() tuples to response dicts.
+    """
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.lookups = []
+        for field in self.fields:
+            if field.lookup not in self.lookups:
+                self.lookups.append(field.lookup)
+            if field.omit_if_null and field.omit_if_null not in self.lookups:
+                self.lookups.append(field.omit_if_null)
+        self.names = [field.name for field in self.fields]
+        # Field paths for QuerySet.only(), for callers using a ModelSerializer
+        self.only_fields = list(dict.fromkeys(field.only for field in self.fields))
+        self.related = list(dict.fromkeys(
+            lookup.split('__')[0] for lookup in self.lookups if '__' in lookup
+        ))
+        self.map_row = self._compile()
+        self._subsets = {}
+
+    def _compile(self):
+        position = {lookup: index for index, lookup in enumerate(self.lookups)}
+        items = []
+        omissions = []
+        for field in self.fields:
+            expression = f'row[{position[field.lookup]}]'
+            if field.convert:
+                expression = f'{field.convert}({expression})'
+            items.append(f'{field.name!r}: {expression}')
+            if field.omit_if_null:
+                omissions.append(
+                    f'    if row[{position[field.omit_if_null]}] is None:\n'
+                    f'        del data[{field.name!r}]\n'
+                )
+        source = (
+            'def map_row(row):\n'
+            f'    data = {{{", ".join(items)}}}\n'
+            + ''.join(omissions) +
+            '    return data\n'
+        )
+        namespace = dict(CONVERTERS)
+        exec(compile(source, f'<RowMapper {", ".join(self.lookups)}>', 'exec'), namespace)
+        return namespace['map_row']
+
+    def subset(self, names):
+        """
+        Returns a mapper for just `names` (in this mapper's field order).
+        Subsets are compiled once and cached; the SELECT only includes the
+        columns (and joins) the subset needs.
+        """
+        key = tuple(name for name in self.names if name in names)
+        if key == tuple(self.names):
+            return self
+        mapper = self._subsets.get(key)
+        if mapper is None:
+            mapper = RowMapper(field for field in self.fields if field.name in key)
+            # Field lists come from the query string; cap what we keep around
+            if len(self._subsets) < MAX_CACHED_SUBSETS:
+                self._subsets[key] = mapper
+        return mapper
+
+    def narrow(self, queryset):
+        """
+        Limits a model queryset to the columns and joins this mapper needs,
+        for views that still render through a ModelSerializer.
+        """
+        return queryset.select_related(*self.related).only(*self.only_fields)
+
+    def serialize(self, queryset):
+        """
+        Runs one values_list() query and returns a list of dicts.
+        """
+        map_row = self.map_row
+        return [map_row(row) for row in queryset.values_list(*self.lookups)]
+
+    async def aserialize(self, queryset):
+        """
+        serialize() for async views. The query and the row mapping (CPU
+        work proportional to the row count) run together on the request's
+        worker thread, so large lists do not stall the event loop.
+        """
+        return await sync_to_async(self.serialize)(queryset)
+
+
+# Same output as RequestSerializer
+REQUEST_MAPPER = RowMapper([
+    FastField('id'),
+    FastField('task_type'),
+    FastField('building'),
+    FastField('wing'),
+    FastField('location_floor'),
+    FastField('description'),
+    FastField('status'),
+    FastField('registration_time', convert='_datetime'),
+    FastField('submitted_by', 'submitted_by_id', only='submitted_by'),
+    FastField('submitted_by_username', 'submitted_by__username', omit_if_null='submitted_by_id'),
+    FastField('assigned_to', 'assigned_to_id', only='assigned_to'),
+    FastField('assigned_to_name', 'assigned_to__name'),
+])
+
+# Same output as StaffSerializer ('user' is write-only and never shown)
+STAFF_MAPPER = RowMapper([
+    FastField('id'),
+    FastField('name'),
+    FastField('task_type'),
+    FastField('skills', convert='_skill_names'),
+    FastField('gender'),
+    FastField('current_building'),
+    FastField('current_wing'),
+    FastField('current_location_floor'),
+    FastField('status'),
+    FastField('user_email', 'user__email'),
+])
+
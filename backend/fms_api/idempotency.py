@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import random
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# --- Idempotency Keys ---
+# A client may send 'Idempotency-Key: <unique string>' with a POST. The first
+# call claims the key by inserting a row; the unique constraint on
+# (user, scope, key) makes concurrent duplicates fail on insert instead of
+# racing a read-then-write. The finished response is stored on the row and
+# replayed for retries with the same key until it expires. Throttles check
+# is_replay() first, so a retry that only gets the stored response back
+# costs the client no rate-limit tokens and is never shed.
+#
+# A claim whose call never finished (the process died before storing the
+# response) would otherwise answer 409 until the key expires. An
+# in-progress row older than the lease is treated as abandoned and can be
+# claimed again, so the lease must exceed the slowest legitimate call.
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL_HOURS = 24
+DEFAULT_LEASE_SECONDS = 60
+# Fraction of claims that also purge expired keys
+PURGE_PROBABILITY = 0.01
+
+
+def get_ttl():
+    return timedelta(hours=getattr(settings, 'FMS_IDEMPOTENCY_TTL_HOURS', DEFAULT_TTL_HOURS))
+
+
+def get_lease():
+    return timedelta(seconds=getattr(settings, 'FMS_IDEMPOTENCY_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+
+
+def purge_expired_keys():
+    """
+    Deletes keys older than the TTL (uses the created_at index).
+    Returns the number of rows deleted.
+    """
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - get_ttl()).delete()
+    return deleted
+
+
+def _request_fingerprint(request, args, kwargs):
+    payload = json.dumps(
+        [request.method, request.path, kwargs, request.data],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _claim(request, scope, key, fingerprint):
+    """
+    Inserts the in-progress row. Returns (record, created).
+    An expired row, or an in-progress one older than the lease (abandoned),
+    holding the key is replaced.
+    """
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user, scope=scope, key=key, request_fingerprint=fingerprint
+                )
+            return record, True
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=request.user, scope=scope, key=key).first()
+            if record is None:
+                continue  # Deleted in between; try again
+            now = timezone.now()
+            abandoned = record.status_code is None and record.created_at < now - get_lease()
+            if record.created_at >= now - get_ttl() and not abandoned:
+                return record, False
+            if abandoned:
+                logger.warning(f"Reclaiming abandoned {scope} key {key} (user {request.user.username})")
+            record.delete()
+    return record, False
+
+
+def is_replay(request, view):
+    """
+    True if the view's idempotent handler would replay a stored response
+    for this request instead of running again. Memoised on the request, as
+    each throttle asks.
+    """
+    cached = getattr(request, '_fms_idempotent_replay', None)
+    if cached is not None:
+        return cached
+
+    handler = getattr(view, request.method.lower(), None)
+    scope = getattr(handler, 'idempotency_scope', None)
+    key = request.headers.get(HEADER)
+    replay = False
+    if scope and key and len(key) <= MAX_KEY_LENGTH and request.user.is_authenticated:
+        record = (
+            IdempotencyKey.objects
+            .filter(
+                user=request.user, scope=scope, key=key,
+                status_code__isnull=False, created_at__gte=timezone.now() - get_ttl(),
+            )
+            .only('request_fingerprint')
+            .first()
+        )
+        replay = (
+            record is not None
+            and record.request_fingerprint == _request_fingerprint(request, view.args, view.kwargs)
+        )
+    request._fms_idempotent_replay = replay
+    return replay
+
+
+def idempotent(scope):
+    """
+    Decorator for an APIView's post() method.
+        @idempotent('request-create')
+        def post(self, request, *args, **kwargs): ...
+    Calls without the header are not affected.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if random.random() < PURGE_PROBABILITY:
+                purge_expired_keys()
+
+            fingerprint = _request_fingerprint(request, args, kwargs)
+            record, created = _claim(request, scope, key, fingerprint)
+
+            if not created:
+                # 1. Same key, different request: client bug
+                if record.request_fingerprint != fingerprint:
+                    return Response(
+                        {"error": f"This {HEADER} was already used for a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                # 2. The original call is still running
+                if record.status_code is None:
+                    return Response(
+                        {"error": "A request with this Idempotency-Key is still being processed."},
+                        status=status.HTTP_409_CONFLICT,
+                        headers={'Retry-After': '1'}
+                    )
+                # 3. Replay the stored result without running the view again
+                logger.info(f"Replayed {scope} response for key {key} (user {request.user.username})")
+                return Response(
+                    record.response_body,
+                    status=record.status_code,
+                    headers={'Idempotent-Replayed': 'true'}
+                )
+
+            try:
+                response = method(self, request, *args, **kwargs)
+            except Exception:
+                # Nothing was stored; let the client retry with the same key
+                record.delete()
+                raise
+
+            # By pk: if this call outlived the lease and a retry took the key
+            # over, the retry's row is left alone
+            if response.status_code >= 500:
+                record.delete()
+            else:
+                IdempotencyKey.objects.filter(pk=record.pk).update(
+                    status_code=response.status_code, response_body=response.data
+                )
+            return response
+        # Read by is_replay()
+        wrapper.idempotency_scope = scope
+        return wrapper
+    return decorator
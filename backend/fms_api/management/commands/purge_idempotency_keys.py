@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from fms_api.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    """
+    Deletes stored Idempotency-Key responses older than FMS_IDEMPOTENCY_TTL_HOURS.
+    Safe to run from cron; expired keys are also purged occasionally on use.
+    """
+    help = "Delete expired idempotency keys."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from fms_api.seeding import SEED_ADMIN_USERNAME, SEED_PASSWORD, SEED_PREFIX, clear_seed_data, seed_dataset
+
+
+class Command(BaseCommand):
+    """
+    Generates a large dataset of users, staff and requests. The same --seed
+    and --anchor give the same data.
+    e.g. python manage.py seed_fms --requests 1000000 --seed 42 --anchor 2026-01-01T00:00
+    """
+    help = "Generate realistic User, Staff and Request volumes for local profiling."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10_000,
+                            help="Number of requests to create (default: 10000).")
+        parser.add_argument('--students', type=int, default=None,
+                            help="Number of student users (default: requests / 50, at least 100).")
+        parser.add_argument('--staff', type=int, default=60,
+                            help="Number of staff members (default: 60).")
+        parser.add_argument('--days', type=int, default=180,
+                            help="Spread requests over this many past days (default: 180).")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Random seed; the same seed and --anchor give the same data (default: 0).")
+        parser.add_argument('--anchor', default=None,
+                            help="End of the seeded period, an ISO datetime (default: now).")
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Rows per bulk_create batch (default: 5000).")
+        parser.add_argument('--clear', action='store_true',
+                            help=f"Delete previously seeded '{SEED_PREFIX}*' data first.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['staff'] < 1:
+            raise CommandError("--requests and --staff must be at least 1.")
+
+        anchor = None
+        if options['anchor']:
+            anchor = parse_datetime(options['anchor'])
+            if anchor is None:
+                raise CommandError("--anchor must be an ISO datetime, e.g. 2026-01-01T00:00.")
+            if timezone.is_naive(anchor):
+                anchor = timezone.make_aware(anchor)
+
+        if options['clear']:
+            clear_seed_data()
+            self.stdout.write("Cleared previously seeded data.")
+        elif User.objects.filter(username__startswith=SEED_PREFIX).exists():
+            raise CommandError(
+                f"Seeded '{SEED_PREFIX}*' users already exist. "
+                "Run with --clear to replace them with a fresh dataset."
+            )
+
+        started = time.perf_counter()
+        summary = seed_dataset(
+            requests=options['requests'],
+            students=options['students'],
+            staff=options['staff'],
+            days=options['days'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            anchor=anchor,
+            stdout=self.stdout,
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {summary['requests']} requests, {summary['students']} students and "
+            f"{summary['staff']} staff in {elapsed:.1f}s ({summary['requests'] / elapsed:.0f} requests/s)."
+        ))
+        self.stdout.write(f"Statuses: {summary['statuses']}")
+        self.stdout.write(f"Log in as '{SEED_ADMIN_USERNAME}' (or any seeded user) with password '{SEED_PASSWORD}'.")
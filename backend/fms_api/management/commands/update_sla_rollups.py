@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from fms_api.analytics import reset_rollups, update_rollups
+from scheduler.shifts import refresh_service_seconds
+
+
+class Command(BaseCommand):
+    """
+    Folds new task events into the wait/service time rollups, then shares
+    the typical service times the shift calendar uses. The analytics
+    endpoints and the shift calendar only read the rollups, so keep this
+    running with --loop (or run it from cron).
+    """
+    help = "Update the SLA rollups from the task event log."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--rebuild', action='store_true', help="Drop all rollups and rebuild them.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep folding in new events, once per --interval seconds.")
+        parser.add_argument('--interval', type=float, default=60,
+                            help="Seconds between updates with --loop (default: 60).")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_rollups()
+        while True:
+            total = 0
+            while True:
+                consumed = update_rollups(batch_size=options['batch_size'])
+                if not consumed:
+                    break
+                total += consumed
+            self.stdout.write(self.style.SUCCESS(f"Folded {total} task events into the SLA rollups."))
+            # The shift calendar's typical service times come from the rollups
+            refresh_service_seconds()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,168 @@
+import gzip
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .events import flush_events
+from .profiling import REPORT_HEADER, get_profiler, is_profiling_requested, save_report
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # Optional dependency: pip install brotli
+    brotli = None
+
+# Responses smaller than this are sent as-is
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+
+# Only API data is compressed. HTML pages (admin, DRF's browsable API) carry
+# CSRF tokens next to user-controlled text; compressing them lets an
+# attacker recover the token from response sizes (BREACH), so text/* is
+# sent as-is.
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson')
+
+
+def parse_accept_encoding(header):
+    """
+    Returns {coding: q} from an Accept-Encoding header.
+    'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}
+    """
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """
+    Picks 'br' or 'gzip' (in that order of preference on ties) from what
+    the client accepts, or None.
+    """
+    accepted = parse_accept_encoding(header)
+    available = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses large JSON/NDJSON responses with brotli (if installed) or gzip,
+    whichever the client prefers via Accept-Encoding.
+    Streaming responses (e.g. the request export) are left alone; they
+    handle compression themselves.
+    """
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+
+        min_bytes = getattr(settings, 'FMS_COMPRESSION_MIN_BYTES', DEFAULT_COMPRESSION_MIN_BYTES)
+        if len(response.content) < min_bytes:
+            return response
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=5)
+        else:
+            compressed = gzip.compress(response.content, compresslevel=6)
+
+        # Return the compressed content only if it's actually shorter
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        # A strong ETag no longer matches the encoded bytes
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class TaskEventMiddleware(MiddlewareMixin):
+    """
+    Writes the task events recorded while handling a request in one batch
+    once the response is ready.
+    """
+    def process_response(self, request, response):
+        flush_events()
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Runs a request under the configured profiler when it carries a valid
+    'X-FMS-Profile' header (see fms_api/profiling.py).
+    Sync and async capable, so it does not force ASGI requests onto a
+    thread. Under ASGI the profiler sees the event loop thread only: the
+    database work async views hand to a thread is not in the report.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not is_profiling_requested(request):
+            return self.get_response(request)
+
+        profiler = get_profiler()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+        return self._report(profiler, request, response, started)
+
+    async def __acall__(self, request):
+        if not is_profiling_requested(request):
+            return await self.get_response(request)
+
+        profiler = get_profiler()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.stop()
+        return self._report(profiler, request, response, started)
+
+    def _report(self, profiler, request, response, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        report = save_report(profiler, request)
+        logger.info(f"Profiled {request.method} {request.path} ({elapsed_ms:.1f} ms): {report}")
+        response[REPORT_HEADER] = report
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='extra_reporters',
+            field=models.ManyToManyField(blank=True, related_name='co_reported_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['fingerprint', 'registration_time'], name='request_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+from django.db import migrations
+
+
+# The search index as of this migration (see fms_api/search.py). Inlined so
+# later changes to that module don't rewrite history.
+SQLITE_INSERT_ROW = """
+    INSERT INTO fms_api_request_fts(rowid, description, submitted_by, assigned_to)
+    VALUES (
+        new.id,
+        new.description,
+        (SELECT username FROM auth_user WHERE id = new.submitted_by_id),
+        (SELECT name FROM fms_api_staff WHERE id = new.assigned_to_id)
+    );
+"""
+
+SQLITE_CREATE_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS fms_api_request_fts
+    USING fts5(description, submitted_by, assigned_to, tokenize = 'unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_ai AFTER INSERT ON fms_api_request BEGIN
+        {SQLITE_INSERT_ROW}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_ad AFTER DELETE ON fms_api_request BEGIN
+        DELETE FROM fms_api_request_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_au
+    AFTER UPDATE OF description, submitted_by_id, assigned_to_id ON fms_api_request BEGIN
+        DELETE FROM fms_api_request_fts WHERE rowid = old.id;
+        {SQLITE_INSERT_ROW}
+    END
+    """,
+]
+
+# Backfill requests that existed before the index
+SQLITE_BACKFILL_STATEMENTS = [
+    """
+    INSERT INTO fms_api_request_fts(rowid, description, submitted_by, assigned_to)
+    SELECT r.id, r.description, u.username, s.name
+    FROM fms_api_request r
+    LEFT JOIN auth_user u ON u.id = r.submitted_by_id
+    LEFT JOIN fms_api_staff s ON s.id = r.assigned_to_id
+    """,
+]
+
+SQLITE_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_ai",
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_ad",
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_au",
+    "DROP TABLE IF EXISTS fms_api_request_fts",
+]
+
+POSTGRESQL_CREATE_STATEMENTS = [
+    """
+    CREATE INDEX IF NOT EXISTS fms_api_request_description_fts
+    ON fms_api_request
+    USING GIN (to_tsvector('english'::regconfig, COALESCE(description, '')))
+    """,
+]
+
+POSTGRESQL_DROP_STATEMENTS = [
+    "DROP INDEX IF EXISTS fms_api_request_description_fts",
+]
+
+
+def _run(schema_editor, statements_by_vendor):
+    statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {
+        'sqlite': SQLITE_CREATE_STATEMENTS + SQLITE_BACKFILL_STATEMENTS,
+        'postgresql': POSTGRESQL_CREATE_STATEMENTS,
+    })
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {
+        'sqlite': SQLITE_DROP_STATEMENTS,
+        'postgresql': POSTGRESQL_DROP_STATEMENTS,
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0002_request_fingerprint'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
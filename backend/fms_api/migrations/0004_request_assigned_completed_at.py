@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0003_request_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='assigned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='request',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
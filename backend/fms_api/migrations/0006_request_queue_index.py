@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0005_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', 'task_type', 'building', 'registration_time'], name='request_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['status', 'task_type', 'building', 'location_floor', 'registration_time'], name='request_queue_floor_idx'),
+        ),
+    ]
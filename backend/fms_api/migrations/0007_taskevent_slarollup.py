@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0006_request_queue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.BigIntegerField(db_index=True)),
+                ('event_type', models.CharField(choices=[('created', 'Created'), ('assigned', 'Assigned'), ('reassigned', 'Reassigned'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('deleted', 'Deleted')], max_length=20)),
+                ('occurred_at', models.DateTimeField(db_index=True)),
+                ('task_type', models.CharField(max_length=50)),
+                ('building', models.CharField(max_length=50)),
+                ('wing', models.CharField(blank=True, max_length=10, null=True)),
+                ('location_floor', models.IntegerField()),
+                ('staff_id', models.BigIntegerField(blank=True, null=True)),
+                ('staff_building', models.CharField(blank=True, max_length=50, null=True)),
+                ('staff_wing', models.CharField(blank=True, max_length=10, null=True)),
+                ('staff_floor', models.IntegerField(blank=True, null=True)),
+                ('travel_distance', models.IntegerField(blank=True, null=True)),
+                ('floor_distance', models.IntegerField(blank=True, null=True)),
+                ('wait_seconds', models.FloatField(blank=True, null=True)),
+                ('service_seconds', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskSlaRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=10)),
+                ('hour', models.DateTimeField()),
+                ('building', models.CharField(max_length=50)),
+                ('task_type', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('min_seconds', models.FloatField(null=True)),
+                ('max_seconds', models.FloatField(null=True)),
+                ('histogram', models.JSONField(default=dict)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'hour', 'building', 'task_type'), name='unique_sla_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:54
+
+from django.db import migrations, models
+
+
+# The buildings as they were hard-coded before the registry existed:
+# (code, name, highest floor, wings, gender restriction, campus position)
+INITIAL_BUILDINGS = [
+    ('boys_hostel_h2', 'Boys Hostel (H2)', 11, [], 'M', 0),
+    ('boys_hostel_h1', 'Boys Hostel (H1)', 11, [], 'M', 1),
+    ('boys_hostel_old', 'Boys Hostel (Old)', 7, ['A', 'B', 'C'], 'M', 2),
+    ('guest_house', 'Guest House', 1, [], '', 2),  # parallel to Old Boys Hostel
+    ('girls_hostel', 'Girls Hostel', 6, [], 'F', 3),
+    ('lhc', 'LHC (Lecture Hall Complex)', 5, [], '', 4),
+    ('academic', 'Old Academic Building', 6, [], '', 5),
+    ('library', 'Library', 4, [], '', 6),
+    ('rnd', 'R&D Building', 8, [], '', 7),
+]
+
+
+def create_buildings(apps, schema_editor):
+    Building = apps.get_model('fms_api', 'Building')
+    Building.objects.bulk_create([
+        Building(code=code, name=name, floors=floors, wings=wings,
+                 gender_restriction=gender, campus_position=position)
+        for code, name, floors, wings, gender, position in INITIAL_BUILDINGS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0007_taskevent_slarollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Building',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('floors', models.PositiveSmallIntegerField(help_text='Highest floor (floors are numbered from 1)')),
+                ('wings', models.JSONField(blank=True, default=list, help_text='e.g. ["A", "B", "C"]; empty if none')),
+                ('gender_restriction', models.CharField(blank=True, choices=[('M', 'Male'), ('F', 'Female')], default='', help_text='Only workers of this gender may be sent here (hostels)', max_length=1)),
+                ('campus_position', models.IntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='building',
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='staff',
+            name='current_building',
+            field=models.CharField(default='academic', max_length=50),
+        ),
+        migrations.RunPython(create_buildings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:35
+
+from django.db import migrations, models
+
+
+# Skill bits as of this migration (fms_api.models.SKILL_BITS)
+SKILL_BITS = {
+    'cleaning': 1 << 0,
+    'water': 1 << 1,
+    'maintenance': 1 << 2,
+    'plumbing': 1 << 3,
+    'electrical': 1 << 4,
+    'pest': 1 << 5,
+    'other': 1 << 6,
+}
+
+
+# The search triggers on fms_api_request as of this migration
+# (fms_api/search.py, added in 0003)
+SQLITE_INSERT_ROW = """
+    INSERT INTO fms_api_request_fts(rowid, description, submitted_by, assigned_to)
+    VALUES (
+        new.id,
+        new.description,
+        (SELECT username FROM auth_user WHERE id = new.submitted_by_id),
+        (SELECT name FROM fms_api_staff WHERE id = new.assigned_to_id)
+    );
+"""
+
+SQLITE_CREATE_TRIGGER_STATEMENTS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_ai AFTER INSERT ON fms_api_request BEGIN
+        {SQLITE_INSERT_ROW}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_ad AFTER DELETE ON fms_api_request BEGIN
+        DELETE FROM fms_api_request_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_au
+    AFTER UPDATE OF description, submitted_by_id, assigned_to_id ON fms_api_request BEGIN
+        DELETE FROM fms_api_request_fts WHERE rowid = old.id;
+        {SQLITE_INSERT_ROW}
+    END
+    """,
+]
+
+SQLITE_DROP_TRIGGER_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_ai",
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_ad",
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_au",
+]
+
+
+def _run_on_sqlite(schema_editor, statements):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def drop_search_triggers(apps, schema_editor):
+    # SQLite cannot rebuild fms_api_staff (AddField below) while the search
+    # triggers on fms_api_request read it
+    _run_on_sqlite(schema_editor, SQLITE_DROP_TRIGGER_STATEMENTS)
+
+
+def create_search_triggers(apps, schema_editor):
+    _run_on_sqlite(schema_editor, SQLITE_CREATE_TRIGGER_STATEMENTS)
+
+
+def set_primary_skills(apps, schema_editor):
+    # Every existing worker can do exactly their task_type
+    Staff = apps.get_model('fms_api', 'Staff')
+    for task_type, bit in SKILL_BITS.items():
+        Staff.objects.filter(task_type=task_type).update(skills=bit)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0008_building_registry'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name='staff',
+            name='skills',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(set_primary_skills, migrations.RunPython.noop),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+# Re-index a person's requests when their name or username changes
+# (fms_api/search.py as of this migration)
+SQLITE_CREATE_STATEMENTS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_staff_au
+    AFTER UPDATE OF name ON fms_api_staff WHEN old.name IS NOT new.name BEGIN
+        UPDATE fms_api_request_fts SET assigned_to = new.name
+        WHERE rowid IN (SELECT id FROM fms_api_request WHERE assigned_to_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fms_api_request_fts_user_au
+    AFTER UPDATE OF username ON auth_user WHEN old.username IS NOT new.username BEGIN
+        UPDATE fms_api_request_fts SET submitted_by = new.username
+        WHERE rowid IN (SELECT id FROM fms_api_request WHERE submitted_by_id = new.id);
+    END
+    """,
+]
+
+SQLITE_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_staff_au",
+    "DROP TRIGGER IF EXISTS fms_api_request_fts_user_au",
+]
+
+
+def _run_on_sqlite(schema_editor, statements):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def create_rename_triggers(apps, schema_editor):
+    _run_on_sqlite(schema_editor, SQLITE_CREATE_STATEMENTS)
+
+
+def drop_rename_triggers(apps, schema_editor):
+    _run_on_sqlite(schema_editor, SQLITE_DROP_STATEMENTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0010_shift'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_rename_triggers, drop_rename_triggers),
+    ]
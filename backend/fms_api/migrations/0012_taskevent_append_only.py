@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+# Reject UPDATE and DELETE on the task event log (fms_api/events.py as of
+# this migration)
+SQLITE_CREATE_STATEMENTS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS fms_api_taskevent_append_only_bu BEFORE UPDATE ON fms_api_taskevent BEGIN
+        SELECT RAISE(ABORT, 'Task events are append-only and cannot be changed.');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fms_api_taskevent_append_only_bd BEFORE DELETE ON fms_api_taskevent BEGIN
+        SELECT RAISE(ABORT, 'Task events are append-only and cannot be deleted.');
+    END
+    """,
+]
+
+SQLITE_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS fms_api_taskevent_append_only_bu",
+    "DROP TRIGGER IF EXISTS fms_api_taskevent_append_only_bd",
+]
+
+
+def _run_on_sqlite(schema_editor, statements):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def create_guard_triggers(apps, schema_editor):
+    _run_on_sqlite(schema_editor, SQLITE_CREATE_STATEMENTS)
+
+
+def drop_guard_triggers(apps, schema_editor):
+    _run_on_sqlite(schema_editor, SQLITE_DROP_STATEMENTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0011_search_rename_triggers'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_guard_triggers, drop_guard_triggers),
+    ]
@@ -0,0 +1,124 @@
+from django.db import migrations
+
+
+# PostgreSQL: index the submitter username and assignee name along with the
+# description, in a side table with a GIN index kept in sync by triggers
+# (fms_api/search.py as of this migration). Inlined so later changes to
+# that module don't rewrite history. SQLite already indexes all three.
+POSTGRESQL_DOCUMENT = """
+    SELECT r.id, to_tsvector('english'::regconfig, concat_ws(' ', r.description, u.username, s.name))
+    FROM fms_api_request r
+    LEFT JOIN auth_user u ON u.id = r.submitted_by_id
+    LEFT JOIN fms_api_staff s ON s.id = r.assigned_to_id
+"""
+
+
+def _refresh_function(name, where):
+    return f"""
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO fms_api_request_search(request_id, document)
+        {POSTGRESQL_DOCUMENT}
+        WHERE {where}
+        ON CONFLICT (request_id) DO UPDATE SET document = excluded.document;
+        RETURN NULL;
+    END
+    $$
+    """
+
+
+POSTGRESQL_CREATE_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS fms_api_request_search (
+        request_id integer PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS fms_api_request_search_document
+    ON fms_api_request_search USING GIN (document)
+    """,
+    _refresh_function("fms_api_request_search_request", "r.id = NEW.id"),
+    """
+    CREATE OR REPLACE TRIGGER fms_api_request_search_aiu
+    AFTER INSERT OR UPDATE OF description, submitted_by_id, assigned_to_id ON fms_api_request
+    FOR EACH ROW EXECUTE FUNCTION fms_api_request_search_request()
+    """,
+    # No foreign key, so TRUNCATE fms_api_request (manage.py flush) still works
+    """
+    CREATE OR REPLACE FUNCTION fms_api_request_search_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM fms_api_request_search WHERE request_id = OLD.id;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE TRIGGER fms_api_request_search_ad AFTER DELETE ON fms_api_request
+    FOR EACH ROW EXECUTE FUNCTION fms_api_request_search_delete()
+    """,
+    _refresh_function("fms_api_request_search_staff", "r.assigned_to_id = NEW.id"),
+    """
+    CREATE OR REPLACE TRIGGER fms_api_request_search_staff_au
+    AFTER UPDATE OF name ON fms_api_staff
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION fms_api_request_search_staff()
+    """,
+    _refresh_function("fms_api_request_search_user", "r.submitted_by_id = NEW.id"),
+    """
+    CREATE OR REPLACE TRIGGER fms_api_request_search_user_au
+    AFTER UPDATE OF username ON auth_user
+    FOR EACH ROW WHEN (OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION fms_api_request_search_user()
+    """,
+    # Backfill, then retire the description-only index from migration 0003
+    f"""
+    INSERT INTO fms_api_request_search(request_id, document)
+    {POSTGRESQL_DOCUMENT}
+    ON CONFLICT (request_id) DO UPDATE SET document = excluded.document
+    """,
+    "DROP INDEX IF EXISTS fms_api_request_description_fts",
+]
+
+POSTGRESQL_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS fms_api_request_search_aiu ON fms_api_request",
+    "DROP TRIGGER IF EXISTS fms_api_request_search_ad ON fms_api_request",
+    "DROP TRIGGER IF EXISTS fms_api_request_search_staff_au ON fms_api_staff",
+    "DROP TRIGGER IF EXISTS fms_api_request_search_user_au ON auth_user",
+    "DROP FUNCTION IF EXISTS fms_api_request_search_request()",
+    "DROP FUNCTION IF EXISTS fms_api_request_search_delete()",
+    "DROP FUNCTION IF EXISTS fms_api_request_search_staff()",
+    "DROP FUNCTION IF EXISTS fms_api_request_search_user()",
+    "DROP TABLE IF EXISTS fms_api_request_search",
+    """
+    CREATE INDEX IF NOT EXISTS fms_api_request_description_fts
+    ON fms_api_request
+    USING GIN (to_tsvector('english'::regconfig, COALESCE(description, '')))
+    """,
+]
+
+
+def _run_on_postgresql(schema_editor, statements):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def create_search_table(apps, schema_editor):
+    _run_on_postgresql(schema_editor, POSTGRESQL_CREATE_STATEMENTS)
+
+
+def drop_search_table(apps, schema_editor):
+    _run_on_postgresql(schema_editor, POSTGRESQL_DROP_STATEMENTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0012_taskevent_append_only'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:24
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fms_api', '0013_request_search_postgresql'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskevent',
+            name='recorded_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import User # Using Django's built-in User
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Now
 
 # --- Location Choices (LHC Added) ---
+# Well-known building codes. The Building table below is the source of
+# truth for which buildings exist and their floors, wings and rules.
 class BuildingChoices(models.TextChoices):
     GIRLS_HOSTEL = 'girls_hostel', 'Girls Hostel'
     BH_OLD = 'boys_hostel_old', 'Boys Hostel (Old)'
@@ -19,6 +23,29 @@ class GenderChoices(models.TextChoices):
     MALE = 'M', 'Male'
     FEMALE = 'F', 'Female'
 
+class Building(models.Model):
+    """
+    A campus building. Read through the in-memory registry in
+    fms_api/buildings.py rather than querying this table directly.
+    """
+    code = models.CharField(max_length=50, unique=True)  # stored on requests, e.g. 'boys_hostel_old'
+    name = models.CharField(max_length=100)
+    floors = models.PositiveSmallIntegerField(help_text="Highest floor (floors are numbered from 1)")
+    wings = models.JSONField(default=list, blank=True, help_text='e.g. ["A", "B", "C"]; empty if none')
+    gender_restriction = models.CharField(
+        max_length=1,
+        choices=GenderChoices.choices,
+        blank=True,
+        default='',
+        help_text="Only workers of this gender may be sent here (hostels)"
+    )
+    # Buildings lie along one path across campus; travel distance between
+    # two buildings is the difference of their positions
+    campus_position = models.IntegerField()
+
+    def __str__(self):
+        return self.name
+
 class TaskStatus(models.TextChoices):
     PENDING = 'pending', 'Pending'
     IN_PROGRESS = 'in_progress', 'In Progress'
@@ -29,6 +56,44 @@ class StaffStatus(models.TextChoices):
     FREE = 'free', 'Free'
     BUSY = 'busy', 'Busy'
 
+# --- Task Types & Skills ---
+# The request categories (the frontend's RequestCategory)
+class TaskTypeChoices(models.TextChoices):
+    CLEANING = 'cleaning', 'Cleaning'
+    WATER = 'water', 'Water'
+    MAINTENANCE = 'maintenance', 'Maintenance'
+    PLUMBING = 'plumbing', 'Plumbing'
+    ELECTRICAL = 'electrical', 'Electrical'
+    PEST = 'pest', 'Pest Control'
+    OTHER = 'other', 'Other'
+
+# Bit of each task type in Staff.skills. Masks are stored in the database,
+# so never renumber a type; a new type takes the next free bit.
+SKILL_BITS = {
+    TaskTypeChoices.CLEANING: 1 << 0,
+    TaskTypeChoices.WATER: 1 << 1,
+    TaskTypeChoices.MAINTENANCE: 1 << 2,
+    TaskTypeChoices.PLUMBING: 1 << 3,
+    TaskTypeChoices.ELECTRICAL: 1 << 4,
+    TaskTypeChoices.PEST: 1 << 5,
+    TaskTypeChoices.OTHER: 1 << 6,
+}
+
+def skill_bit(task_type):
+    """
+    The skill bit of a task type; 0 for a type outside TaskTypeChoices.
+    """
+    return SKILL_BITS.get(task_type, 0)
+
+def skill_mask(task_types):
+    mask = 0
+    for task_type in task_types:
+        mask |= skill_bit(task_type)
+    return mask
+
+def skill_names(mask):
+    return [task_type.value for task_type, bit in SKILL_BITS.items() if mask & bit]
+
 class Staff(models.Model):
     """
     Represents a staff member (a 'Worker' in the original script).
@@ -43,7 +108,6 @@ class Staff(models.Model):
     )
     current_building = models.CharField(
         max_length=50, 
-        choices=BuildingChoices.choices,
         default=BuildingChoices.ACADEMIC # Default starting location
     )
     current_wing = models.CharField(
@@ -59,10 +123,52 @@ class Staff(models.Model):
         choices=StaffStatus.choices, 
         default=StaffStatus.FREE
     )
+    # Every task type the worker can take, as SKILL_BITS. task_type is their
+    # primary skill and is always included (see save()).
+    skills = models.PositiveIntegerField(default=0)
     
+    def save(self, *args, **kwargs):
+        self.skills |= skill_bit(self.task_type)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.task_type}) - {self.gender}"
 
+class Shift(models.Model):
+    """
+    One working window of a staff member. Workers with no shifts at all are
+    always available; read shifts through the calendar in scheduler/shifts.py.
+    """
+    staff = models.ForeignKey(Staff, on_delete=models.CASCADE, related_name='shifts')
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # The calendar loads the shifts overlapping [now, now + horizon)
+            models.Index(fields=['end', 'start'], name='shift_window_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end__gt=models.F('start')), name='shift_ends_after_start'),
+        ]
+
+    def clean(self):
+        if self.start and self.end and self.end <= self.start:
+            raise ValidationError("A shift must end after it starts.")
+
+    def __str__(self):
+        return f"{self.staff.name}: {self.start:%Y-%m-%d %H:%M} - {self.end:%Y-%m-%d %H:%M}"
+
+def get_user_role(user):
+    """
+    Returns 'admin', 'staff' or 'student' for a logged-in user.
+    """
+    if user.is_staff:
+        return 'admin'
+    if hasattr(user, 'staff'):
+        return 'staff'
+    return 'student'
+
 class Request(models.Model):
     """
     Represents a work request (a 'Task' in the original script).
@@ -71,7 +177,6 @@ class Request(models.Model):
     
     building = models.CharField(
         max_length=50, 
-        choices=BuildingChoices.choices,
         db_index=True
     )
     wing = models.CharField(
@@ -91,6 +196,9 @@ class Request(models.Model):
         db_index=True
     )
     registration_time = models.DateTimeField(auto_now_add=True)
+    # Set by the scheduler / completion views; used for wait & service times
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
     
     submitted_by = models.ForeignKey(
         User, 
@@ -106,31 +214,154 @@ class Request(models.Model):
         related_name='assigned_tasks'
     )
 
+    # --- Duplicate Detection ---
+    # Normalised hash of type + location + description (see fms_api/duplicates.py)
+    fingerprint = models.CharField(max_length=40, blank=True, default='')
+    # Students whose duplicate reports were merged into this request
+    extra_reporters = models.ManyToManyField(
+        User,
+        blank=True,
+        related_name='co_reported_requests'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fingerprint', 'registration_time'], name='request_fingerprint_idx'),
+            # Pending queue per task type and building, oldest first (staff feed)
+            models.Index(fields=['status', 'task_type', 'building', 'registration_time'], name='request_queue_idx'),
+            models.Index(fields=['status', 'task_type', 'building', 'location_floor', 'registration_time'], name='request_queue_floor_idx'),
+        ]
+
     def clean(self):
         """
-        Adds validation logic for floors based on building.
+        Checks the building, floor and wing against the building registry.
         """
-        floor_limits = {
-            BuildingChoices.GIRLS_HOSTEL: 6,
-            BuildingChoices.BH_OLD: 7,
-            BuildingChoices.BH_H1: 11,
-            BuildingChoices.BH_H2: 11,
-            BuildingChoices.LHC: 5,  # --- NEW ---
-            BuildingChoices.RD: 8,
-            BuildingChoices.ACADEMIC: 6,
-            BuildingChoices.GUEST_HOUSE: 1,
-            BuildingChoices.LIBRARY: 4,
-        }
-        if self.building in floor_limits:
-            max_floor = floor_limits[self.building]
-            if not (1 <= self.location_floor <= max_floor):
-                raise ValidationError(
-                    f"Floor for {self.get_building_display()} "
-                    f"must be between 1 and {max_floor}."
-                )
+        from .buildings import get_registry
+
+        building = get_registry().get(self.building)
+        if building is None:
+            raise ValidationError(f"Unknown building '{self.building}'.")
+        if not (1 <= self.location_floor <= building.floors):
+            raise ValidationError(
+                f"Floor for {building.name} "
+                f"must be between 1 and {building.floors}."
+            )
+        if self.wing and building.wings and self.wing not in building.wings:
+            raise ValidationError(
+                f"Wing for {building.name} must be one of {', '.join(building.wings)}."
+            )
 
     def __str__(self):
+        from .buildings import get_registry
+
         wing_str = f" (Wing {self.wing})" if self.wing else ""
         return (f"Request #{self.id}: {self.task_type} at "
-                f"{self.get_building_display()}{wing_str} - Floor {self.location_floor} "
-                f"({self.get_status_display()})")
\ No newline at end of file
+                f"{get_registry().display_name(self.building)}{wing_str} - Floor {self.location_floor} "
+                f"({self.get_status_display()})")
+
+class IdempotencyKey(models.Model):
+    """
+    Remembers the response to a POST sent with an 'Idempotency-Key' header,
+    so a retried call returns the stored result instead of running again.
+    A row with no status_code is still being processed, or was abandoned
+    if it is older than the lease (see fms_api/idempotency.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    scope = models.CharField(max_length=50)  # which endpoint the key was used on
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)  # hash of method, path and body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} key {self.key} for user {self.user_id}"
+
+class TaskEventType(models.TextChoices):
+    CREATED = 'created', 'Created'
+    ASSIGNED = 'assigned', 'Assigned'
+    REASSIGNED = 'reassigned', 'Reassigned'
+    COMPLETED = 'completed', 'Completed'
+    CANCELLED = 'cancelled', 'Cancelled'
+    DELETED = 'deleted', 'Deleted'
+
+class TaskEvent(models.Model):
+    """
+    One lifecycle transition of a request. Append-only: enforced by database
+    triggers on SQLite, by save()/delete() below elsewhere (fms_api/events.py).
+    Ids are plain integers rather than foreign keys, so the history survives
+    when the request or the worker is deleted.
+    """
+    request_id = models.BigIntegerField(db_index=True)
+    event_type = models.CharField(max_length=20, choices=TaskEventType.choices)
+    occurred_at = models.DateTimeField(db_index=True)
+    # When the row was inserted, by the database clock. occurred_at is when
+    # the event was buffered (or a seeded past time), not when it was written.
+    recorded_at = models.DateTimeField(db_default=Now(), editable=False)
+
+    # The task, as it was when the event happened
+    task_type = models.CharField(max_length=50)
+    building = models.CharField(max_length=50)
+    wing = models.CharField(max_length=10, blank=True, null=True)
+    location_floor = models.IntegerField()
+
+    # The worker involved and where they were before moving to the task
+    staff_id = models.BigIntegerField(null=True, blank=True)
+    staff_building = models.CharField(max_length=50, blank=True, null=True)
+    staff_wing = models.CharField(max_length=10, blank=True, null=True)
+    staff_floor = models.IntegerField(null=True, blank=True)
+    travel_distance = models.IntegerField(null=True, blank=True)  # campus layout steps
+    floor_distance = models.IntegerField(null=True, blank=True)
+
+    # registration -> assignment ('assigned') and assignment -> completion ('completed')
+    wait_seconds = models.FloatField(null=True, blank=True)
+    service_seconds = models.FloatField(null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Task events are append-only and cannot be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Task events are append-only and cannot be deleted.")
+
+    def __str__(self):
+        return f"Request #{self.request_id} {self.event_type} at {self.occurred_at:%Y-%m-%d %H:%M:%S}"
+
+class TaskSlaRollup(models.Model):
+    """
+    Pre-aggregated wait or service times for one hour, building and task type
+    (see fms_api/analytics.py). `histogram` maps log-scale bucket -> count.
+    """
+    metric = models.CharField(max_length=10)  # 'wait' or 'service'
+    hour = models.DateTimeField()
+    building = models.CharField(max_length=50)
+    task_type = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    min_seconds = models.FloatField(null=True)
+    max_seconds = models.FloatField(null=True)
+    histogram = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'hour', 'building', 'task_type'], name='unique_sla_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.building}/{self.task_type} at {self.hour:%Y-%m-%d %H:00}: {self.count}"
+
+class AnalyticsCursor(models.Model):
+    """
+    Id of the last TaskEvent folded into a set of rollups.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_event_id}"
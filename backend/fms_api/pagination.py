@@ -0,0 +1,11 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class RequestSearchPagination(PageNumberPagination):
+    """
+    Page-number pagination for the admin request search.
+    e.g. ?page=2&page_size=50
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,93 @@
+import cProfile
+import hmac
+import re
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+# --- Per-Request Profiling ---
+# Works with DEBUG off: a request sent with 'X-FMS-Profile: <token>', where
+# the token matches settings.FMS_PROFILE_TOKEN, is run under the profiler.
+# The report is written to FMS_PROFILE_DIR and its file name is returned in
+# the 'X-FMS-Profile-Report' response header. Profiling is off while no
+# token is configured.
+#
+# The profiler is pluggable: FMS_PROFILER is the dotted path of a
+# BaseProfiler subclass (default: cProfile).
+
+HEADER = 'X-FMS-Profile'
+REPORT_HEADER = 'X-FMS-Profile-Report'
+DEFAULT_PROFILER = 'fms_api.profiling.CProfileProfiler'
+
+
+class BaseProfiler:
+    """
+    Interface for request profilers.
+    """
+    # Report file extension
+    extension = '.txt'
+
+    def start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def save(self, path):
+        """
+        Writes the report to `path`.
+        """
+        raise NotImplementedError
+
+
+class CProfileProfiler(BaseProfiler):
+    """
+    Deterministic profiler from the standard library. Reports are pstats
+    files: open them with `python -m pstats <file>` or snakeviz.
+    """
+    extension = '.prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def save(self, path):
+        self.profile.dump_stats(path)
+
+
+def is_profiling_requested(request):
+    token = getattr(settings, 'FMS_PROFILE_TOKEN', '')
+    value = request.headers.get(HEADER, '')
+    return bool(token) and bool(value) and hmac.compare_digest(value, token)
+
+
+def get_profiler():
+    return import_string(getattr(settings, 'FMS_PROFILER', DEFAULT_PROFILER))()
+
+
+def get_profile_dir():
+    return Path(getattr(settings, 'FMS_PROFILE_DIR', Path(settings.BASE_DIR) / 'var' / 'profiles'))
+
+
+def save_report(profiler, request):
+    """
+    Writes the profiler's report and returns its file name,
+    e.g. '20261019T101500-GET-api-staff-my-tasks-1a2b3c4d.prof'.
+    """
+    directory = get_profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path_slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:80]
+    name = (
+        f"{timezone.now():%Y%m%dT%H%M%S}-{request.method}-{path_slug}"
+        f"-{uuid.uuid4().hex[:8]}{profiler.extension}"
+    )
+    profiler.save(directory / name)
+    return name
@@ -0,0 +1,285 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import Q, Value
+
+from .models import Request
+
+# --- Full-Text Search over Requests ---
+# SQLite: an FTS5 table (created in migration 0003) mirrors each request's
+# description, submitter username and assignee name. Triggers on the
+# request table keep it in sync, so every write path (views, scheduler,
+# admin, bulk_create) is covered without extra Python code; triggers on
+# fms_api_staff and auth_user re-index a person's requests when their
+# name or username changes.
+# PostgreSQL: the same three fields go into a tsvector per request in a
+# side table with a GIN index (migration 0013), kept in sync by the same
+# set of triggers. An expression index on the request table could only
+# cover its own description column, not the joined names.
+# Every other backend falls back to a plain icontains filter.
+#
+# Both search tables are joined once: the match condition drives the join
+# from the index, and the rank is read from the same joined row.
+# All backends annotate matches with `search_rank`, where LOWER is better.
+
+FTS_TABLE = 'fms_api_request_fts'
+POSTGRESQL_SEARCH_TABLE = 'fms_api_request_search'
+SEARCH_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_expression(text):
+    """
+    Turns free user input into a safe FTS5 MATCH expression.
+    Every word becomes a quoted prefix term, and all terms must match:
+    'leak wash' -> '"leak"* "wash"*'
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_requests(queryset, text):
+    """
+    Filters a Request queryset down to rows matching `text` and annotates
+    them with `search_rank`. An empty search returns the queryset unchanged.
+    """
+    if not text or not text.strip():
+        return queryset
+
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(queryset, text)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, text)
+    return queryset.filter(
+        Q(description__icontains=text)
+        | Q(submitted_by__username__icontains=text)
+        | Q(assigned_to__name__icontains=text)
+    ).annotate(search_rank=Value(0.0))
+
+
+def _join_search_table(queryset, table, key, match_sql, rank_sql, params):
+    """
+    Inner-joins a search table on `key` = request id, keeping the rows
+    `match_sql` accepts and annotating them with `rank_sql`. Both take
+    `params`.
+    """
+    return queryset.extra(
+        tables=[table],
+        where=[f"{table}.{key} = {Request._meta.db_table}.id", match_sql],
+        params=params,
+        select={'search_rank': rank_sql},
+        select_params=params,
+    )
+
+
+def _search_sqlite(queryset, text):
+    expression = build_match_expression(text)
+    if not expression:
+        return queryset.annotate(search_rank=Value(0.0)).none()
+
+    # rank is the bm25 score of the MATCH (more negative = better match)
+    return _join_search_table(
+        queryset, FTS_TABLE, 'rowid',
+        f"{FTS_TABLE} MATCH %s", f"{FTS_TABLE}.rank", [expression]
+    )
+
+
+def _search_postgresql(queryset, text):
+    query = f"websearch_to_tsquery('{SEARCH_CONFIG}'::regconfig, %s)"
+    document = f"{POSTGRESQL_SEARCH_TABLE}.document"
+    return _join_search_table(
+        queryset, POSTGRESQL_SEARCH_TABLE, 'request_id',
+        f"{document} @@ {query}", f"-ts_rank({document}, {query})", [text]
+    )
+
+
+# --- Schema helpers (used by ensure_search_index) ---
+
+SQLITE_INSERT_ROW = f"""
+    INSERT INTO {FTS_TABLE}(rowid, description, submitted_by, assigned_to)
+    VALUES (
+        new.id,
+        new.description,
+        (SELECT username FROM auth_user WHERE id = new.submitted_by_id),
+        (SELECT name FROM fms_api_staff WHERE id = new.assigned_to_id)
+    );
+"""
+
+SQLITE_CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(description, submitted_by, assigned_to, tokenize = 'unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON fms_api_request BEGIN
+        {SQLITE_INSERT_ROW}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON fms_api_request BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF description, submitted_by_id, assigned_to_id ON fms_api_request BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {SQLITE_INSERT_ROW}
+    END
+    """,
+    # Renames: refresh the copies of the name in the requests that show it
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_staff_au
+    AFTER UPDATE OF name ON fms_api_staff WHEN old.name IS NOT new.name BEGIN
+        UPDATE {FTS_TABLE} SET assigned_to = new.name
+        WHERE rowid IN (SELECT id FROM fms_api_request WHERE assigned_to_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_user_au
+    AFTER UPDATE OF username ON auth_user WHEN old.username IS NOT new.username BEGIN
+        UPDATE {FTS_TABLE} SET submitted_by = new.username
+        WHERE rowid IN (SELECT id FROM fms_api_request WHERE submitted_by_id = new.id);
+    END
+    """,
+]
+
+# Backfill requests that existed before the index (run once, by the migration)
+SQLITE_BACKFILL_STATEMENTS = [
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, description, submitted_by, assigned_to)
+    SELECT r.id, r.description, u.username, s.name
+    FROM fms_api_request r
+    LEFT JOIN auth_user u ON u.id = r.submitted_by_id
+    LEFT JOIN fms_api_staff s ON s.id = r.assigned_to_id
+    """,
+]
+
+# The request triggers read fms_api_staff and the rename triggers read
+# fms_api_request, so SQLite migrations that rebuild either table must drop
+# them first (ensure_search_index puts them back after migrate)
+SQLITE_DROP_TRIGGER_STATEMENTS = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_staff_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_user_au",
+]
+
+SQLITE_DROP_STATEMENTS = SQLITE_DROP_TRIGGER_STATEMENTS + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# The searchable document of a request `r`, as in the SQLite index
+POSTGRESQL_DOCUMENT = f"""
+    SELECT r.id, to_tsvector('{SEARCH_CONFIG}'::regconfig, concat_ws(' ', r.description, u.username, s.name))
+    FROM fms_api_request r
+    LEFT JOIN auth_user u ON u.id = r.submitted_by_id
+    LEFT JOIN fms_api_staff s ON s.id = r.assigned_to_id
+"""
+
+
+def _postgresql_refresh_function(name, where):
+    """
+    A trigger function that (re)writes the document of the requests `where` selects.
+    """
+    return f"""
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO {POSTGRESQL_SEARCH_TABLE}(request_id, document)
+        {POSTGRESQL_DOCUMENT}
+        WHERE {where}
+        ON CONFLICT (request_id) DO UPDATE SET document = excluded.document;
+        RETURN NULL;
+    END
+    $$
+    """
+
+
+POSTGRESQL_CREATE_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {POSTGRESQL_SEARCH_TABLE} (
+        request_id integer PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS {POSTGRESQL_SEARCH_TABLE}_document
+    ON {POSTGRESQL_SEARCH_TABLE} USING GIN (document)
+    """,
+    _postgresql_refresh_function(f"{POSTGRESQL_SEARCH_TABLE}_request", "r.id = NEW.id"),
+    f"""
+    CREATE OR REPLACE TRIGGER {POSTGRESQL_SEARCH_TABLE}_aiu
+    AFTER INSERT OR UPDATE OF description, submitted_by_id, assigned_to_id ON fms_api_request
+    FOR EACH ROW EXECUTE FUNCTION {POSTGRESQL_SEARCH_TABLE}_request()
+    """,
+    # No foreign key, so TRUNCATE fms_api_request (manage.py flush) still works
+    f"""
+    CREATE OR REPLACE FUNCTION {POSTGRESQL_SEARCH_TABLE}_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM {POSTGRESQL_SEARCH_TABLE} WHERE request_id = OLD.id;
+        RETURN NULL;
+    END
+    $$
+    """,
+    f"""
+    CREATE OR REPLACE TRIGGER {POSTGRESQL_SEARCH_TABLE}_ad AFTER DELETE ON fms_api_request
+    FOR EACH ROW EXECUTE FUNCTION {POSTGRESQL_SEARCH_TABLE}_delete()
+    """,
+    # Renames: refresh the documents of the requests that show the name
+    _postgresql_refresh_function(f"{POSTGRESQL_SEARCH_TABLE}_staff", "r.assigned_to_id = NEW.id"),
+    f"""
+    CREATE OR REPLACE TRIGGER {POSTGRESQL_SEARCH_TABLE}_staff_au
+    AFTER UPDATE OF name ON fms_api_staff
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION {POSTGRESQL_SEARCH_TABLE}_staff()
+    """,
+    _postgresql_refresh_function(f"{POSTGRESQL_SEARCH_TABLE}_user", "r.submitted_by_id = NEW.id"),
+    f"""
+    CREATE OR REPLACE TRIGGER {POSTGRESQL_SEARCH_TABLE}_user_au
+    AFTER UPDATE OF username ON auth_user
+    FOR EACH ROW WHEN (OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION {POSTGRESQL_SEARCH_TABLE}_user()
+    """,
+]
+
+# Backfill requests that existed before the index (run once, by the migration)
+POSTGRESQL_BACKFILL_STATEMENTS = [
+    f"""
+    INSERT INTO {POSTGRESQL_SEARCH_TABLE}(request_id, document)
+    {POSTGRESQL_DOCUMENT}
+    ON CONFLICT (request_id) DO UPDATE SET document = excluded.document
+    """,
+]
+
+POSTGRESQL_DROP_STATEMENTS = [
+    f"DROP TRIGGER IF EXISTS {POSTGRESQL_SEARCH_TABLE}_aiu ON fms_api_request",
+    f"DROP TRIGGER IF EXISTS {POSTGRESQL_SEARCH_TABLE}_ad ON fms_api_request",
+    f"DROP TRIGGER IF EXISTS {POSTGRESQL_SEARCH_TABLE}_staff_au ON fms_api_staff",
+    f"DROP TRIGGER IF EXISTS {POSTGRESQL_SEARCH_TABLE}_user_au ON auth_user",
+    f"DROP FUNCTION IF EXISTS {POSTGRESQL_SEARCH_TABLE}_request()",
+    f"DROP FUNCTION IF EXISTS {POSTGRESQL_SEARCH_TABLE}_delete()",
+    f"DROP FUNCTION IF EXISTS {POSTGRESQL_SEARCH_TABLE}_staff()",
+    f"DROP FUNCTION IF EXISTS {POSTGRESQL_SEARCH_TABLE}_user()",
+    f"DROP TABLE IF EXISTS {POSTGRESQL_SEARCH_TABLE}",
+]
+
+
+def ensure_search_index(sender=None, using='default', **kwargs):
+    """
+    post_migrate handler that re-creates the SQLite triggers if they are missing.
+    SQLite migrations that rebuild the request table (e.g. AlterField) drop
+    its triggers together with the old table; every statement here is
+    idempotent, so running it after each migrate is safe.
+    """
+    db = connections[using]
+    statements = {
+        'sqlite': SQLITE_CREATE_STATEMENTS,
+        'postgresql': POSTGRESQL_CREATE_STATEMENTS,
+    }.get(db.vendor, [])
+    if not statements or Request._meta.db_table not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
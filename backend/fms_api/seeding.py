@@ -0,0 +1,298 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .analytics import reset_rollups
+from .duplicates import compute_fingerprint
+from .events import allow_event_deletes, build_event
+from .buildings import get_registry
+from .models import (
+    Request, Staff, TaskStatus, StaffStatus, TaskEvent, TaskEventType,
+    BuildingChoices, GenderChoices, skill_bit
+)
+
+# --- Synthetic Dataset Generator ---
+# Builds production-sized data for local profiling, benchmarks and tests.
+# Everything random comes from one random.Random(seed), so the same seed
+# (and anchor time) always produces the same rows.
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'fms-seed-password'
+SEED_ADMIN_USERNAME = f'{SEED_PREFIX}admin'
+
+# Category mix as seen on the old WhatsApp group: mostly cleaning
+TASK_TYPE_WEIGHTS = {
+    'cleaning': 40,
+    'water': 14,
+    'maintenance': 14,
+    'plumbing': 12,
+    'electrical': 10,
+    'pest': 6,
+    'other': 4,
+}
+
+# Hostels generate most of the traffic
+BUILDING_WEIGHTS = {
+    BuildingChoices.BH_OLD: 20,
+    BuildingChoices.GIRLS_HOSTEL: 18,
+    BuildingChoices.BH_H1: 18,
+    BuildingChoices.BH_H2: 16,
+    BuildingChoices.LHC: 8,
+    BuildingChoices.ACADEMIC: 7,
+    BuildingChoices.RD: 5,
+    BuildingChoices.LIBRARY: 5,
+    BuildingChoices.GUEST_HOUSE: 3,
+}
+# Weight of registry buildings not listed above
+DEFAULT_BUILDING_WEIGHT = 5
+
+DESCRIPTIONS = {
+    'cleaning': ['Washroom needs cleaning', 'Garbage not collected', 'Corridor floor is dirty',
+                 'Room dustbin overflowing', 'Spill near the stairs'],
+    'water': ['Water cooler not cooling', 'No water in tap', 'Water dispenser leaking',
+              'RO filter needs change'],
+    'maintenance': ['AC not working', 'Broken chair', 'Tube light flickering', 'Door lock jammed',
+                    'Window glass cracked'],
+    'plumbing': ['Leaking tap in washroom', 'Clogged drain', 'Toilet flush broken', 'Pipe leakage'],
+    'electrical': ['Fan not working', 'No power in room', 'Switch board sparking', 'Socket loose'],
+    'pest': ['Mosquitoes in room', 'Mice in pantry', 'Cockroaches in washroom', 'Bed bugs'],
+    'other': ['Notice board fallen', 'Lost and found query', 'Need extra mattress'],
+}
+
+# Mean minutes from registration to assignment, and from assignment to completion
+MEAN_WAIT_MINUTES = 20
+MEAN_SERVICE_MINUTES = 35
+
+# Requests younger than this are still open; older ones are resolved
+OPEN_WINDOW = timedelta(hours=12)
+CANCELLED_SHARE = 0.04
+IN_PROGRESS_SHARE = 0.3
+
+
+def _write_registration_times(tasks):
+    """
+    Stores each saved task's registration_time as it is on the object.
+    One prepared UPDATE per row: bulk_update's CASE expression grows with
+    the batch and is several times slower here.
+    """
+    field = Request._meta.get_field('registration_time')
+    rows = [
+        (field.get_db_prep_save(task.registration_time, connection), task.pk)
+        for task in tasks
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {Request._meta.db_table} SET {field.column} = %s WHERE id = %s", rows
+        )
+
+
+def _weighted_picker(rng, weights):
+    values = list(weights)
+    cum_weights = []
+    total = 0
+    for value in values:
+        total += weights[value]
+        cum_weights.append(total)
+    return lambda: rng.choices(values, cum_weights=cum_weights)[0]
+
+
+def _building_weights(registry):
+    """
+    BUILDING_WEIGHTS restricted to the buildings in the registry, plus any
+    other registry building at DEFAULT_BUILDING_WEIGHT.
+    """
+    weights = {code: weight for code, weight in BUILDING_WEIGHTS.items() if registry.get(code)}
+    for code in registry.codes:
+        weights.setdefault(code, DEFAULT_BUILDING_WEIGHT)
+    return weights
+
+
+def _lifecycle_events(tasks):
+    """
+    Task events matching the generated timestamps of `tasks` (saved requests).
+    """
+    events = []
+    for task in tasks:
+        events.append(build_event(TaskEventType.CREATED, task, when=task.registration_time))
+        if task.assigned_at:
+            events.append(build_event(TaskEventType.ASSIGNED, task, when=task.assigned_at))
+        if task.completed_at:
+            events.append(build_event(TaskEventType.COMPLETED, task, when=task.completed_at))
+        elif task.status == TaskStatus.CANCELLED:
+            events.append(build_event(TaskEventType.CANCELLED, task, when=task.registration_time + OPEN_WINDOW))
+    return events
+
+
+def clear_seed_data():
+    """
+    Deletes every user created by seed_dataset() together with their staff
+    profiles, requests and task events. The SLA rollups are reset, to be
+    rebuilt from the remaining events.
+    """
+    seed_users = User.objects.filter(username__startswith=SEED_PREFIX)
+    seed_requests = Request.objects.filter(submitted_by__in=seed_users)
+    with allow_event_deletes():
+        TaskEvent.objects.filter(request_id__in=seed_requests.values('id')).delete()
+    seed_requests.delete()
+    seed_users.delete()
+    reset_rollups()
+
+
+def seed_dataset(requests=10_000, students=None, staff=60, days=180, seed=0,
+                 chunk_size=5000, anchor=None, stdout=None):
+    """
+    Creates `students` users, `staff` workers, one admin and `requests`
+    requests spread over the last `days` days before `anchor` (default: now).
+    Returns a dict with the number of rows created.
+    """
+    rng = random.Random(seed)
+    anchor = anchor or timezone.now()
+    students = students or max(100, requests // 50)
+    password = make_password(SEED_PASSWORD)
+    registry = get_registry()
+    building_weights = _building_weights(registry)
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    # 1. Users: students, workers and one admin (all share SEED_PASSWORD)
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [User(username=f'{SEED_PREFIX}student_{i:07d}', password=password) for i in range(students)],
+            batch_size=chunk_size
+        )
+        User.objects.bulk_create(
+            [User(username=f'{SEED_PREFIX}staff_{i:05d}', password=password) for i in range(staff)],
+            batch_size=chunk_size
+        )
+        User.objects.create(
+            username=SEED_ADMIN_USERNAME, password=password, is_staff=True, is_superuser=True
+        )
+    student_ids = list(
+        User.objects.filter(username__startswith=f'{SEED_PREFIX}student_')
+        .order_by('username').values_list('id', flat=True)
+    )
+    log(f"Created {students} students, {staff} staff users and 1 admin.")
+
+    # 2. Staff profiles: types follow the request mix, genders alternate
+    # (the first two workers of every type cover both genders)
+    pick_task_type = _weighted_picker(rng, TASK_TYPE_WEIGHTS)
+    staff_users = User.objects.filter(username__startswith=f'{SEED_PREFIX}staff_').order_by('username')
+    task_types = list(TASK_TYPE_WEIGHTS)
+    profiles = []
+    for index, user in enumerate(staff_users):
+        if index < 2 * len(task_types):
+            task_type = task_types[index // 2]
+        else:
+            task_type = pick_task_type()
+        profiles.append(Staff(
+            user=user,
+            name=f'Worker {index:05d}',
+            task_type=task_type,
+            skills=skill_bit(task_type),  # bulk_create skips Staff.save()
+            gender=GenderChoices.MALE if index % 2 == 0 else GenderChoices.FEMALE,
+            current_building=rng.choice(list(building_weights)),
+            current_location_floor=1,
+            status=StaffStatus.FREE,
+        ))
+    Staff.objects.bulk_create(profiles, batch_size=chunk_size)
+
+    # Worker ids per (task_type, gender); free_workers shrinks as open tasks are handed out
+    workers = {}
+    for worker_id, task_type, gender in Staff.objects.filter(user__in=staff_users).values_list(
+        'id', 'task_type', 'gender'
+    ):
+        workers.setdefault((task_type, gender), []).append(worker_id)
+    free_workers = {key: list(ids) for key, ids in workers.items()}
+    busy_workers = []
+
+    # 3. Requests, oldest first, evenly spread with jitter
+    pick_building = _weighted_picker(rng, building_weights)
+    span_seconds = days * 86400
+    step = span_seconds / max(requests, 1)
+    start = anchor - timedelta(seconds=span_seconds)
+    counts = {status: 0 for status in TaskStatus.values}
+
+    created = 0
+    while created < requests:
+        batch = []
+        for i in range(created, min(created + chunk_size, requests)):
+            task_type = pick_task_type()
+            building = pick_building()
+            wings = registry.get(building).wings
+            wing = rng.choice(wings) if wings else None
+            floor = rng.randint(1, registry.floor_limit(building))
+            description = rng.choice(DESCRIPTIONS[task_type])
+            registered = start + timedelta(seconds=(i + rng.random()) * step)
+            genders = registry.allowed_genders(building)
+
+            assigned_to_id = assigned_at = completed_at = None
+            if anchor - registered > OPEN_WINDOW:
+                # Resolved request
+                if rng.random() < CANCELLED_SHARE:
+                    status = TaskStatus.CANCELLED
+                else:
+                    status = TaskStatus.COMPLETED
+                    pool = workers.get((task_type, rng.choice(genders))) or []
+                    assigned_to_id = rng.choice(pool) if pool else None
+                    assigned_at = registered + timedelta(minutes=rng.expovariate(1 / MEAN_WAIT_MINUTES))
+                    completed_at = assigned_at + timedelta(minutes=rng.expovariate(1 / MEAN_SERVICE_MINUTES))
+            else:
+                # Open request: hand it to a free eligible worker if there is one
+                status = TaskStatus.PENDING
+                if rng.random() < IN_PROGRESS_SHARE:
+                    pool = free_workers.get((task_type, rng.choice(genders)))
+                    if pool:
+                        assigned_to_id = pool.pop()
+                        busy_workers.append((assigned_to_id, building, wing, floor))
+                        status = TaskStatus.IN_PROGRESS
+                        assigned_at = min(anchor, registered + timedelta(minutes=MEAN_WAIT_MINUTES))
+
+            counts[status] += 1
+            batch.append(Request(
+                task_type=task_type,
+                building=building,
+                wing=wing,
+                location_floor=floor,
+                description=description,
+                status=status,
+                registration_time=registered,
+                assigned_at=assigned_at,
+                completed_at=completed_at,
+                submitted_by_id=rng.choice(student_ids),
+                assigned_to_id=assigned_to_id,
+                fingerprint=compute_fingerprint(task_type, building, wing, floor, description),
+            ))
+        registered_times = [task.registration_time for task in batch]
+        with transaction.atomic():
+            # registration_time is auto_now_add, so bulk_create stamps now()
+            # on every row; the generated times are written back afterwards
+            Request.objects.bulk_create(batch)
+            for task, registered in zip(batch, registered_times):
+                task.registration_time = registered
+            _write_registration_times(batch)
+            TaskEvent.objects.bulk_create(_lifecycle_events(batch), batch_size=chunk_size)
+        created += len(batch)
+        log(f"  {created}/{requests} requests")
+
+    # 4. Workers holding an in-progress task are busy at that task's location
+    with transaction.atomic():
+        for worker_id, building, wing, floor in busy_workers:
+            Staff.objects.filter(pk=worker_id).update(
+                status=StaffStatus.BUSY,
+                current_building=building,
+                current_wing=wing,
+                current_location_floor=floor,
+            )
+
+    return {
+        'students': students,
+        'staff': staff,
+        'requests': requests,
+        'statuses': counts,
+    }
@@ -1,20 +1,66 @@
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import serializers
-from .models import Staff, Request, BuildingChoices, GenderChoices, StaffStatus
+from .models import (
+    Staff, Request, BuildingChoices, GenderChoices, StaffStatus, SKILL_BITS, skill_mask, skill_names
+)
+from .buildings import get_registry
+from .duplicates import compute_fingerprint, find_open_duplicate, lock_fingerprint
+from .fast_serializers import select_field_names
+
+def validate_building_code(value):
+    """
+    Building fields accept any code in the building registry.
+    """
+    if get_registry().get(value) is None:
+        raise serializers.ValidationError(f"Unknown building '{value}'.")
+    return value
+
+class SparseFieldsMixin:
+    """
+    Lets API clients trim the response with ?fields=a,b or ?omit=c,d.
+    Only applies when the serializer has the request in its context.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        keep = select_field_names(list(self.fields), request.query_params)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
 
 # --- User & Staff Serializers ---
 
-class StaffSerializer(serializers.ModelSerializer):
+class SkillsField(serializers.Field):
+    """
+    Staff.skills (a bitmask) as a list of task types, e.g. ["cleaning", "plumbing"].
+    """
+    def to_representation(self, value):
+        return skill_names(value)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not all(isinstance(task_type, str) for task_type in data):
+            raise serializers.ValidationError("Expected a list of task types.")
+        unknown = [task_type for task_type in data if task_type not in SKILL_BITS]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown task type(s): {', '.join(unknown)}.")
+        return skill_mask(data)
+
+class StaffSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Staff model.
     """
     # Make user details read-only, nested
     user_email = serializers.EmailField(source='user.email', read_only=True)
+    # Every task type the worker can take (always includes task_type)
+    skills = SkillsField(required=False)
     
     class Meta:
         model = Staff
         fields = [
-            'id', 'name', 'task_type', 'gender', 
+            'id', 'name', 'task_type', 'skills', 'gender', 
             'current_building', 'current_wing', 'current_location_floor', 
             'status', 'user', 'user_email'
         ]
@@ -42,7 +88,7 @@ class UserSerializer(serializers.ModelSerializer):
 
 # --- Request Serializers ---
 
-class RequestSerializer(serializers.ModelSerializer):
+class RequestSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Full request serializer for staff and admin.
     """
@@ -64,13 +110,26 @@ class RequestSerializer(serializers.ModelSerializer):
 class RequestCreateSerializer(serializers.ModelSerializer):
     """
     A simplified serializer for students creating a new request.
+    If an open request for the same issue already exists, the new report is
+    merged into it (the student is added as an extra reporter) instead of
+    creating another request.
     """
+    # True when this submission was merged into an existing open request
+    merged = serializers.SerializerMethodField()
+
     class Meta:
         model = Request
         fields = [
-            'task_type', 'building', 'wing', 'location_floor', 'description'
+            'id', 'task_type', 'building', 'wing', 'location_floor', 'description',
+            'merged'
         ]
-    
+        read_only_fields = ['id']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Set by create() when the report is merged into an existing request
+        self.duplicate_of = None
+
     # Serializer-level validation
     def validate(self, data):
         # Use the model's clean method to validate floor limits
@@ -80,8 +139,33 @@ class RequestCreateSerializer(serializers.ModelSerializer):
             instance.clean()
         except serializers.ValidationError as e:
             raise serializers.ValidationError(e.args[0])
+
+        data['fingerprint'] = compute_fingerprint(
+            data.get('task_type'), data.get('building'), data.get('wing'),
+            data.get('location_floor'), data.get('description')
+        )
         return data
 
+    def create(self, validated_data):
+        fingerprint = validated_data['fingerprint']
+        with transaction.atomic():
+            # Concurrent reports of the same issue queue here, so the second
+            # one sees the first one's request and is merged into it
+            lock_fingerprint(fingerprint)
+            existing = find_open_duplicate(fingerprint)
+            if existing is None:
+                return super().create(validated_data)
+
+            # Merge: record the student as an extra reporter of the open request
+            reporter = validated_data.get('submitted_by')
+            if reporter is not None and reporter.pk != existing.submitted_by_id:
+                existing.extra_reporters.add(reporter)
+        self.duplicate_of = existing
+        return existing
+
+    def get_merged(self, obj):
+        return self.duplicate_of is not None
+
 class StaffLocationUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for staff to update their *own* location when free.
@@ -89,6 +173,19 @@ class StaffLocationUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Staff
         fields = ['current_building', 'current_wing', 'current_location_floor']
+
+    def validate_current_building(self, value):
+        return validate_building_code(value)
+
+    def validate(self, data):
+        building = data.get('current_building', getattr(self.instance, 'current_building', None))
+        floor = data.get('current_location_floor', getattr(self.instance, 'current_location_floor', 1))
+        max_floor = get_registry().floor_limit(building)
+        if not (1 <= floor <= max_floor):
+            raise serializers.ValidationError(
+                {"current_location_floor": f"Must be between 1 and {max_floor}."}
+            )
+        return data
         
 # ... (at the end of fms_api/serializers.py) ...
 
@@ -103,9 +200,23 @@ class AdminRequestEditSerializer(serializers.ModelSerializer):
             'building', 
             'wing', 
             'location_floor', 
-            'description', 
+            'description',
             'status'
         ]
+
+    def update(self, instance, validated_data):
+        # Keep the duplicate-detection fingerprint in step with the edited fields
+        for field in ('task_type', 'building', 'wing', 'location_floor', 'description'):
+            if field in validated_data:
+                setattr(instance, field, validated_data[field])
+        validated_data['fingerprint'] = compute_fingerprint(
+            instance.task_type, instance.building, instance.wing,
+            instance.location_floor, instance.description
+        )
+        return super().update(instance, validated_data)
+
+    def validate_building(self, value):
+        return validate_building_code(value)
         
 class StaffCreateSerializer(serializers.Serializer):
     """
@@ -120,6 +231,8 @@ class StaffCreateSerializer(serializers.Serializer):
     # Staff fields
     name = serializers.CharField(max_length=100)
     task_type = serializers.CharField(max_length=50)
+    # Extra task types the worker can also take, besides task_type
+    skills = SkillsField(required=False)
     gender = serializers.ChoiceField(choices=GenderChoices.choices)
 
     def validate_username(self, value):
@@ -140,6 +253,7 @@ class StaffCreateSerializer(serializers.Serializer):
             user=user,
             name=validated_data['name'],
             task_type=validated_data['task_type'],
+            skills=validated_data.get('skills', 0),
             gender=validated_data['gender'],
             status=StaffStatus.FREE  # Default to 'free'
         )
@@ -0,0 +1,271 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .idempotency import is_replay
+from .models import Request, TaskStatus, TaskTypeChoices, get_user_role
+
+logger = logging.getLogger(__name__)
+
+# --- Write-Path Rate Limiting & Admission Control ---
+# State lives in the 'shared' cache (file based, see settings.CACHES), so all
+# WSGI worker processes on the host see the same buckets and load signals.
+# Updates are read-modify-write, not atomic: under heavy contention a few
+# extra calls may slip through, which is acceptable for backpressure.
+
+SHARED_CACHE = 'shared'
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600}
+
+
+def parse_bucket(spec):
+    """
+    '5/min' -> (capacity=5, refill_per_second=5/60).
+    A client can burst `capacity` calls, then gets capacity-per-period.
+    """
+    count, _, period = spec.partition('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+def get_shared_cache():
+    return caches[SHARED_CACHE]
+
+
+class TokenBucket:
+    """
+    A token bucket stored in the shared cache under `key`.
+    """
+    def __init__(self, key, spec):
+        self.key = key
+        self.capacity, self.refill_rate = parse_bucket(spec)
+
+    def level(self, now):
+        """
+        Tokens in the bucket at `now`, after refilling.
+        """
+        tokens, updated = get_shared_cache().get(self.key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill_rate)
+
+    def wait_for(self, tokens):
+        """
+        Seconds until a bucket holding `tokens` has a whole token again.
+        """
+        return max(0, (1 - tokens) / self.refill_rate)
+
+    def take(self, now, tokens=None):
+        """
+        Takes one token (from `tokens`, as returned by level(), if given).
+        Returns 0 on success, otherwise the number of seconds until a token
+        will be available.
+        """
+        if tokens is None:
+            tokens = self.level(now)
+        if tokens < 1:
+            return self.wait_for(tokens)
+        get_shared_cache().set(self.key, (tokens - 1, now), timeout=self._ttl())
+        return 0
+
+    def _ttl(self):
+        # A bucket left alone this long is full again; no need to keep it
+        return int(self.capacity / self.refill_rate) + 1
+
+
+class RoleTokenBucketThrottle(BaseThrottle):
+    """
+    Token-bucket throttle configured per view scope and user role in
+    settings.FMS_RATE_LIMITS:
+
+        FMS_RATE_LIMITS = {
+            'request-create': {
+                'student': {'user': '5/min', 'role': '300/min'},
+            },
+        }
+
+    'user' is a bucket per user, 'role' one bucket shared by every user of
+    that role. Roles or scopes without an entry are not limited, and
+    neither are Idempotency-Key retries answered from a stored response.
+    Views opt in with `throttle_scope = '<scope>'`.
+    """
+    def __init__(self):
+        self.wait_seconds = 0
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None or not request.user.is_authenticated:
+            return True
+
+        role = get_user_role(request.user)
+        limits = getattr(settings, 'FMS_RATE_LIMITS', {}).get(scope, {}).get(role)
+        if not limits or is_replay(request, view):
+            return True
+
+        buckets = []
+        if limits.get('user'):
+            buckets.append(TokenBucket(f'fms:bucket:{scope}:user:{request.user.pk}', limits['user']))
+        if limits.get('role'):
+            buckets.append(TokenBucket(f'fms:bucket:{scope}:role:{role}', limits['role']))
+
+        # Check every bucket before taking from any, so a call refused by the
+        # role bucket doesn't also use up the user's own allowance
+        now = time.time()
+        levels = [bucket.level(now) for bucket in buckets]
+        for bucket, tokens in zip(buckets, levels):
+            if tokens < 1:
+                self.wait_seconds = bucket.wait_for(tokens)
+                logger.info(f"Rate limited {request.user.username} ({role}) on {scope}: {bucket.key}")
+                return False
+        for bucket, tokens in zip(buckets, levels):
+            bucket.take(now, tokens)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+# --- Admission Control ---
+
+DEFAULT_ADMISSION_CONTROL = {
+    'mode': 'defer',              # 'off', 'defer' (skip scheduler triggers) or 'shed' (reject with 429)
+    'max_pending': 1000,          # pending-queue depth of one task type considered overloaded
+    'max_write_latency_ms': 500,  # recent mean DB write latency considered overloaded
+    'retry_after': 30,            # seconds, for shed responses
+    'depth_refresh_seconds': 5,   # how long a pending-count reading is reused
+    'min_latency_samples': 10,    # recent timed writes needed before latency counts
+    'latency_half_life_seconds': 60,  # how fast old write timings lose weight
+    'drain_interval_seconds': 30,  # while deferring, at most one batch dispatch this often
+}
+
+PENDING_DEPTH_KEY = 'fms:admission:pending_depth'
+WRITE_LATENCY_KEY = 'fms:admission:write_latency'
+
+
+def get_admission_config():
+    config = dict(DEFAULT_ADMISSION_CONTROL)
+    config.update(getattr(settings, 'FMS_ADMISSION_CONTROL', {}))
+    return config
+
+
+# Write latency is a time-decayed mean: every sample's weight halves each
+# 'latency_half_life_seconds'. The summed weight says how much recent
+# evidence there is; below 'min_latency_samples' latency is ignored, so a
+# single slow write after a quiet spell can't mark the system overloaded.
+# While writes are shed or deferred no new samples arrive and the weight
+# fades on its own, so overload clears without waiting for a fast write.
+
+def _decayed_latency(state, now, config):
+    """
+    (weighted sum of ms, weight) from a stored (sum, weight, updated)
+    state, decayed to `now`.
+    """
+    if state is None:
+        return 0.0, 0.0
+    total, weight, updated = state
+    decay = 0.5 ** (max(0.0, now - updated) / config['latency_half_life_seconds'])
+    return total * decay, weight * decay
+
+
+def record_write_latency(seconds):
+    """
+    Feeds one DB write timing into the shared write-latency mean.
+    """
+    cache = get_shared_cache()
+    now = time.time()
+    config = get_admission_config()
+    total, weight = _decayed_latency(cache.get(WRITE_LATENCY_KEY), now, config)
+    timeout = int(config['latency_half_life_seconds'] * 10)
+    cache.set(WRITE_LATENCY_KEY, (total + seconds * 1000, weight + 1, now), timeout=timeout)
+
+
+def get_write_latency(config=None):
+    """
+    Recent mean DB write latency in ms, or None without enough samples.
+    """
+    config = config or get_admission_config()
+    total, weight = _decayed_latency(get_shared_cache().get(WRITE_LATENCY_KEY), time.time(), config)
+    if weight < config['min_latency_samples']:
+        return None
+    return total / weight
+
+
+@contextmanager
+def timed_write():
+    """
+    Records how long a block of DB writes took.
+        with timed_write():
+            task.save()
+    """
+    started = time.perf_counter()
+    yield
+    record_write_latency(time.perf_counter() - started)
+
+
+def get_pending_depth(config, task_type):
+    """
+    Pending tasks of `task_type`, counted at most once per
+    'depth_refresh_seconds' (a range read of the queue index).
+    """
+    cache = get_shared_cache()
+    key = f'{PENDING_DEPTH_KEY}:{task_type}'
+    depth = cache.get(key)
+    if depth is None:
+        depth = Request.objects.filter(status=TaskStatus.PENDING, task_type=task_type).count()
+        cache.set(key, depth, timeout=config['depth_refresh_seconds'])
+    return depth
+
+
+def is_overloaded(task_type, config=None):
+    """
+    True when the DB write latency, or the pending queue of `task_type`,
+    crosses its threshold. The queue is measured per type so a backlog
+    nobody can work on (e.g. no plumbers on shift) doesn't hold back the
+    other types. With task_type None only the latency is checked.
+    """
+    config = config or get_admission_config()
+    if config['mode'] == 'off':
+        return False
+    latency = get_write_latency(config)
+    if latency is not None and latency > config['max_write_latency_ms']:
+        return True
+    return task_type is not None and get_pending_depth(config, task_type) > config['max_pending']
+
+
+def should_defer_scheduler(task_type):
+    """
+    In 'defer' mode, a new task of `task_type` is queued without its own
+    scheduler run while overloaded. The caller still drains the queue in
+    batches (scheduler.logic.drain_pending), so deferred tasks reach idle
+    workers, not only workers that complete a task.
+    """
+    config = get_admission_config()
+    return config['mode'] == 'defer' and is_overloaded(task_type, config)
+
+
+class AdmissionControlThrottle(BaseThrottle):
+    """
+    In 'shed' mode, rejects the request with 429 + Retry-After while the
+    system is overloaded for the task type being submitted.
+    """
+    def allow_request(self, request, view):
+        config = get_admission_config()
+        if config['mode'] != 'shed':
+            return True
+        task_type = request.data.get('task_type') if hasattr(request.data, 'get') else None
+        if task_type not in TaskTypeChoices.values:
+            # Fails validation anyway; only the latency applies
+            task_type = None
+        if not is_overloaded(task_type, config):
+            return True
+        if is_replay(request, view):
+            # Replaying a stored response writes nothing
+            return True
+        self.retry_after = config['retry_after']
+        logger.warning(f"Admission control shed {request.method} {request.path}")
+        return False
+
+    def wait(self):
+        return self.retry_after
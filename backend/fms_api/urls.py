@@ -1,23 +1,32 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # --- Authentication ---
     path('login/', views.CustomObtainAuthTokenView.as_view(), name='api-login'),
     path('register/', views.RegisterUserView.as_view(), name='api-register'),
 
+    # --- Campus ---
+    path('buildings/', views.BuildingListView.as_view(), name='building-list'),
+
     # --- Student URLs ---
     path('requests/create/', views.CreateRequestView.as_view(), name='request-create'),
-    path('requests/my-requests/', views.StudentRequestListView.as_view(), name='request-list-student'),
+    path('requests/my-requests/', async_views.StudentRequestListView.as_view(), name='request-list-student'),
 
     # --- Staff URLs ---
-    path('staff/my-tasks/', views.StaffTaskListView.as_view(), name='task-list-staff'),
+    path('staff/my-tasks/', async_views.StaffTaskListView.as_view(), name='task-list-staff'),
     path('staff/task/complete/<int:pk>/', views.CompleteTaskView.as_view(), name='task-complete'),
     path('staff/update-location/', views.UpdateStaffLocationView.as_view(), name='staff-update-location'),
 
     # --- Admin URLs ---
-    path('admin/all-requests/', views.AdminRequestListView.as_view(), name='admin-request-list'),
-    path('admin/all-staff/', views.AdminStaffListView.as_view(), name='admin-staff-list'),
+    path('admin/all-requests/', async_views.AdminRequestListView.as_view(), name='admin-request-list'),
+    path('admin/search-requests/', views.AdminRequestSearchView.as_view(), name='admin-request-search'),
+    path('admin/export-requests/', views.AdminExportRequestsView.as_view(), name='admin-request-export'),
+    path('admin/analytics/wait-times/', views.AdminSlaAnalyticsView.as_view(metric='wait'), name='admin-analytics-wait'),
+    path('admin/analytics/service-times/', views.AdminSlaAnalyticsView.as_view(metric='service'), name='admin-analytics-service'),
+    path('admin/scheduler/explain/', views.AdminSchedulerExplainView.as_view(), name='admin-scheduler-explain'),
+    path('admin/scheduler/capacity/', views.AdminCapacityForecastView.as_view(), name='admin-scheduler-capacity'),
+    path('admin/all-staff/', async_views.AdminStaffListView.as_view(), name='admin-staff-list'),
     path('admin/request/complete/<int:pk>/', views.AdminCompleteRequestView.as_view(), name='admin-request-complete'),
     path('admin/request/edit/<int:pk>/', views.AdminEditRequestView.as_view(), name='admin-request-edit'),
     path('admin/request/delete/<int:pk>/', views.AdminDeleteRequestView.as_view(), name='admin-request-delete'),
@@ -1,21 +1,43 @@
+from datetime import datetime, time, timedelta
+
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, views, status, permissions
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
-from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
-from .models import Request, Staff, TaskStatus, StaffStatus
+from .models import Request, Staff, TaskStatus, StaffStatus, TaskEventType, get_user_role
 from .serializers import (
     UserSerializer, StaffSerializer, RequestSerializer, 
     RequestCreateSerializer, StaffLocationUpdateSerializer,
     AdminRequestEditSerializer, StaffCreateSerializer
 )
+from .analytics import GROUP_BY_FIELDS, rollups_as_of, sla_summary
+from .buildings import get_registry
+from .events import record_event
+from .exports import CONTENT_TYPES, stream_export
+from .fast_serializers import REQUEST_MAPPER, select_field_names
+from .idempotency import idempotent
+from .pagination import RequestSearchPagination
+from .search import search_requests
+from .throttling import (
+    AdmissionControlThrottle, RoleTokenBucketThrottle,
+    get_admission_config, should_defer_scheduler, timed_write
+)
 from scheduler.logic import (
     find_and_assign_next_task_for_worker, 
-    trigger_assignment_for_new_task
+    trigger_assignment_for_new_task,
+    explain_next_task_for_worker,
+    is_sharded_dispatch,
+    drain_pending
 )
+from scheduler.shifts import forecast_capacity, get_calendar
+from scheduler.tracing import get_recent_traces
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,12 +55,7 @@ class CustomObtainAuthTokenView(ObtainAuthToken):
         token, created = Token.objects.get_or_create(user=user)
         
         # Determine user role
-        is_staff_member = hasattr(user, 'staff')
-        role = 'student' # Default
-        if user.is_staff:
-            role = 'admin'
-        elif is_staff_member:
-            role = 'staff'
+        role = get_user_role(user)
 
         return Response({
             'token': token.key,
@@ -54,6 +71,18 @@ class RegisterUserView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny] # Anyone can register
     serializer_class = UserSerializer
 
+# --- Campus Views ---
+
+class BuildingListView(views.APIView):
+    """
+    API endpoint listing the campus buildings with their floors, wings and
+    gender restriction, so clients don't hard-code them.
+    """
+    def get(self, request, *args, **kwargs):
+        return Response([
+            building._asdict() for building in get_registry().buildings.values()
+        ])
+
 # --- Request Management Views ---
 
 class CreateRequestView(generics.CreateAPIView):
@@ -63,15 +92,40 @@ class CreateRequestView(generics.CreateAPIView):
     """
     serializer_class = RequestCreateSerializer
     permission_classes = [permissions.IsAuthenticated] # Must be logged in
+    throttle_classes = [AdmissionControlThrottle, RoleTokenBucketThrottle]
+    throttle_scope = 'request-create'
+
+    @idempotent('request-create')
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # 1. Save the request, linking it to the logged-in user
-        new_request = serializer.save(
-            submitted_by=self.request.user,
-            status=TaskStatus.PENDING
-        )
+        # (or merge it into an open duplicate of the same issue)
+        with timed_write():
+            new_request = serializer.save(
+                submitted_by=self.request.user,
+                status=TaskStatus.PENDING
+            )
         
+        if serializer.duplicate_of is not None:
+            # The existing request is already queued or being worked on,
+            # so there is nothing new for the scheduler to dispatch.
+            logger.info(f"Request by {self.request.user.username} merged into duplicate {new_request.id}")
+            return
+
         logger.info(f"New request {new_request.id} created by {self.request.user.username}")
+        record_event(TaskEventType.CREATED, new_request)
+
+        if should_defer_scheduler(new_request.task_type):
+            # Overloaded: skip this task's own scheduler run. A batch dispatch
+            # at most every drain interval still hands queued tasks to idle workers.
+            logger.warning(f"Scheduler trigger deferred for new task {new_request.id} (admission control)")
+            try:
+                drain_pending(get_admission_config()['drain_interval_seconds'])
+            except Exception as e:
+                logger.error(f"Deferred-task drain failed: {e}")
+            return
         
         # 2. --- TRIGGER SCHEDULER ---
         # Try to find a free worker for this new task immediately
@@ -82,44 +136,18 @@ class CreateRequestView(generics.CreateAPIView):
             # The task is still queued and will be picked up later.
             logger.error(f"Scheduler trigger failed for new task {new_request.id}: {e}")
 
-class StudentRequestListView(generics.ListAPIView):
-    """
-    API endpoint for a student to see *their own* submitted requests.
-    """
-    serializer_class = RequestSerializer
-    permission_classes = [permissions.IsAuthenticated]
-
-    def get_queryset(self):
-        # Return requests submitted by the currently logged-in user
-        return Request.objects.filter(submitted_by=self.request.user).order_by('-registration_time')
-
 # --- Staff Task Management Views ---
 
-class StaffTaskListView(generics.ListAPIView):
-    """
-    API endpoint for a staff member to see *their assigned* tasks.
-    """
-    serializer_class = RequestSerializer
-    permission_classes = [permissions.IsAuthenticated]
-
-    def get_queryset(self):
-        # Find the Staff profile linked to the logged-in User
-        try:
-            staff_member = self.request.user.staff
-            # Return active (in-progress) and pending tasks for their task_type
-            return Request.objects.filter(
-                Q(assigned_to=staff_member) | Q(status=TaskStatus.PENDING, task_type=staff_member.task_type)
-            ).order_by('status', 'registration_time')
-        except Staff.DoesNotExist:
-            return Request.objects.none() # Not a staff member, return nothing
-
 class CompleteTaskView(views.APIView):
     """
     API endpoint for a staff member to mark their current task as 'Completed'.
     This triggers the scheduler to find them their *next* task.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [RoleTokenBucketThrottle]
+    throttle_scope = 'task-complete'
 
+    @idempotent('task-complete')
     def post(self, request, pk, *args, **kwargs):
         try:
             staff_member = request.user.staff
@@ -140,13 +168,17 @@ class CompleteTaskView(views.APIView):
             )
         
         # 3. Mark task as completed
-        task.status = TaskStatus.COMPLETED
-        task.save()
+        with timed_write():
+            task.status = TaskStatus.COMPLETED
+            task.completed_at = timezone.now()
+            task.save()
         
         logger.info(f"Task {task.id} marked complete by {staff_member.name}")
+        record_event(TaskEventType.COMPLETED, task, staff=staff_member)
 
         # 4. --- TRIGGER SCHEDULER ---
         # Worker is now free, find their next closest task
+        # (never deferred: completions are what drain the queue)
         staff_member.status = StaffStatus.FREE
         staff_member.save() # Save 'free' status
         
@@ -158,6 +190,16 @@ class CompleteTaskView(views.APIView):
                      "new_task": RequestSerializer(next_task).data},
                     status=status.HTTP_200_OK
                 )
+            elif is_sharded_dispatch():
+                return Response(
+                    {"message": "Task completed. Your next task will be assigned shortly."},
+                    status=status.HTTP_200_OK
+                )
+            elif not get_calendar().is_on_shift(staff_member, timezone.now()):
+                return Response(
+                    {"message": "Task completed. Your shift is over."},
+                    status=status.HTTP_200_OK
+                )
             else:
                 return Response(
                     {"message": "Task completed. No new tasks in queue. You are free."},
@@ -195,26 +237,222 @@ class UpdateStaffLocationView(generics.UpdateAPIView):
 
 # --- Admin Views (Example) ---
 
-class AdminRequestListView(generics.ListAPIView):
+class AdminRequestSearchView(generics.ListAPIView):
     """
-    API endpoint for Admins to see *all* requests.
+    API endpoint for Admins to search requests by description, submitter
+    username or assigned worker name.
+    Results are ranked by relevance and paginated.
+    e.g. ?q=leaking tap&status=pending&building=lhc&task_type=plumbing&page=2
     """
     serializer_class = RequestSerializer
     permission_classes = [permissions.IsAdminUser] # Only Admin users
-    
+    pagination_class = RequestSearchPagination
+
+    # Exact-match filters accepted as query parameters
+    filter_params = ('status', 'building', 'task_type')
+
     def get_queryset(self):
-        return Request.objects.all().order_by('-registration_time')
+        # Load only the columns (and joins) that ?fields= / ?omit= leave in the response
+        names = select_field_names(REQUEST_MAPPER.names, self.request.query_params)
+        queryset = REQUEST_MAPPER.subset(names).narrow(Request.objects.all())
+
+        for param in self.filter_params:
+            value = self.request.query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{param: value})
+
+        text = self.request.query_params.get('q', '')
+        if not text.strip():
+            return queryset.order_by('-registration_time')
+        return search_requests(queryset, text).order_by('search_rank', '-registration_time')
 
-class AdminStaffListView(generics.ListAPIView):
+class AdminExportRequestsView(views.APIView):
     """
-    API endpoint for Admins to see *all* staff.
+    API endpoint for Admins to download the request history as a stream.
+    Query params:
+      type   - 'csv' (default) or 'ndjson'
+      gzip   - '1' to gzip the stream
+      start  - first registration date to include (YYYY-MM-DD)
+      end    - last registration date to include (YYYY-MM-DD)
+      status - comma-separated statuses, e.g. 'completed,cancelled'
     """
-    serializer_class = StaffSerializer
-    permission_classes = [permissions.IsAdminUser] # Only Admin users
-    
-    def get_queryset(self):
-        return Staff.objects.all()
-    
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+
+        export_type = params.get('type', 'csv')
+        if export_type not in CONTENT_TYPES:
+            return Response(
+                {"error": "type must be 'csv' or 'ndjson'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compress = params.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+        queryset = Request.objects.all()
+
+        # 1. Date range on registration_time (end date is inclusive)
+        for param in ('start', 'end'):
+            value = params.get(param)
+            if not value:
+                continue
+            day = parse_date(value)
+            if day is None:
+                return Response(
+                    {"error": f"{param} must be a date in YYYY-MM-DD format."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            day_start = timezone.make_aware(datetime.combine(day, time.min))
+            if param == 'start':
+                queryset = queryset.filter(registration_time__gte=day_start)
+            else:
+                queryset = queryset.filter(registration_time__lt=day_start + timedelta(days=1))
+
+        # 2. Status filter
+        statuses = [value for value in params.get('status', '').split(',') if value]
+        if statuses:
+            invalid = set(statuses) - set(TaskStatus.values)
+            if invalid:
+                return Response(
+                    {"error": f"Unknown status: {', '.join(sorted(invalid))}."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(status__in=statuses)
+
+        # Oldest first, so monthly exports read chronologically
+        queryset = queryset.order_by('registration_time', 'id')
+
+        # A gzipped export is served as a .gz file download (not as
+        # Content-Encoding), so clients keep the compressed file as-is.
+        filename = f"fms-requests.{export_type}" + ('.gz' if compress else '')
+        # Under ASGI, an async stream (see fms_api/exports.py)
+        asynchronous = isinstance(request._request, ASGIRequest)
+        response = StreamingHttpResponse(
+            stream_export(queryset, export_type, compress=compress, asynchronous=asynchronous),
+            content_type='application/gzip' if compress else CONTENT_TYPES[export_type]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        logger.info(f"[Admin] Request export ({export_type}) started by {request.user.username}")
+        return response
+
+class AdminSlaAnalyticsView(views.APIView):
+    """
+    API endpoint for Admins: wait-time or service-time percentiles, served
+    from the pre-aggregated SLA rollups (see fms_api/analytics.py). The
+    rollups are refreshed by `update_sla_rollups --loop`, not by this view;
+    `as_of` in the response says how current they are.
+    Query params:
+      group_by  - comma-separated: building, task_type, hour, hour_of_day
+                  (default 'building,task_type')
+      start     - first date to include (YYYY-MM-DD, default 7 days ago)
+      end       - last date to include (YYYY-MM-DD, default today)
+      building  - only this building
+      task_type - only this task type
+    """
+    permission_classes = [permissions.IsAdminUser]
+    metric = None  # 'wait' or 'service', set in urls.py
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+
+        group_by = [value for value in params.get('group_by', 'building,task_type').split(',') if value]
+        invalid = set(group_by) - set(GROUP_BY_FIELDS)
+        if invalid:
+            return Response(
+                {"error": f"Unknown group_by field: {', '.join(sorted(invalid))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 1. Date range (end date is inclusive)
+        today = timezone.localdate()
+        days = {'start': today - timedelta(days=6), 'end': today}
+        for param in days:
+            value = params.get(param)
+            if not value:
+                continue
+            days[param] = parse_date(value)
+            if days[param] is None:
+                return Response(
+                    {"error": f"{param} must be a date in YYYY-MM-DD format."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        start = timezone.make_aware(datetime.combine(days['start'], time.min))
+        end = timezone.make_aware(datetime.combine(days['end'], time.min)) + timedelta(days=1)
+
+        # 2. Read-only: the rollups are kept current by update_sla_rollups
+        filters = {param: params[param] for param in ('building', 'task_type') if params.get(param)}
+        return Response({
+            "metric": self.metric,
+            "start": days['start'],
+            "end": days['end'],
+            "group_by": group_by,
+            # Time of the newest event folded into the rollups
+            "as_of": rollups_as_of(),
+            "groups": sla_summary(self.metric, group_by, start, end, filters),
+        })
+
+class AdminSchedulerExplainView(views.APIView):
+    """
+    API endpoint for Admins to see why the scheduler picks what it picks.
+      ?staff_id=<id> - dry run: the decision the scheduler would make for
+                       this worker now, with every phase timed
+      otherwise      - the most recent sampled decision traces
+                       (FMS_SCHEDULER_TRACE), newest first; ?limit=N
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        staff_id = request.query_params.get('staff_id')
+        if staff_id:
+            if not staff_id.isdigit():
+                return Response(
+                    {"error": "staff_id must be a number."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            staff_member = get_object_or_404(Staff, pk=staff_id)
+            return Response(explain_next_task_for_worker(staff_member))
+
+        limit = request.query_params.get('limit', '')
+        return Response({"traces": get_recent_traces(int(limit) if limit.isdigit() else None)})
+
+class AdminCapacityForecastView(views.APIView):
+    """
+    API endpoint for Admins: staff hours on shift per task_type and time
+    slot, from the shift calendar (see scheduler/shifts.py).
+    Query params:
+      start        - first date (YYYY-MM-DD, default today)
+      days         - number of days (default 1, at most 31)
+      step_minutes - slot length (default 60, at least 15)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        first_day = timezone.localdate()
+        if params.get('start'):
+            first_day = parse_date(params['start'])
+            if first_day is None:
+                return Response(
+                    {"error": "start must be a date in YYYY-MM-DD format."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        days = params.get('days', '1')
+        step_minutes = params.get('step_minutes', '60')
+        if not (days.isdigit() and 1 <= int(days) <= 31):
+            return Response({"error": "days must be between 1 and 31."}, status=status.HTTP_400_BAD_REQUEST)
+        if not (step_minutes.isdigit() and int(step_minutes) >= 15):
+            return Response({"error": "step_minutes must be at least 15."}, status=status.HTTP_400_BAD_REQUEST)
+
+        start = timezone.make_aware(datetime.combine(first_day, time.min))
+        end = start + timedelta(days=int(days))
+        return Response({
+            "start": first_day,
+            "days": int(days),
+            "step_minutes": int(step_minutes),
+            "task_types": forecast_capacity(start, end, timedelta(minutes=int(step_minutes))),
+        })
+
 # ... (at the end of fms_api/views.py, after AdminStaffListView) ...
 
 class AdminCompleteRequestView(views.APIView):
@@ -234,9 +472,11 @@ class AdminCompleteRequestView(views.APIView):
             staff_member.save()
             
         task.status = TaskStatus.COMPLETED
+        task.completed_at = timezone.now()
         task.save()
         
         logger.info(f"[Admin] Task {task.id} marked complete by {request.user.username}")
+        record_event(TaskEventType.COMPLETED, task, staff=task.assigned_to)
         
         return Response(
             {"message": "Request marked as complete."}, 
@@ -251,6 +491,23 @@ class AdminEditRequestView(generics.UpdateAPIView):
     queryset = Request.objects.all()
     serializer_class = AdminRequestEditSerializer # Use the new serializer
 
+    # Status changes made here that end a task, for the event log
+    closing_events = {
+        TaskStatus.COMPLETED: TaskEventType.COMPLETED,
+        TaskStatus.CANCELLED: TaskEventType.CANCELLED,
+    }
+
+    def perform_update(self, serializer):
+        previous_status = serializer.instance.status
+        if (serializer.validated_data.get('status') == TaskStatus.COMPLETED
+                and previous_status != TaskStatus.COMPLETED):
+            # Stamped as in AdminCompleteRequestView, so the SLA figures see it
+            task = serializer.save(completed_at=timezone.now())
+        else:
+            task = serializer.save()
+        if task.status != previous_status and task.status in self.closing_events:
+            record_event(self.closing_events[task.status], task, staff=task.assigned_to)
+
 class AdminDeleteRequestView(generics.DestroyAPIView):
     """
     API endpoint for an Admin to delete a request.
@@ -260,6 +517,7 @@ class AdminDeleteRequestView(generics.DestroyAPIView):
     
     def perform_destroy(self, instance):
         logger.info(f"[Admin] Task {instance.id} deleted by {self.request.user.username}")
+        record_event(TaskEventType.DELETED, instance)
         super().perform_destroy(instance)
         
 class AdminCreateStaffView(generics.CreateAPIView):
@@ -0,0 +1,14 @@
+"""
+ASGI config for fms_project project.
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Serve it with any ASGI server, e.g.:
+    uvicorn fms_project.asgi:application --workers 2
+The read-heavy list endpoints are async views (fms_api/async_views.py), so
+one process can hold many slow or long-polling clients at once.
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fms_project.settings')
+application = get_asgi_application()
@@ -1,6 +1,7 @@
 """
 Django settings for fms_project project.
 """
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -33,6 +34,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'fms_api.middleware.ProfilingMiddleware', # per-request profiling via the X-FMS-Profile header
+    'fms_api.middleware.CompressionMiddleware', # gzip/brotli for large JSON responses
+    'fms_api.middleware.TaskEventMiddleware', # batched writes of the task event log
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware', # CORS middleware
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +71,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'fms_project.wsgi.application'
+ASGI_APPLICATION = 'fms_project.asgi.application'
 
 # --- Database ---
 DATABASES = {
@@ -76,6 +81,19 @@ DATABASES = {
     }
 }
 
+# --- Cache ---
+# 'shared' is file based so every worker process on this host sees the same
+# rate-limit buckets and load readings.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'var' / 'cache',
+    },
+}
+
 # --- Password Validation ---
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -98,6 +116,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated', # Protect endpoints by default
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'fms_api.renderers.FastJSONRenderer',  # orjson when installed, same output as JSONRenderer
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # --- Internationalization ---
@@ -110,4 +132,122 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 # --- Default primary key field type ---
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+# --- FMS Settings ---
+# Reports of the same issue (same type, location and description words)
+# within this window are merged into the existing open request.
+FMS_DUPLICATE_WINDOW_MINUTES = 120
+
+# JSON/text responses at least this large are gzip/brotli compressed
+# when the client accepts it.
+FMS_COMPRESSION_MIN_BYTES = 1024
+
+# Token-bucket limits on write endpoints, per view scope and user role.
+# 'N/period' = bursts of up to N calls, refilled at N per period.
+# 'user' is one bucket per user, 'role' one bucket shared by the whole role.
+FMS_RATE_LIMITS = {
+    'request-create': {
+        'student': {'user': '5/min', 'role': '600/min'},
+        'staff': {'user': '5/min'},
+    },
+    'task-complete': {
+        'staff': {'user': '20/min'},
+    },
+}
+
+# Backpressure for request creation when DB writes are slow or the pending
+# queue of the submitted task type is deeper than max_pending. 'defer'
+# queues new tasks without running the scheduler for each one; 'shed'
+# rejects them with 429 + Retry-After; 'off' disables it.
+# While deferring, request handlers run one batch dispatch at most every
+# 'drain_interval_seconds' (default 30), so deferred tasks still reach idle
+# workers while requests keep arriving. For the tail after the last
+# request, also run `python manage.py dispatch_pending_tasks --loop`.
+FMS_ADMISSION_CONTROL = {
+    'mode': 'defer',
+    'max_pending': 1000,
+    'max_write_latency_ms': 500,
+    'retry_after': 30,
+}
+
+# Responses stored for 'Idempotency-Key' retries are kept this long
+FMS_IDEMPOTENCY_TTL_HOURS = 24
+# A key still in progress after this long is treated as abandoned (the call
+# died before storing its response) and may be claimed again by a retry
+FMS_IDEMPOTENCY_LEASE_SECONDS = 60
+
+# How many upcoming pending tasks a staff member's feed shows
+FMS_STAFF_FEED_SIZE = 10
+
+# How the scheduler picks tasks for workers and workers for new tasks
+# (scheduler/policies.py): 'greedy_nearest' (default), 'oldest_first',
+# 'weighted', 'batched', or the dotted path of a SchedulingPolicy subclass.
+# Compare them offline with `python manage.py replay_policies`.
+FMS_SCHEDULING_POLICY = 'greedy_nearest'
+# Keyword options for the policy, e.g. {'window_seconds': 30} for 'batched'
+# ('batched' needs `python manage.py dispatch_pending_tasks --loop` running:
+# it dispatches each window's new tasks when the window closes)
+FMS_SCHEDULING_POLICY_OPTIONS = {}
+
+# Sharded scheduler runtime (see scheduler/sharding.py). In 'sharded' mode
+# request handlers only queue tasks; `python manage.py run_scheduler_shards`
+# runs one dispatch process per worker, each owning some task_type shards.
+FMS_SCHEDULER_SHARDS = {
+    'mode': 'inline',        # or 'sharded'
+    'workers': 4,            # e.g. one per core
+    'split_by_zone': False,  # shard each task_type by worker gender too
+}
+
+# Shift calendar (see scheduler/shifts.py). Staff with shifts only get tasks
+# while on shift that they are expected to finish before it ends; staff
+# with no shifts at all are always available. The expected service times
+# come from the SLA rollups: run `python manage.py update_sla_rollups --loop`
+# next to the app servers to keep them current.
+FMS_SHIFT_CALENDAR = {
+    'horizon_hours': 48,              # shifts each process keeps in memory
+    'default_service_seconds': 1800,  # until a task type has recorded service times
+    'service_cache_seconds': 3600,    # max age of the shared service times
+}
+
+# Task events are written in batches at the end of each request, or as
+# soon as this many are buffered (see fms_api/events.py)
+FMS_EVENT_BATCH_SIZE = 200
+# Events kept for retry while their flushes fail; beyond this the oldest are dropped
+FMS_EVENT_BUFFER_LIMIT = 10_000
+
+# Opt-in scheduler decision tracing (see scheduler/tracing.py). Traced
+# decisions are logged as JSON on the 'scheduler.trace' logger and shown at
+# /api/admin/scheduler/explain/.
+FMS_SCHEDULER_TRACE = {
+    'sample_rate': 0.0,  # e.g. 0.01 traces 1% of decisions
+    'top_k': 5,
+    'keep': 100,
+}
+
+# Per-request profiling: send 'X-FMS-Profile: <token>' with this token.
+# Disabled while empty. Reports are written to FMS_PROFILE_DIR.
+FMS_PROFILE_TOKEN = os.environ.get('FMS_PROFILE_TOKEN', '')
+FMS_PROFILER = 'fms_api.profiling.CProfileProfiler'
+FMS_PROFILE_DIR = BASE_DIR / 'var' / 'profiles'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        # One JSON object per line
+        'scheduler_trace': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'scheduler.trace': {
+            'handlers': ['scheduler_trace'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -1,54 +1,195 @@
 from fms_api.models import (
-    Request, Staff, TaskStatus, StaffStatus, 
-    BuildingChoices, GenderChoices
+    Request, Staff, TaskStatus, StaffStatus, TaskEventType
 )
+from fms_api.buildings import get_registry
+from fms_api.events import record_event
+from fms_api.throttling import get_shared_cache
+from scheduler.policies import BatchedPolicy, get_policy, location_key
+from scheduler.shifts import get_calendar
+from scheduler.skills import filter_skilled, has_skill, skill_types
+from scheduler.tracing import NULL_TRACE, start_trace
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
-# --- Lists for Gender Rules ---
-BOYS_HOSTELS = [
-    BuildingChoices.BH_OLD, 
-    BuildingChoices.BH_H1, 
-    BuildingChoices.BH_H2
-]
-GIRLS_HOSTELS = [BuildingChoices.GIRLS_HOSTEL]
-
-# --- NEW: Campus Proximity Logic ---
-# Defines the physical sequence of buildings.
-# Guest House is "parallel" to Old Boys, so it gets the SAME index.
-CAMPUS_LAYOUT_SEQUENCE = [
-    BuildingChoices.BH_H2,         # 0
-    BuildingChoices.BH_H1,         # 1
-    BuildingChoices.BH_OLD,        # 2
-    BuildingChoices.GIRLS_HOSTEL,  # 3
-    BuildingChoices.LHC,           # 4
-    BuildingChoices.ACADEMIC,      # 5
-    BuildingChoices.LIBRARY,       # 6
-    BuildingChoices.RD,            # 7
-]
-
-# Create a dictionary for quick lookup: {'boys_hostel_h2': 0, ...}
-BUILDING_PROXIMITY_MAP = {building: index for index, building in enumerate(CAMPUS_LAYOUT_SEQUENCE)}
-
-# --- KEY CHANGE ---
-# Set Guest House to the same proximity index as Old Boys Hostel
-BUILDING_PROXIMITY_MAP[BuildingChoices.GUEST_HOUSE] = BUILDING_PROXIMITY_MAP[BuildingChoices.BH_OLD]
-# --- END KEY CHANGE ---
+# --- Campus Proximity & Gender Rules ---
+# Building positions and gender restrictions come from the building
+# registry (fms_api/buildings.py); Guest House shares Old Boys Hostel's
+# position, so the distance between them is 0.
 
 
 def get_building_distance(bldg1, bldg2):
     """
     Calculates the 'travel distance' between two buildings based on the campus layout.
     """
-    # Get the index (position) of each building. Default to a "far" position if not found.
-    pos1 = BUILDING_PROXIMITY_MAP.get(bldg1, 99)
-    pos2 = BUILDING_PROXIMITY_MAP.get(bldg2, 99)
+    return get_registry().distance(bldg1, bldg2)
+
+
+def get_excluded_buildings(gender):
+    """
+    Buildings a worker of this gender may not be sent to.
+    Returns None if the gender is not set (no tasks can be assigned).
+    """
+    return get_registry().excluded_buildings(gender)
+
+
+def is_eligible(worker, task):
+    """
+    True if the worker may take the task (skilled for its type, gender
+    rules allow it).
+    """
+    excluded_buildings = get_excluded_buildings(worker.gender)
+    return (
+        excluded_buildings is not None
+        and has_skill(worker, task.task_type)
+        and task.building not in excluded_buildings
+    )
+
+
+def is_sharded_dispatch():
+    """
+    True when scheduler shard processes (scheduler/sharding.py) make all
+    assignments instead of the request handlers.
+    """
+    from scheduler.sharding import get_shard_config
+    return get_shard_config()['mode'] == 'sharded'
+
+
+def task_priority_key(staff_member: Staff, task: Request):
+    """
+    Sort key of the greedy-nearest policy (the default). Sorts tasks based on:
+      1. Building Distance (using campus layout)
+      2. Wing Priority (0 if same building & wing, 1 otherwise)
+      3. Floor Distance
+      4. Registration Time (Oldest first)
+    The active policy's ordering is get_policy().task_key.
+    """
+    return location_key(staff_member, task) + (task.registration_time,)
+
+
+def _record_assignment(task: Request, worker: Staff, origin, previous_worker_id):
+    """
+    Logs an 'assigned' event, or 'reassigned' if the task had a worker before.
+    `origin` is the (building, wing, floor) the worker is moving from.
+    """
+    record_event(
+        TaskEventType.REASSIGNED if previous_worker_id else TaskEventType.ASSIGNED,
+        task,
+        staff=worker,
+        origin=origin,
+        travel_distance=get_building_distance(origin[0], task.building),
+    )
+
+
+# _assign_task() results
+CLAIMED = 'claimed'
+WORKER_BUSY = 'worker_busy'
+TASK_TAKEN = 'task_taken'
+
+
+def _assign_task(worker: Staff, task: Request):
+    """
+    Assigns `task` to `worker` if both are still available and logs its
+    event. Request handlers, the batch dispatcher and the shard processes
+    all assign concurrently, so both rows are claimed atomically
+    (UPDATE ... WHERE status = 'free' / 'pending'): a task or worker another
+    dispatcher took in the meantime is never handed out twice.
+    Returns CLAIMED, WORKER_BUSY or TASK_TAKEN.
+    """
+    origin = (worker.current_building, worker.current_wing, worker.current_location_floor)
+    previous_worker_id = task.assigned_to_id
+    now = timezone.now()
+
+    with transaction.atomic():
+        # 5. Assign the task to the worker
+        if not Staff.objects.filter(pk=worker.pk, status=StaffStatus.FREE).update(
+            status=StaffStatus.BUSY,
+            current_building=task.building,
+            current_wing=task.wing,
+            current_location_floor=task.location_floor,
+        ):
+            return WORKER_BUSY
+
+        # 6. Assign the worker to the task
+        if not Request.objects.filter(pk=task.pk, status=TaskStatus.PENDING).update(
+            status=TaskStatus.IN_PROGRESS, assigned_to=worker, assigned_at=now
+        ):
+            transaction.set_rollback(True)
+            return TASK_TAKEN
+
+    worker.status = StaffStatus.BUSY
+    worker.current_building, worker.current_wing, worker.current_location_floor = (
+        task.building, task.wing, task.location_floor
+    )
+    task.status = TaskStatus.IN_PROGRESS
+    task.assigned_to = worker
+    task.assigned_at = now
+    _record_assignment(task, worker, origin, previous_worker_id)
+    return CLAIMED
+
+
+def _worker_trace_context(staff_member: Staff):
+    return {
+        'staff_id': staff_member.id,
+        'task_type': staff_member.task_type,
+        'skills': skill_types(staff_member),
+        'position': [staff_member.current_building, staff_member.current_wing,
+                     staff_member.current_location_floor],
+    }
+
+
+def rank_tasks_for_worker(staff_member: Staff, trace=NULL_TRACE):
+    """
+    All eligible pending tasks for a staff member, best first.
+    Returns None if the worker has no gender set (no task is eligible).
+    """
+    # 1. Base query for pending tasks of every type the worker is skilled for
+    base_task_query = Request.objects.filter(
+        status=TaskStatus.PENDING,
+        task_type__in=skill_types(staff_member)
+    )
     
-    # The distance is the absolute difference of their positions in the layout
-    return abs(pos1 - pos2)
-# --- END: Campus Proximity Logic ---
+    # 2. --- GENDER-BASED FILTERING ---
+    excluded_buildings = get_excluded_buildings(staff_member.gender)
+    if excluded_buildings is None:
+        return None
+    eligible_tasks_query = base_task_query.exclude(building__in=excluded_buildings)
+    
+    with trace.fetch():
+        pending_tasks = list(eligible_tasks_query)
+
+    # 3. --- PRIORITIZATION ---
+    # Ordered by the active scheduling policy (scheduler/policies.py)
+    policy = get_policy()
+    now = timezone.now()
+    priority_key = lambda task: policy.task_key(staff_member, task, now)
+    with trace.phase('sort'):
+        pending_tasks.sort(key=priority_key)
+    trace.record_candidates(pending_tasks, priority_key)
+    return pending_tasks
+
+
+def explain_next_task_for_worker(staff_member: Staff):
+    """
+    Dry run of find_and_assign_next_task_for_worker: returns the full
+    decision trace for this worker without assigning anything.
+    """
+    trace = start_trace('worker', force=True, dry_run=True, **_worker_trace_context(staff_member))
+    pending_tasks = rank_tasks_for_worker(staff_member, trace) or []
+    with trace.phase('shifts'):
+        next_task = _first_fitting_task(staff_member, pending_tasks, get_calendar(), timezone.now())
+    return trace.finish(next_task, publish=False)
+
+
+def _first_fitting_task(staff_member: Staff, pending_tasks, calendar, now):
+    """
+    The best of the ranked `pending_tasks` the worker can finish before
+    their shift ends (see scheduler/shifts.py), or None.
+    """
+    return next((task for task in pending_tasks if calendar.fits(staff_member, task, now)), None)
 
 
 def find_and_assign_next_task_for_worker(staff_member: Staff):
@@ -61,90 +202,56 @@ def find_and_assign_next_task_for_worker(staff_member: Staff):
     if staff_member.status == StaffStatus.BUSY:
         logger.warning(f"Attempted to assign new task to busy staff member {staff_member.id}")
         return None
+    if is_sharded_dispatch():
+        # The shard process owning this worker assigns its next task
+        return None
+    calendar = get_calendar()
+    if not calendar.is_on_shift(staff_member, timezone.now()):
+        logger.info(f"{staff_member.name} is off shift. No task assigned.")
+        return None
 
-    # 1. Base query for pending tasks of the correct type
-    base_task_query = Request.objects.filter(
-        status=TaskStatus.PENDING,
-        task_type=staff_member.task_type
-    )
-    
-    # 2. --- GENDER-BASED FILTERING ---
-    if staff_member.gender == GenderChoices.MALE:
-        eligible_tasks_query = base_task_query.exclude(building__in=GIRLS_HOSTELS)
-    elif staff_member.gender == GenderChoices.FEMALE:
-        eligible_tasks_query = base_task_query.exclude(building__in=BOYS_HOSTELS)
-    else:
+    trace = start_trace('worker', **_worker_trace_context(staff_member))
+
+    # 1-3. Eligible tasks, best first
+    pending_tasks = rank_tasks_for_worker(staff_member, trace)
+    if pending_tasks is None:
         logger.error(f"Staff {staff_member.id} has no gender set. Cannot assign tasks.")
+        trace.finish(None)
         return None
+
+    # 4. The highest priority task that fits in the rest of the worker's shift
+    now = timezone.now()
+    fitting_tasks = (task for task in pending_tasks if calendar.fits(staff_member, task, now))
+    with trace.phase('shifts'):
+        next_task = next(fitting_tasks, None)
     
-    pending_tasks = list(eligible_tasks_query)
-    
-    if not pending_tasks:
-        staff_member.status = StaffStatus.FREE
-        staff_member.save()
-        logger.info(f"No eligible pending '{staff_member.task_type}' tasks for {staff_member.name}.")
+    if next_task is None:
+        with trace.phase('save'):
+            staff_member.status = StaffStatus.FREE
+            staff_member.save()
+        logger.info(f"No eligible pending '{'/'.join(skill_types(staff_member))}' tasks for {staff_member.name}.")
+        trace.finish(None)
         return None
 
     logger.info(f"Finding task for {staff_member.name} (at {staff_member.current_building}, "
                 f"Wing {staff_member.current_wing}, Floor {staff_member.current_location_floor}).")
     logger.info(f"Found {len(pending_tasks)} eligible tasks.")
-
-    # 3. --- NEW MULTI-LEVEL PRIORITIZATION ---
-    # Sorts tasks based on:
-    #   1. Building Distance (using campus layout)
-    #   2. Wing Priority (0 if same building & wing, 1 otherwise)
-    #   3. Floor Distance
-    #   4. Registration Time (Oldest first)
-    def priority_key(task: Request):
-        
-        # Prio 1: Building Distance (0, 1, 2, ...)
-        # e.g., distance(BH_OLD, GUEST_HOUSE) will be 0.
-        building_dist = get_building_distance(
-            staff_member.current_building, 
-            task.building
-        )
-        
-        # --- KEY CHANGE ---
-        # Check if they are in the *exact same building*
-        is_same_building = (staff_member.current_building == task.building)
-        
-        # Prio 2: Wing Priority (0 or 1)
-        # Priority 0 is ONLY given if it's the *exact same building* AND *exact same wing*.
-        # A task in GUEST_HOUSE (building_dist 0) will get wing_priority 1.
-        # A task in BH_OLD Wing B (building_dist 0) will get wing_priority 1.
-        # A task in BH_OLD Wing A (building_dist 0) will get wing_priority 0.
-        # This correctly prioritizes same-wing tasks above all others.
-        wing_priority = 0 if (
-            is_same_building and task.wing == staff_member.current_wing
-        ) else 1
-        # --- END KEY CHANGE ---
-        
-        # Prio 3: Floor Distance (0, 1, 2, ...)
-        floor_dist = abs(task.location_floor - staff_member.current_location_floor)
-        
-        # Prio 4: Registration Time
-        time_priority = task.registration_time
-        
-        return (building_dist, wing_priority, floor_dist, time_priority)
-
-    pending_tasks.sort(key=priority_key)
-    
-    # 4. Get the highest priority task
-    next_task = pending_tasks[0]
-    
     logger.info(f"Prioritized list chose: {next_task}")
 
-    # 5. Assign the task to the worker
-    staff_member.status = StaffStatus.BUSY
-    staff_member.current_building = next_task.building
-    staff_member.current_wing = next_task.wing
-    staff_member.current_location_floor = next_task.location_floor
-    staff_member.save()
-    
-    # 6. Assign the worker to the task
-    next_task.status = TaskStatus.IN_PROGRESS
-    next_task.assigned_to = staff_member
-    next_task.save()
+    with trace.phase('save'):
+        result = _assign_task(staff_member, next_task)
+        while result == TASK_TAKEN:
+            # Another dispatcher took it in the meantime: the next best one
+            next_task = next(fitting_tasks, None)
+            if next_task is None:
+                break
+            result = _assign_task(staff_member, next_task)
+    if result != CLAIMED:
+        logger.info(f"No task assigned to {staff_member.name}: "
+                    f"{'they were given one elsewhere' if result == WORKER_BUSY else 'candidates were taken'}.")
+        trace.finish(None)
+        return None
+    trace.finish(next_task)
     
     print(f"--- Task Assigned ---")
     print(f"  Worker: {staff_member.name} (ID: {staff_member.id})")
@@ -162,74 +269,76 @@ def trigger_assignment_for_new_task(new_task: Request):
     UPDATED with parallel (Guest House) proximity logic.
     """
     
-    # 1. Base query for free workers of the correct type
-    base_worker_query = Staff.objects.filter(
-        status=StaffStatus.FREE,
-        task_type=new_task.task_type
+    if is_sharded_dispatch():
+        # The shard process owning this task_type assigns it
+        return None
+
+    policy = get_policy()
+    if policy.batch_window:
+        # Batched policy: new tasks wait for the batch dispatched when the
+        # window closes (dispatch_pending_tasks --loop)
+        return None
+
+    trace = start_trace(
+        'new_task', request_id=new_task.id, task_type=new_task.task_type,
+        position=[new_task.building, new_task.wing, new_task.location_floor]
+    )
+
+    # 1. Base query for free workers skilled for this type (primary or not)
+    base_worker_query = filter_skilled(
+        Staff.objects.filter(status=StaffStatus.FREE), new_task.task_type
     )
     
     # 2. --- GENDER-BASED FILTERING ---
-    task_building = new_task.building
+    building = get_registry().get(new_task.building)
     
-    if task_building in GIRLS_HOSTELS:
-        eligible_workers_query = base_worker_query.filter(gender=GenderChoices.FEMALE)
-    elif task_building in BOYS_HOSTELS:
-        eligible_workers_query = base_worker_query.filter(gender=GenderChoices.MALE)
+    if building is not None and building.gender_restriction:
+        # Hostel: only workers of the residents' gender
+        eligible_workers_query = base_worker_query.filter(gender=building.gender_restriction)
     else:
         # Public building, any gender is fine
         eligible_workers_query = base_worker_query
         
-    available_workers = list(eligible_workers_query)
+    with trace.fetch():
+        available_workers = list(eligible_workers_query)
+
+    # Only workers on shift who are expected to finish it before the shift ends
+    now = timezone.now()
+    with trace.phase('shifts'):
+        calendar = get_calendar(now)
+        available_workers = [worker for worker in available_workers if calendar.fits(worker, new_task, now)]
     
     if not available_workers:
         logger.info(f"New task {new_task.id} queued. No eligible free workers.")
+        trace.finish(None)
         return None
     
     logger.info(f"Finding best free worker for new task {new_task.id}...")
     logger.info(f"Found {len(available_workers)} eligible free workers.")
 
-    # 3. --- NEW MULTI-LEVEL PRIORITIZATION (for workers) ---
-    # Find the worker who is "closest" to the new task
-    def proximity_key(worker: Staff):
-        
-        # Prio 1: Building Distance
-        building_dist = get_building_distance(
-            worker.current_building, 
-            new_task.building
-        )
-        
-        # --- KEY CHANGE ---
-        is_same_building = (worker.current_building == new_task.building)
-        
-        # Prio 2: Wing Priority
-        wing_priority = 0 if (
-            is_same_building and worker.current_wing == new_task.wing
-        ) else 1
-        # --- END KEY CHANGE ---
-        
-        # Prio 3: Floor Distance
-        floor_dist = abs(worker.current_location_floor - new_task.location_floor)
-        
-        return (building_dist, wing_priority, floor_dist)
-    
-    available_workers.sort(key=proximity_key)
+    # 3. --- PRIORITIZATION (for workers) ---
+    # By default the worker "closest" to the new task (see the active policy)
+    proximity_key = lambda worker: policy.worker_key(worker, new_task, now)
     
-    # 4. Get the closest free worker
-    best_worker = available_workers[0]
+    with trace.phase('sort'):
+        available_workers.sort(key=proximity_key)
+    trace.record_candidates(available_workers, proximity_key)
     
-    logger.info(f"Closest free worker is {best_worker.name} at {best_worker.current_building}, Floor {best_worker.current_location_floor}.")
+    # 4. Get the closest free worker (the next closest if another
+    # dispatcher gave them a task in the meantime)
+    with trace.phase('save'):
+        for best_worker in available_workers:
+            result = _assign_task(best_worker, new_task)
+            if result != WORKER_BUSY:
+                break
+    if result != CLAIMED:
+        logger.info(f"New task {new_task.id} not assigned here: "
+                    f"{'already taken' if result == TASK_TAKEN else 'no eligible worker still free'}.")
+        trace.finish(None)
+        return None
 
-    # 5. Assign the task to the worker
-    best_worker.status = StaffStatus.BUSY
-    best_worker.current_building = new_task.building
-    best_worker.current_wing = new_task.wing
-    best_worker.current_location_floor = new_task.location_floor
-    best_worker.save()
-    
-    # 6. Assign the worker to the task
-    new_task.status = TaskStatus.IN_PROGRESS
-    new_task.assigned_to = best_worker
-    new_task.save()
+    logger.info(f"Closest free worker is {best_worker.name}, now heading to {new_task.building}, Floor {new_task.location_floor}.")
+    trace.finish(best_worker)
     
     print(f"--- New Task Immediately Assigned ---")
     print(f"  Worker: {best_worker.name} (ID: {best_worker.id})")
@@ -237,4 +346,170 @@ def trigger_assignment_for_new_task(new_task: Request):
     print(f"  Info: Worker moving to {new_task.building}, Floor {new_task.location_floor}.")
     print(f"-----------------------------------")
     
-    return best_worker
\ No newline at end of file
+    return best_worker
+
+
+# --- Batch Dispatch (BatchedPolicy) ---
+
+
+def dispatch_batch(policy=None):
+    """
+    Matches all free workers with pending tasks in one go, using the
+    policy's match() (globally cheapest pairs first).
+    Returns the list of (worker, task) assignments made.
+    """
+    policy = policy or get_policy()
+    if not isinstance(policy, BatchedPolicy):
+        policy = BatchedPolicy()
+
+    now = timezone.now()
+    calendar = get_calendar(now)
+    free_workers = [
+        worker for worker in Staff.objects.filter(status=StaffStatus.FREE).exclude(gender='')
+        if calendar.is_on_shift(worker, now)
+    ]
+    if not free_workers:
+        return []
+    pending_tasks = list(Request.objects.filter(
+        status=TaskStatus.PENDING,
+        task_type__in={task_type for worker in free_workers for task_type in skill_types(worker)}
+    ))
+
+    assignments = policy.match(
+        free_workers, pending_tasks, now,
+        lambda worker, task: is_eligible(worker, task) and calendar.fits(worker, task, now)
+    )
+    # Pairs whose worker or task was taken since the snapshot are skipped
+    made = [(worker, task) for worker, task in assignments if _assign_task(worker, task) == CLAIMED]
+    logger.info(f"Batch dispatch: {len(made)} tasks for {len(free_workers)} free workers, "
+                f"{len(pending_tasks)} pending, {len(assignments) - len(made)} lost to other dispatchers.")
+    return made
+
+
+DRAIN_LOCK_KEY = 'fms:scheduler:drain'
+
+
+def drain_pending(interval):
+    """
+    Used while admission control defers per-task scheduler runs: runs
+    dispatch_batch() unless some process already ran it in the last
+    `interval` seconds, so queued tasks still reach idle workers at a
+    bounded cost. Shard processes drain their own queues.
+    """
+    if is_sharded_dispatch():
+        return []
+    if get_shared_cache().add(DRAIN_LOCK_KEY, True, timeout=interval):
+        return dispatch_batch()
+    return []
+
+def _oldest_pending(staff_member: Staff, limit: int, *conditions, **filters):
+    """
+    The `limit` oldest pending tasks of the worker's types matching `filters`.
+    With a building (and floor) filter this is a bounded index range read
+    per task type.
+    """
+    task_types = skill_types(staff_member)
+    tasks = []
+    for task_type in task_types:
+        tasks += (
+            Request.objects
+            .select_related('submitted_by', 'assigned_to')
+            .filter(*conditions, status=TaskStatus.PENDING, task_type=task_type, **filters)
+            .order_by('registration_time')[:limit]
+        )
+    if len(task_types) > 1:
+        tasks.sort(key=lambda task: task.registration_time)
+        del tasks[limit:]
+    return tasks
+
+
+def _walk_floors(staff_member: Staff, building, limit: int, wing_filter=Q()):
+    """
+    Collects tasks in `building` floor by floor, nearest floor first, and
+    stops after the first floor distance at which `limit` tasks are found.
+    """
+    max_floor = get_registry().floor_limit(building)
+    worker_floor = staff_member.current_location_floor
+    by_distance = {}
+    for floor in range(1, max_floor + 1):
+        by_distance.setdefault(abs(floor - worker_floor), []).append(floor)
+
+    collected = []
+    for distance in sorted(by_distance):
+        for floor in by_distance[distance]:
+            collected.extend(_oldest_pending(
+                staff_member, limit, wing_filter, building=building, location_floor=floor
+            ))
+        if len(collected) >= limit:
+            break
+    return collected
+
+
+def _top_tasks_in_building(staff_member: Staff, building, limit: int):
+    """
+    This building's `limit` best tasks for the worker, by task_priority_key.
+    """
+    # 1. Quiet building: its whole queue fits in one small read
+    tasks = _oldest_pending(staff_member, limit, building=building)
+    if len(tasks) < limit:
+        return tasks
+
+    # 2. Busy building: walk floors outward from the worker. In the worker's
+    # own building, same-wing tasks outrank every other task, so they go first.
+    if building != staff_member.current_building:
+        return _walk_floors(staff_member, building, limit)
+    same_wing = Q(wing=staff_member.current_wing)
+    tasks = _walk_floors(staff_member, building, limit, same_wing)
+    if len(tasks) < limit:
+        tasks += _walk_floors(staff_member, building, limit - len(tasks), ~same_wing)
+    return tasks
+
+
+def get_upcoming_tasks_for_worker(staff_member: Staff, limit: int):
+    """
+    Returns up to `limit` pending tasks this worker is eligible for, in the
+    same order find_and_assign_next_task_for_worker would pick them.
+
+    Never reads the whole queue: every query is a LIMIT-ed range read on the
+    request queue indexes for one building (and floor) and one of the
+    worker's skills. Buildings are visited in bands of equal distance from
+    the worker, nearest first, and the scan stops after the first band that
+    yields `limit` tasks, because building distance is the primary sort key.
+    Cost therefore depends on `limit`, the campus layout and the worker's
+    number of skills, not on how long the queue is.
+    """
+    excluded_buildings = get_excluded_buildings(staff_member.gender)
+    if excluded_buildings is None or limit <= 0:
+        return []
+
+    policy = get_policy()
+    if policy.age_first:
+        # Oldest first: the `limit` oldest eligible tasks of each skill
+        # are the only candidates, one LIMIT-ed read per skill
+        now = timezone.now()
+        tasks = _oldest_pending(staff_member, limit, ~Q(building__in=excluded_buildings))
+        tasks.sort(key=lambda task: policy.task_key(staff_member, task, now))
+        return tasks
+    if not policy.distance_first:
+        # The banded read below relies on distance being the primary key
+        return rank_tasks_for_worker(staff_member)[:limit]
+
+    # 1. Eligible buildings grouped by distance from the worker
+    bands = {}
+    for building in get_registry().codes:
+        if building in excluded_buildings:
+            continue
+        distance = get_building_distance(staff_member.current_building, building)
+        bands.setdefault(distance, []).append(building)
+
+    # 2. Nearest bands first, until we have enough candidates
+    candidates = []
+    for distance in sorted(bands):
+        for building in bands[distance]:
+            candidates.extend(_top_tasks_in_building(staff_member, building, limit))
+        if len(candidates) >= limit:
+            break
+
+    # 3. Same ordering as the scheduler
+    candidates.sort(key=lambda task: task_priority_key(staff_member, task))
+    return candidates[:limit]
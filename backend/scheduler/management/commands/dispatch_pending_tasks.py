@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scheduler.logic import dispatch_batch
+from scheduler.policies import get_policy
+
+
+class Command(BaseCommand):
+    """
+    Matches pending tasks to free workers in one batch. With the 'batched'
+    scheduling policy it must run with --loop: request handlers only queue
+    new tasks, and this dispatches each window's batch when it closes. Run it the same
+    way while admission control is in 'defer' mode, so tasks deferred
+    after the last request still reach idle workers.
+    """
+    help = "Assign pending tasks to free workers in one batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep dispatching, once per --interval seconds.")
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Seconds between dispatches (default: the policy's batch window, or 60).")
+
+    def handle(self, *args, **options):
+        policy = get_policy()
+        interval = options['interval'] or policy.batch_window or 60
+        while True:
+            assignments = dispatch_batch(policy)
+            self.stdout.write(f"Assigned {len(assignments)} pending tasks.")
+            if not options['loop']:
+                break
+            time.sleep(interval)
@@ -0,0 +1,53 @@
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from scheduler.shifts import forecast_capacity
+
+
+class Command(BaseCommand):
+    """
+    Prints the staff hours on shift per task_type and time slot, from the
+    shift calendar (scheduler/shifts.py).
+    e.g. python manage.py forecast_capacity --start 2026-10-20 --days 2 --step 120
+    """
+    help = "Forecast staff capacity per task type from the shift calendar."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', default=None, help="First day, YYYY-MM-DD (default: today).")
+        parser.add_argument('--days', type=int, default=1, help="Number of days (default: 1).")
+        parser.add_argument('--step', type=int, default=60, help="Slot length in minutes (default: 60).")
+        parser.add_argument('--json', action='store_true', help="Print the forecast as JSON.")
+
+    def handle(self, *args, **options):
+        first_day = parse_date(options['start']) if options['start'] else timezone.localdate()
+        if first_day is None:
+            raise CommandError("--start must be a date in YYYY-MM-DD format.")
+        if options['days'] < 1 or options['step'] < 1:
+            raise CommandError("--days and --step must be positive.")
+
+        start = timezone.make_aware(datetime.combine(first_day, time.min))
+        forecast = forecast_capacity(start, start + timedelta(days=options['days']),
+                                     timedelta(minutes=options['step']))
+        if options['json']:
+            self.stdout.write(json.dumps(forecast, indent=2, cls=DjangoJSONEncoder))
+            return
+        if not forecast:
+            self.stdout.write("No staff to forecast.")
+            return
+
+        # One row per slot, one column of staff hours per task type
+        self.stdout.write(f"{'slot':<17}" + ''.join(f"{entry['task_type']:>13}" for entry in forecast))
+        for index, bucket in enumerate(forecast[0]['buckets']):
+            slot = timezone.localtime(bucket['start']).strftime('%Y-%m-%d %H:%M')
+            self.stdout.write(f"{slot:<17}" + ''.join(
+                f"{entry['buckets'][index]['staff_hours']:>13.2f}" for entry in forecast
+            ))
+        self.stdout.write(f"{'unscheduled':<17}" + ''.join(
+            f"{entry['unscheduled_workers']:>13}" for entry in forecast
+        ))
+        self.stdout.write("(unscheduled: workers with no shifts, available at any time)")
@@ -0,0 +1,96 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from scheduler.policies import POLICIES, make_policy
+from scheduler.replay import (
+    DEFAULT_SECONDS_PER_BUILDING, DEFAULT_SECONDS_PER_FLOOR, REPLAY_LIMITATIONS, compare_policies,
+    load_history_from_events, load_history_from_export, load_workers,
+)
+
+COLUMNS = [
+    ('policy', 'policy', '{}'),
+    ('tasks_assigned', 'assigned', '{}'),
+    ('mean_wait_seconds', 'mean wait s', '{:.1f}'),
+    ('p95_wait_seconds', 'p95 wait s', '{:.1f}'),
+    ('mean_building_distance', 'bldg dist', '{:.3f}'),
+    ('mean_floor_distance', 'floor dist', '{:.3f}'),
+    ('utilisation', 'utilisation', '{:.1%}'),
+    ('decision_cpu_ms', 'cpu ms', '{:.1f}'),
+    ('decision_cpu_us_per_decision', 'us/decision', '{:.1f}'),
+]
+
+
+class Command(BaseCommand):
+    """
+    Replays recorded requests under each scheduling policy and compares them.
+    e.g. python manage.py replay_policies --start 2026-09-01 --policies greedy_nearest,batched
+         python manage.py replay_policies --export requests.csv.gz
+    """
+    help = "Compare scheduling policies on a recorded request history (offline, read-only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policies', default=','.join(POLICIES),
+                            help=f"Comma-separated policy names (default: {','.join(POLICIES)}).")
+        parser.add_argument('--export', default=None,
+                            help="Read the history from a request export (CSV or NDJSON, .gz ok) "
+                                 "instead of the task event log.")
+        parser.add_argument('--start', default=None, help="Only requests registered at or after this time.")
+        parser.add_argument('--end', default=None, help="Only requests registered before this time.")
+        parser.add_argument('--seconds-per-building', type=float, default=DEFAULT_SECONDS_PER_BUILDING,
+                            help=f"Travel time per unit of building distance (default: {DEFAULT_SECONDS_PER_BUILDING}).")
+        parser.add_argument('--seconds-per-floor', type=float, default=DEFAULT_SECONDS_PER_FLOOR,
+                            help=f"Travel time per floor (default: {DEFAULT_SECONDS_PER_FLOOR}).")
+        parser.add_argument('--options', default='{}',
+                            help="JSON object of policy options, e.g. '{\"window_seconds\": 30}'.")
+        parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+
+    def _parse_time(self, value, name):
+        if value is None:
+            return None
+        moment = parse_datetime(value) or parse_datetime(f'{value}T00:00:00')
+        if moment is None:
+            raise CommandError(f"--{name} must be an ISO date or datetime.")
+        return moment
+
+    def handle(self, *args, **options):
+        start = self._parse_time(options['start'], 'start')
+        end = self._parse_time(options['end'], 'end')
+        travel = {
+            'seconds_per_building': options['seconds_per_building'],
+            'seconds_per_floor': options['seconds_per_floor'],
+        }
+        try:
+            policy_options = json.loads(options['options'])
+            policies = [
+                make_policy(name.strip(), **policy_options)
+                for name in options['policies'].split(',') if name.strip()
+            ]
+        except (ValueError, TypeError) as error:
+            raise CommandError(str(error))
+
+        if options['export']:
+            try:
+                tasks = load_history_from_export(options['export'], start, end)
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f"Could not read {options['export']}: {error}")
+        else:
+            tasks = load_history_from_events(start, end, **travel)
+        workers = load_workers()
+        if not tasks or not workers:
+            raise CommandError(f"Nothing to replay: {len(tasks)} requests, {len(workers)} staff.")
+
+        results = [result.as_dict() for result in compare_policies(policies, tasks, workers, **travel)]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"Replayed {len(tasks)} requests with {len(workers)} staff.")
+        self.stdout.write('  '.join(f'{label:>12}' for _, label, _ in COLUMNS))
+        for result in results:
+            self.stdout.write('  '.join(
+                f"{fmt.format(result[key]) if result[key] is not None else '-':>12}"
+                for key, _, fmt in COLUMNS
+            ))
+        self.stdout.write(REPLAY_LIMITATIONS)
@@ -0,0 +1,87 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from scheduler.sharding import ShardMap, ShardWorker, get_shard_config, node_names
+
+
+def _run_node(node, config, stop):
+    # Ctrl-C reaches every process; let the parent stop the children
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ShardWorker(node, ShardMap.from_config(config), config).run(stop)
+
+
+class Command(BaseCommand):
+    """
+    Runs the sharded scheduler: one dispatch process per node of the shard
+    map (settings.FMS_SCHEDULER_SHARDS['workers']), or just one node with
+    --node, e.g. to run nodes under separate supervisors.
+    Set FMS_SCHEDULER_SHARDS['mode'] = 'sharded' so the API stops
+    assigning tasks itself.
+    """
+    help = "Run the sharded scheduler worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Number of nodes in the shard map (default: from settings).")
+        parser.add_argument('--node', default=None,
+                            help="Run only this node (e.g. scheduler-0) in this process.")
+        parser.add_argument('--zones', action='store_true', default=None,
+                            help="Also split each task_type by worker gender.")
+        parser.add_argument('--show-map', action='store_true',
+                            help="Print which node owns each current shard and exit.")
+
+    def handle(self, *args, **options):
+        config = get_shard_config()
+        if options['workers']:
+            config['workers'] = options['workers']
+        if options['zones'] is not None:
+            config['split_by_zone'] = options['zones']
+        if config['mode'] != 'sharded':
+            self.stderr.write(self.style.WARNING(
+                "FMS_SCHEDULER_SHARDS['mode'] is not 'sharded': the API also assigns tasks."
+            ))
+        nodes = node_names(config['workers'])
+
+        if options['show_map']:
+            for node in nodes:
+                worker = ShardWorker(node, config=config)
+                worker.resync()
+                shards = sorted(
+                    f"{task_type}:{','.join(sorted(genders))}" if genders else task_type
+                    for task_type, genders in worker.owned.items()
+                )
+                self.stdout.write(f"{node}: {', '.join(shards) or '-'}")
+            return
+
+        if options['node']:
+            if options['node'] not in nodes:
+                raise CommandError(f"Unknown node '{options['node']}'. Nodes: {', '.join(nodes)}.")
+            self.stdout.write(f"Running {options['node']} of {len(nodes)} nodes.")
+            try:
+                ShardWorker(options['node'], ShardMap.from_config(config), config).run()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        # Children must not share the parent's database connection
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        processes = [
+            context.Process(target=_run_node, args=(node, config, stop), name=node, daemon=True)
+            for node in nodes
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} scheduler processes. Ctrl-C to stop.")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for process in processes:
+                process.join(timeout=10)
+        self.stdout.write("Scheduler stopped.")
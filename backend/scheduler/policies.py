@@ -0,0 +1,180 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from fms_api.buildings import get_registry
+
+# --- Scheduling Policies ---
+# A policy decides which pending task a free worker takes next (task_key)
+# and which free worker a new task goes to (worker_key); the lowest key
+# wins. logic.py applies the active policy (settings.FMS_SCHEDULING_POLICY)
+# to live data, and scheduler/replay.py applies any policy to a recorded
+# history so policies can be compared offline.
+#
+# Keys only read attributes, so they work on model instances and on replay
+# objects alike: workers have current_building / current_wing /
+# current_location_floor, tasks have building / wing / location_floor /
+# registration_time. `now` is the decision time (the replay clock offline).
+
+
+def location_key(worker, task):
+    """
+    (building distance, wing priority, floor distance) from the worker to
+    the task. Wing priority is 0 only in the same building and wing, so a
+    task in a parallel building (distance 0, e.g. the Guest House next to
+    BH Old) still ranks after one in the worker's own wing.
+    """
+    building_dist = get_registry().distance(worker.current_building, task.building)
+    wing_priority = 0 if (
+        worker.current_building == task.building and task.wing == worker.current_wing
+    ) else 1
+    floor_dist = abs(task.location_floor - worker.current_location_floor)
+    return (building_dist, wing_priority, floor_dist)
+
+
+class SchedulingPolicy:
+    """
+    Base class. Options come from settings.FMS_SCHEDULING_POLICY_OPTIONS
+    (or the replay command) as keyword arguments.
+    """
+    name = None
+    # True when building distance is the primary sort key of task_key, which
+    # lets the staff feed read the queue building by building, nearest first
+    distance_first = False
+    # True when registration time is the primary sort key of task_key, which
+    # lets the staff feed read just the oldest tasks of each skill
+    age_first = False
+    # Seconds to collect new tasks before dispatching them together;
+    # 0 dispatches every new task on arrival
+    batch_window = 0
+
+    def __init__(self, **options):
+        self.options = options
+
+    def task_key(self, worker, task, now):
+        raise NotImplementedError
+
+    def worker_key(self, worker, task, now):
+        # Nearest free worker by default
+        return location_key(worker, task)
+
+
+class GreedyNearestPolicy(SchedulingPolicy):
+    """
+    Nearest task first (building, then same wing, then floor), oldest on ties.
+    The original FMS rules.
+    """
+    name = 'greedy_nearest'
+    distance_first = True
+
+    def task_key(self, worker, task, now):
+        return location_key(worker, task) + (task.registration_time,)
+
+
+class OldestFirstPolicy(SchedulingPolicy):
+    """
+    First come, first served; distance only breaks ties.
+    """
+    name = 'oldest_first'
+    age_first = True
+
+    def task_key(self, worker, task, now):
+        return (task.registration_time,) + location_key(worker, task)
+
+
+class WeightedCostPolicy(SchedulingPolicy):
+    """
+    One cost per task: weighted travel minus a credit for time waited, so
+    old tasks are eventually taken even when far away.
+    Options (defaults): building_weight (10), wing_weight (2),
+    floor_weight (1), age_weight per minute waited (0.1).
+    """
+    name = 'weighted'
+
+    def __init__(self, building_weight=10, wing_weight=2, floor_weight=1, age_weight=0.1, **options):
+        super().__init__(**options)
+        self.weights = (building_weight, wing_weight, floor_weight)
+        self.age_weight = age_weight
+
+    def travel_cost(self, worker, task):
+        return sum(weight * part for weight, part in zip(self.weights, location_key(worker, task)))
+
+    def task_key(self, worker, task, now):
+        waited_minutes = (now - task.registration_time).total_seconds() / 60
+        return (self.travel_cost(worker, task) - self.age_weight * waited_minutes, task.registration_time)
+
+    def worker_key(self, worker, task, now):
+        return self.travel_cost(worker, task)
+
+
+class BatchedPolicy(GreedyNearestPolicy):
+    """
+    New tasks are not dispatched on arrival but collected for `window_seconds`
+    (default 60) and matched to free workers together, cheapest pair first,
+    so one nearby worker is not spent on the first of several tasks.
+    A worker finishing a task still picks the nearest one immediately.
+    The batches are dispatched when each window closes by
+    `python manage.py dispatch_pending_tasks --loop` (or by each cycle of
+    the scheduler shards), which must be running with this policy.
+    """
+    name = 'batched'
+
+    def __init__(self, window_seconds=60, **options):
+        super().__init__(**options)
+        self.batch_window = window_seconds
+
+    def match(self, workers, tasks, now, is_eligible):
+        """
+        Returns [(worker, task), ...] pairing each worker with at most one
+        task, globally cheapest task_key first.
+        """
+        pairs = sorted(
+            ((self.task_key(worker, task, now), index, worker, task)
+             for index, worker in enumerate(workers)
+             for task in tasks if is_eligible(worker, task)),
+            key=lambda pair: pair[:2]
+        )
+        matched, used_workers, used_tasks = [], set(), set()
+        for _, index, worker, task in pairs:
+            if index in used_workers or id(task) in used_tasks:
+                continue
+            matched.append((worker, task))
+            used_workers.add(index)
+            used_tasks.add(id(task))
+        return matched
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (GreedyNearestPolicy, OldestFirstPolicy, WeightedCostPolicy, BatchedPolicy)
+}
+
+DEFAULT_POLICY = GreedyNearestPolicy.name
+
+
+def make_policy(name, **options):
+    """
+    A policy by registered name, or by dotted path to a SchedulingPolicy subclass.
+    """
+    if name in POLICIES:
+        return POLICIES[name](**options)
+    if '.' in name:
+        return import_string(name)(**options)
+    raise ValueError(f"Unknown scheduling policy '{name}'. Choose from: {', '.join(POLICIES)}.")
+
+
+_active = (None, None)
+
+
+def get_policy():
+    """
+    The policy configured in settings (built once per configuration).
+    """
+    global _active
+    config = (
+        getattr(settings, 'FMS_SCHEDULING_POLICY', DEFAULT_POLICY),
+        repr(sorted(getattr(settings, 'FMS_SCHEDULING_POLICY_OPTIONS', {}).items())),
+    )
+    if _active[0] != config:
+        options = getattr(settings, 'FMS_SCHEDULING_POLICY_OPTIONS', {})
+        _active = (config, make_policy(config[0], **options))
+    return _active[1]
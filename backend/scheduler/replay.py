@@ -0,0 +1,354 @@
+import csv
+import gzip
+import heapq
+import json
+import math
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from fms_api.buildings import get_registry
+from fms_api.exports import EXPORT_COLUMNS
+from fms_api.models import Staff, TaskEvent, TaskEventType, TaskStatus, skill_bit
+from scheduler.logic import is_eligible
+from scheduler.skills import FreeWorkerIndex
+
+# --- Offline Policy Replay ---
+# Re-runs a recorded history of requests against a scheduling policy in a
+# discrete-event simulation, entirely in memory: nothing is written to the
+# database, and every policy sees the same arrivals, workers and service
+# times. It mirrors the live scheduler's decisions (scheduler/logic.py):
+#   - a new task goes to the best free eligible worker (policy.worker_key),
+#     or, for a batched policy, waits for the batch dispatched when the
+#     window closes (dispatch_pending_tasks --loop),
+#   - a worker who finishes takes its best pending task (policy.task_key).
+# Shifts are not modelled: every worker is available for the whole history,
+# so waits come out lower than the live scheduler's wherever the roster
+# left gaps (REPLAY_LIMITATIONS is printed with the results).
+#
+# Travel time is modelled from the campus layout:
+#   seconds_per_building * building distance + seconds_per_floor * floors
+# and a task occupies its worker for travel time + on-site time. On-site
+# time is the recorded service time, less the recorded travel where the
+# event log has it.
+
+REPLAY_LIMITATIONS = "Shifts are not modelled: every worker is available for the whole history."
+
+DEFAULT_SECONDS_PER_BUILDING = 120
+DEFAULT_SECONDS_PER_FLOOR = 20
+# On-site time for tasks with no recorded completion, if no task has one
+DEFAULT_ON_SITE_SECONDS = 600
+
+# Simulation event kinds; on equal times workers free up before new arrivals
+_WORKER_FREE = 0
+_ARRIVAL = 1
+_BATCH_TICK = 2
+
+
+class ReplayTask:
+    """
+    A request as the simulation sees it; attribute names match Request.
+    """
+    def __init__(self, id, task_type, building, wing, location_floor, registration_time,
+                 on_site_seconds=None):
+        self.id = id
+        self.task_type = task_type
+        self.building = building
+        self.wing = wing
+        self.location_floor = location_floor
+        self.registration_time = registration_time
+        self.on_site_seconds = on_site_seconds
+
+
+class ReplayWorker:
+    """
+    A staff member as the simulation sees it; attribute names match Staff.
+    """
+    def __init__(self, id, task_type, gender, current_building, current_wing, current_location_floor,
+                 skills=0):
+        self.id = id
+        self.task_type = task_type
+        self.skills = skills | skill_bit(task_type)
+        self.gender = gender
+        self.current_building = current_building
+        self.current_wing = current_wing
+        self.current_location_floor = current_location_floor
+
+
+class ReplayResult:
+    """
+    What one policy did with the history.
+    """
+    def __init__(self, policy_name):
+        self.policy = policy_name
+        self.waits = []
+        self.building_distances = []
+        self.floor_distances = []
+        self.unassigned = 0
+        self.decisions = 0
+        self.decision_cpu_seconds = 0.0
+        # Worker-seconds spent travelling or on site, and the simulated span
+        self.busy_seconds = 0.0
+        self.worker_count = 0
+        self.span_seconds = 0.0
+
+    def percentile(self, percent):
+        if not self.waits:
+            return None
+        ordered = sorted(self.waits)
+        return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+    def as_dict(self):
+        assigned = len(self.waits)
+        return {
+            'policy': self.policy,
+            'tasks_assigned': assigned,
+            'tasks_unassigned': self.unassigned,
+            'mean_wait_seconds': statistics.fmean(self.waits) if assigned else None,
+            'p95_wait_seconds': self.percentile(95),
+            'mean_building_distance': statistics.fmean(self.building_distances) if assigned else None,
+            'mean_floor_distance': statistics.fmean(self.floor_distances) if assigned else None,
+            'total_building_distance': sum(self.building_distances),
+            'total_floor_distance': sum(self.floor_distances),
+            'utilisation': (
+                self.busy_seconds / (self.worker_count * self.span_seconds)
+                if self.worker_count and self.span_seconds else None
+            ),
+            'shifts_modelled': False,
+            'decisions': self.decisions,
+            'decision_cpu_ms': self.decision_cpu_seconds * 1000,
+            'decision_cpu_us_per_decision': (
+                self.decision_cpu_seconds * 1e6 / self.decisions if self.decisions else None
+            ),
+        }
+
+
+# --- Loading a History ---
+
+def _fill_on_site_times(tasks):
+    known = [task.on_site_seconds for task in tasks if task.on_site_seconds is not None]
+    fallback = statistics.median(known) if known else DEFAULT_ON_SITE_SECONDS
+    for task in tasks:
+        if task.on_site_seconds is None:
+            task.on_site_seconds = fallback
+    tasks.sort(key=lambda task: (task.registration_time, task.id))
+    return tasks
+
+
+def load_history_from_events(start=None, end=None, seconds_per_building=DEFAULT_SECONDS_PER_BUILDING,
+                             seconds_per_floor=DEFAULT_SECONDS_PER_FLOOR):
+    """
+    Tasks created in [start, end) according to the task event log.
+    Cancelled and deleted requests are left out.
+    """
+    created = TaskEvent.objects.filter(event_type=TaskEventType.CREATED)
+    if start is not None:
+        created = created.filter(occurred_at__gte=start)
+    if end is not None:
+        created = created.filter(occurred_at__lt=end)
+
+    tasks = {
+        request_id: ReplayTask(request_id, task_type, building, wing, floor, occurred_at)
+        for request_id, task_type, building, wing, floor, occurred_at in created.values_list(
+            'request_id', 'task_type', 'building', 'wing', 'location_floor', 'occurred_at'
+        ).iterator(chunk_size=5000)
+    }
+
+    travel_seconds = {}
+    later = TaskEvent.objects.filter(occurred_at__gte=start) if start is not None else TaskEvent.objects.all()
+    rows = later.filter(event_type__in=[
+        TaskEventType.ASSIGNED, TaskEventType.REASSIGNED, TaskEventType.COMPLETED,
+        TaskEventType.CANCELLED, TaskEventType.DELETED,
+    ]).order_by('id').values_list('request_id', 'event_type', 'travel_distance', 'floor_distance', 'service_seconds')
+    for request_id, event_type, travel, floors, service in rows.iterator(chunk_size=5000):
+        task = tasks.get(request_id)
+        if task is None:
+            continue
+        if event_type in (TaskEventType.CANCELLED, TaskEventType.DELETED):
+            del tasks[request_id]
+        elif event_type == TaskEventType.COMPLETED:
+            if service is not None:
+                task.on_site_seconds = max(0.0, service - travel_seconds.get(request_id, 0.0))
+        elif travel is not None:
+            # Last assignment wins: that worker did the task
+            travel_seconds[request_id] = seconds_per_building * travel + seconds_per_floor * (floors or 0)
+    return _fill_on_site_times(list(tasks.values()))
+
+
+def _open_export(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def _parse_time(value):
+    moment = datetime.fromisoformat(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _export_rows(handle):
+    first_line = handle.readline()
+    if first_line.lstrip().startswith('{'):
+        yield json.loads(first_line)
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+        return
+    header = next(csv.reader([first_line]), [])
+    missing = set(EXPORT_COLUMNS) - set(header)
+    if missing:
+        raise ValueError(f"Not a request export, missing columns: {', '.join(sorted(missing))}.")
+    for values in csv.reader(handle):
+        yield dict(zip(header, values))
+
+
+def load_history_from_export(path, start=None, end=None):
+    """
+    Tasks from a request export (/api/admin/export-requests/, CSV or
+    NDJSON, optionally gzipped). The export has no travel data, so the
+    recorded service time is used as on-site time. Cancelled requests are
+    left out.
+    """
+    tasks = []
+    with _open_export(path) as handle:
+        for row in _export_rows(handle):
+            if row['status'] == TaskStatus.CANCELLED or not row['registration_time']:
+                continue
+            registered = _parse_time(row['registration_time'])
+            if (start is not None and registered < start) or (end is not None and registered >= end):
+                continue
+            service = row.get('service_seconds')
+            tasks.append(ReplayTask(
+                int(row['id']), row['task_type'], row['building'], row['wing'] or None,
+                int(row['location_floor']), registered,
+                float(service) if service not in (None, '') else None,
+            ))
+    return _fill_on_site_times(tasks)
+
+
+def load_workers():
+    """
+    Every staff member with a gender set, at their current position.
+    """
+    return [
+        ReplayWorker(*row)
+        for row in Staff.objects.exclude(gender='').order_by('id').values_list(
+            'id', 'task_type', 'gender', 'current_building', 'current_wing', 'current_location_floor', 'skills'
+        )
+    ]
+
+
+def _copy_workers(workers):
+    return [
+        ReplayWorker(worker.id, worker.task_type, worker.gender, worker.current_building,
+                     worker.current_wing, worker.current_location_floor, worker.skills)
+        for worker in workers
+    ]
+
+
+# --- Simulation ---
+
+def replay(policy, tasks, workers, seconds_per_building=DEFAULT_SECONDS_PER_BUILDING,
+           seconds_per_floor=DEFAULT_SECONDS_PER_FLOOR):
+    """
+    Runs `tasks` (sorted by registration time) through `policy` with a
+    fresh copy of `workers`. Returns a ReplayResult.
+    """
+    result = ReplayResult(policy.name)
+    if not tasks:
+        return result
+    registry = get_registry()
+    workers = _copy_workers(workers)
+    result.worker_count = len(workers)
+    free_workers = FreeWorkerIndex(workers)
+    pending = []
+    origin = tasks[0].registration_time
+
+    events = []
+    sequence = 0
+
+    def schedule(seconds, kind, item):
+        nonlocal sequence
+        sequence += 1
+        heapq.heappush(events, (seconds, kind, sequence, item))
+
+    def timed(decide):
+        started = time.process_time()
+        choice = decide()
+        result.decision_cpu_seconds += time.process_time() - started
+        result.decisions += 1
+        return choice
+
+    def assign(worker, task, seconds):
+        building_dist = registry.distance(worker.current_building, task.building)
+        floor_dist = abs(task.location_floor - worker.current_location_floor)
+        result.waits.append(max(0.0, seconds - (task.registration_time - origin).total_seconds()))
+        result.building_distances.append(building_dist)
+        result.floor_distances.append(floor_dist)
+
+        worker.current_building = task.building
+        worker.current_wing = task.wing
+        worker.current_location_floor = task.location_floor
+        free_workers.remove(worker)
+        pending.remove(task)
+        busy = seconds_per_building * building_dist + seconds_per_floor * floor_dist + task.on_site_seconds
+        result.busy_seconds += busy
+        schedule(seconds + busy, _WORKER_FREE, worker)
+
+    def dispatch_batch(now, seconds):
+        assignments = timed(lambda: policy.match(list(free_workers), pending, now, is_eligible))
+        for worker, task in assignments:
+            assign(worker, task, seconds)
+
+    for task in tasks:
+        schedule((task.registration_time - origin).total_seconds(), _ARRIVAL, task)
+    if policy.batch_window:
+        schedule(policy.batch_window, _BATCH_TICK, None)
+
+    arrivals_left = len(tasks)
+    while events:
+        seconds, kind, _, item = heapq.heappop(events)
+        now = origin + timedelta(seconds=seconds)
+        result.span_seconds = seconds
+
+        if kind == _ARRIVAL:
+            arrivals_left -= 1
+            pending.append(item)
+            if policy.batch_window:
+                # Waits for the next _BATCH_TICK
+                continue
+            candidates = [
+                worker for worker in free_workers.workers_for(item.task_type) if is_eligible(worker, item)
+            ]
+            if candidates:
+                worker = timed(lambda: min(candidates, key=lambda worker: policy.worker_key(worker, item, now)))
+                assign(worker, item, seconds)
+
+        elif kind == _WORKER_FREE:
+            free_workers.add(item)
+            candidates = [task for task in pending if is_eligible(item, task)]
+            if candidates:
+                task = timed(lambda: min(candidates, key=lambda task: policy.task_key(item, task, now)))
+                assign(item, task, seconds)
+
+        elif kind == _BATCH_TICK:
+            # The dispatch_pending_tasks command, running every window
+            if pending and free_workers:
+                dispatch_batch(now, seconds)
+            if pending or arrivals_left:
+                schedule(seconds + policy.batch_window, _BATCH_TICK, None)
+
+    result.unassigned = len(pending)
+    return result
+
+
+def compare_policies(policies, tasks, workers, **travel):
+    """
+    Replays the same history under each policy; one ReplayResult per policy.
+    """
+    return [replay(policy, tasks, workers, **travel) for policy in policies]
+
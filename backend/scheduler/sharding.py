@@ -0,0 +1,319 @@
+import bisect
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from fms_api.buildings import get_registry
+from fms_api.events import flush_events
+from django.db.models import F, Q
+
+from fms_api.models import Request, Staff, StaffStatus, TaskStatus, skill_mask, skill_names
+from scheduler.logic import CLAIMED, TASK_TAKEN, WORKER_BUSY, _assign_task, is_eligible
+from scheduler.policies import get_policy
+from scheduler.shifts import get_calendar
+from scheduler.skills import FreeWorkerIndex, skill_types
+
+logger = logging.getLogger(__name__)
+
+# --- Sharded Scheduler Runtime ---
+# With FMS_SCHEDULER_SHARDS['mode'] = 'sharded', request handlers no longer
+# assign tasks. Scheduler worker processes do, each owning a set of shards:
+#   shard = task_type               (e.g. 'plumbing')
+#   shard = task_type:gender        (with 'split_by_zone')
+# Cleaning, plumbing and electrical dispatch never interact, so each shard
+# is decided by one process from its own in-memory candidate state, and a
+# busy category only keeps its own process busy. A worker with several
+# skills is free capacity in every shard of those skills (and their gender).
+#
+# Shards are mapped to processes by a consistent-hash ring (ShardMap):
+# going from N to N+1 processes moves only ~1/(N+1) of the shards.
+#
+# Assignments are claimed atomically (UPDATE ... WHERE status = 'pending' /
+# 'free'), so two processes can never hand out the same task or worker.
+# That matters with zones, where a task in a building open to everyone is a
+# candidate in both gender shards of its task_type, and for multi-skilled
+# workers, who are candidates in several shards.
+#
+# Run it with `python manage.py run_scheduler_shards`.
+
+DEFAULT_SHARD_CONFIG = {
+    'mode': 'inline',        # 'inline': assign in the request; 'sharded': worker processes do
+    'workers': 4,            # scheduler worker processes (ring nodes)
+    'split_by_zone': False,  # also split each task_type by worker gender
+    'virtual_nodes': 64,     # ring points per process; more points, more even shards
+    'poll_seconds': 0.5,     # pause between dispatch cycles
+    'resync_seconds': 30,    # full reload of the in-memory queue
+}
+
+# Request fields the in-memory queue keeps
+TASK_FIELDS = ('id', 'task_type', 'building', 'wing', 'location_floor', 'registration_time', 'assigned_to_id')
+
+
+def get_shard_config():
+    config = dict(DEFAULT_SHARD_CONFIG)
+    config.update(getattr(settings, 'FMS_SCHEDULER_SHARDS', {}))
+    return config
+
+
+def shard_key(task_type, gender, split_by_zone):
+    return f'{task_type}:{gender}' if split_by_zone else task_type
+
+
+def node_names(count):
+    return [f'scheduler-{index}' for index in range(count)]
+
+
+def _hash(value):
+    # Stable across processes and runs, unlike hash()
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class ShardMap:
+    """
+    Consistent-hash ring from shard keys to node (process) names.
+    """
+    def __init__(self, nodes, virtual_nodes=DEFAULT_SHARD_CONFIG['virtual_nodes']):
+        if not nodes:
+            raise ValueError("A shard map needs at least one node.")
+        self.nodes = list(nodes)
+        ring = sorted(
+            (_hash(f'{node}#{point}'), node)
+            for node in self.nodes for point in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    @classmethod
+    def from_config(cls, config=None):
+        config = config or get_shard_config()
+        return cls(node_names(config['workers']), config['virtual_nodes'])
+
+    def owner(self, key):
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class ShardWorker:
+    """
+    Dispatch loop of one scheduler process: the shards `node` owns.
+    """
+    def __init__(self, node, shard_map=None, config=None):
+        self.config = config or get_shard_config()
+        self.shard_map = shard_map or ShardMap.from_config(self.config)
+        self.node = node
+        self.split_by_zone = self.config['split_by_zone']
+        # task_type -> {request id: Request}; pending tasks of owned shards
+        self.pending = {}
+        # task_type -> genders of the owned shards (None: every gender)
+        self.owned = {}
+        self.last_task_id = 0
+        self.synced_at = None
+        # (task_type, gender) -> owned here; asked for every candidate pair
+        # each cycle, so the ring lookup is done once per resync
+        self._owns = {}
+
+    def owns(self, task_type, gender):
+        key = (task_type, gender)
+        owned = self._owns.get(key)
+        if owned is None:
+            owned = self._owns[key] = (
+                self.shard_map.owner(shard_key(task_type, gender, self.split_by_zone)) == self.node
+            )
+        return owned
+
+    def may_assign(self, worker, task, calendar, now):
+        """
+        True if the pair is eligible, fits in the worker's shift and is
+        decided by this process: the shard of the task's type and the
+        worker's gender is owned here.
+        """
+        return (
+            self.owns(task.task_type, worker.gender)
+            and is_eligible(worker, task)
+            and calendar.fits(worker, task, now)
+        )
+
+    def wants(self, task):
+        """
+        True if a worker of one of the owned shards may take `task`.
+        """
+        genders = self.owned.get(task.task_type, ())
+        if genders is None:
+            return True
+        allowed = get_registry().allowed_genders(task.building)
+        return any(gender in allowed for gender in genders)
+
+    # --- In-memory state ---
+
+    def _pending_query(self):
+        return Request.objects.filter(
+            status=TaskStatus.PENDING, task_type__in=list(self.owned)
+        ).only(*TASK_FIELDS).order_by('id')
+
+    def _add_tasks(self, tasks):
+        added = []
+        for task in tasks:
+            self.last_task_id = max(self.last_task_id, task.id)
+            if self.wants(task):
+                self.pending.setdefault(task.task_type, {})[task.id] = task
+                added.append(task)
+        return added
+
+    def resync(self):
+        """
+        Reloads the owned shards and their whole pending queue. Picks up
+        new task types, staff changes and anything the incremental reads
+        missed (e.g. a request reopened by an admin).
+        """
+        self.owned = {}
+        self._owns = {}
+        staff_skills = Staff.objects.exclude(gender='').values_list('task_type', 'skills', 'gender').distinct()
+        for primary, skills, gender in staff_skills:
+            for task_type in {primary, *skill_names(skills)}:
+                if self.owns(task_type, gender):
+                    genders = self.owned.setdefault(task_type, set() if self.split_by_zone else None)
+                    if genders is not None:
+                        genders.add(gender)
+        self.pending = {}
+        self._add_tasks(self._pending_query())
+        self.synced_at = time.monotonic()
+
+    def refresh(self):
+        """
+        Brings the queue up to date; returns the tasks that are new to it.
+        """
+        if self.synced_at is None or time.monotonic() - self.synced_at >= self.config['resync_seconds']:
+            self.resync()
+            return []
+        if not self.owned:
+            return []
+        return self._add_tasks(self._pending_query().filter(id__gt=self.last_task_id))
+
+    def free_workers(self, calendar, now):
+        """
+        Free workers on shift with a skill in an owned shard.
+        """
+        workers = Staff.objects.filter(status=StaffStatus.FREE).exclude(gender='').alias(
+            owned_skills=F('skills').bitand(skill_mask(self.owned))
+        ).filter(Q(owned_skills__gt=0) | Q(task_type__in=list(self.owned))).order_by('id')
+        return [
+            worker for worker in workers
+            if any(self.owns(task_type, worker.gender) for task_type in skill_types(worker))
+            and calendar.is_on_shift(worker, now)
+        ]
+
+    def _drop(self, task):
+        self.pending.get(task.task_type, {}).pop(task.id, None)
+
+    # --- Assignment ---
+
+    def claim(self, worker, task):
+        """
+        Atomically assigns `task` to `worker` if both are still available
+        (see scheduler.logic._assign_task).
+        Returns CLAIMED, WORKER_BUSY or TASK_TAKEN.
+        """
+        result = _assign_task(worker, task)
+        if result == CLAIMED:
+            self._drop(task)
+        return result
+
+    def _assign_new_task(self, task, free, policy, calendar, now):
+        # As trigger_assignment_for_new_task: the best free worker for it,
+        # from the free workers skilled for its type (a FreeWorkerIndex)
+        candidates = [
+            worker for worker in free.workers_for(task.task_type) if self.may_assign(worker, task, calendar, now)
+        ]
+        while candidates:
+            worker = min(candidates, key=lambda worker: policy.worker_key(worker, task, now))
+            result = self.claim(worker, task)
+            if result != WORKER_BUSY:
+                if result == CLAIMED:
+                    free.remove(worker)
+                else:
+                    self._drop(task)
+                return result == CLAIMED
+            candidates.remove(worker)
+            free.remove(worker)
+        return False
+
+    def _assign_next_task(self, worker, policy, calendar, now):
+        # As find_and_assign_next_task_for_worker: the best task for it,
+        # over the owned shards of all its skills
+        candidates = [
+            task for task_type in skill_types(worker)
+            for task in self.pending.get(task_type, {}).values() if self.may_assign(worker, task, calendar, now)
+        ]
+        while candidates:
+            task = min(candidates, key=lambda task: policy.task_key(worker, task, now))
+            result = self.claim(worker, task)
+            if result != TASK_TAKEN:
+                return result == CLAIMED
+            candidates.remove(task)
+            self._drop(task)
+        return False
+
+    def dispatch_once(self):
+        """
+        One cycle: refresh the queue, then assign. Returns the number of
+        tasks assigned.
+        """
+        new_tasks = self.refresh()
+        now = timezone.now()
+        calendar = get_calendar(now)
+        free = self.free_workers(calendar, now)
+        if not free:
+            return 0
+        policy = get_policy()
+        assigned = 0
+
+        if policy.batch_window:
+            # Batched policy: one global match per cycle
+            pending = [task for tasks in self.pending.values() for task in tasks.values()]
+            may_assign = lambda worker, task: self.may_assign(worker, task, calendar, now)
+            for worker, task in policy.match(free, pending, now, may_assign):
+                result = self.claim(worker, task)
+                if result == CLAIMED:
+                    assigned += 1
+                elif result == TASK_TAKEN:
+                    # Taken by another process: stop offering it every cycle
+                    self._drop(task)
+        else:
+            # 1. Tasks that arrived since the last cycle, oldest first
+            free = FreeWorkerIndex(free)
+            for task in sorted(new_tasks, key=lambda task: task.registration_time):
+                if task.id in self.pending.get(task.task_type, {}):
+                    assigned += self._assign_new_task(task, free, policy, calendar, now)
+            # 2. Workers still free take their best pending task
+            for worker in free:
+                assigned += self._assign_next_task(worker, policy, calendar, now)
+
+        flush_events()
+        return assigned
+
+    def run(self, stop=None):
+        """
+        Dispatches until `stop` (a threading/multiprocessing Event) is set.
+        """
+        policy = get_policy()
+        pause = policy.batch_window or self.config['poll_seconds']
+        logger.info(f"{self.node}: dispatching every {pause}s")
+        while stop is None or not stop.is_set():
+            started = time.perf_counter()
+            try:
+                assigned = self.dispatch_once()
+            except Exception as e:
+                # Keep the process alive; the next cycle resyncs from the database
+                logger.error(f"{self.node}: dispatch cycle failed: {e}")
+                self.synced_at = None
+                assigned = 0
+            if assigned:
+                logger.info(f"{self.node}: assigned {assigned} tasks in "
+                            f"{(time.perf_counter() - started) * 1000:.1f} ms")
+            if stop is not None:
+                stop.wait(pause)
+            else:
+                time.sleep(pause)
@@ -0,0 +1,299 @@
+import bisect
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from fms_api.analytics import sla_summary
+from fms_api.buildings import get_registry
+from fms_api.models import Shift, Staff
+from fms_api.throttling import get_shared_cache
+from scheduler.skills import skill_types
+
+# --- Shift Calendar ---
+# Workers with at least one Shift are on the calendar. The scheduler only
+# hands them a task while they are on shift, and only one expected to be
+# finished before the shift ends:
+#   expected seconds = travel to the task + typical service time of its type
+# Travel is modelled as in scheduler/replay.py; the typical service time is
+# the median recorded one (SLA rollups), which already includes a typical
+# trip, so the estimate errs on the side of finishing early. Workers with no
+# shifts at all are not on the calendar and stay available at all times, as
+# before the calendar existed.
+#
+# Each process keeps a ShiftCalendar: the shifts overlapping the next
+# 'horizon_hours', as one sorted list of merged intervals per worker, so
+# "is this worker on shift at t, and until when" is a binary search,
+# O(log shifts of that worker). Like the building registry it is tagged
+# with a version token in the shared cache, replaced whenever a Shift is
+# saved or deleted (signal handlers in apps.py); bulk QuerySet.update() does
+# not send signals, so call invalidate_calendar() after one.
+#
+# The typical service times are kept apart from the shifts. Decoding
+# 'service_days' of rollup histograms costs far more than reading the shifts,
+# so it is not redone on every Shift save or in a request. After each pass,
+# `update_sla_rollups` recomputes them from the freshly folded rollups and
+# puts them in the shared cache. Every process picks them up on its next
+# version check. The rollups are only as current as that job, so keep
+# `python manage.py update_sla_rollups --loop` running wherever
+# FMS_SHIFT_CALENDAR is used. Without it, a process computes the times
+# itself from whatever rollups exist, at most once per
+# 'service_cache_seconds' on the host; types with no rollups use
+# 'default_service_seconds'.
+#
+# In inline mode nothing runs when a shift starts: run
+# `python manage.py dispatch_pending_tasks --loop` (or the sharded runtime)
+# so workers coming on shift pick up tasks that were left waiting.
+
+DEFAULT_SHIFT_CONFIG = {
+    'horizon_hours': 48,              # shifts loaded ahead of now
+    'seconds_per_building': 120,      # travel estimate per building of distance
+    'seconds_per_floor': 20,          # travel estimate per floor
+    'service_days': 28,               # history the typical service times come from
+    'default_service_seconds': 1800,  # task types with no recorded service time
+    'service_cache_seconds': 3600,    # how long shared service times are trusted
+}
+
+VERSION_KEY = 'fms:shifts:version'
+SERVICE_SECONDS_KEY = 'fms:shifts:service_seconds:{days}'
+VERSION_CHECK_SECONDS = 2
+
+
+def get_shift_config():
+    config = dict(DEFAULT_SHIFT_CONFIG)
+    config.update(getattr(settings, 'FMS_SHIFT_CALENDAR', {}))
+    return config
+
+
+def _merge(intervals):
+    """
+    Sorted, non-overlapping (starts, ends) lists from (start, end) pairs;
+    back-to-back shifts become one interval.
+    """
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+class ShiftCalendar:
+    """
+    Read-only interval index of the shifts in [loaded_from, loaded_until).
+    """
+    def __init__(self, shifts, scheduled_ids, loaded_from, loaded_until, service_seconds=None,
+                 config=None, version=None):
+        self.config = config or get_shift_config()
+        self.version = version
+        self.loaded_from = loaded_from
+        self.loaded_until = loaded_until
+        # Ids of the workers on the calendar (with any shift, past or future)
+        self.scheduled_ids = frozenset(scheduled_ids)
+        # task_type -> typical service seconds
+        self.service_seconds = service_seconds or {}
+
+        by_staff = {}
+        for staff_id, start, end in shifts:
+            by_staff.setdefault(staff_id, []).append((start, end))
+        # staff id -> (starts, ends)
+        self._intervals = {staff_id: _merge(intervals) for staff_id, intervals in by_staff.items()}
+
+    def is_scheduled(self, worker):
+        return worker.id in self.scheduled_ids
+
+    def shift_end(self, worker, at):
+        """
+        End of the worker's shift covering `at`, or None if they are off
+        shift then. Only meaningful for workers on the calendar.
+        """
+        starts, ends = self._intervals.get(worker.id, ((), ()))
+        index = bisect.bisect_right(starts, at) - 1
+        if index >= 0 and at < ends[index]:
+            return ends[index]
+        return None
+
+    def is_on_shift(self, worker, at):
+        return not self.is_scheduled(worker) or self.shift_end(worker, at) is not None
+
+    def expected_seconds(self, worker, task):
+        """
+        Expected time from assignment to completion of `task` by `worker`.
+        """
+        travel = (
+            self.config['seconds_per_building'] * get_registry().distance(worker.current_building, task.building)
+            + self.config['seconds_per_floor'] * abs(task.location_floor - worker.current_location_floor)
+        )
+        service = self.service_seconds.get(task.task_type, self.config['default_service_seconds'])
+        return travel + service
+
+    def fits(self, worker, task, at):
+        """
+        True if the worker is available at `at` and expected to finish
+        `task` before their shift ends.
+        """
+        if not self.is_scheduled(worker):
+            return True
+        end = self.shift_end(worker, at)
+        return end is not None and at + timedelta(seconds=self.expected_seconds(worker, task)) <= end
+
+    def on_shift_seconds(self, worker, start, end):
+        """
+        Seconds of [start, end) the worker is on shift.
+        """
+        starts, ends = self._intervals.get(worker.id, ((), ()))
+        total = 0.0
+        index = bisect.bisect_right(ends, start)
+        while index < len(starts) and starts[index] < end:
+            total += (min(end, ends[index]) - max(start, starts[index])).total_seconds()
+            index += 1
+        return total
+
+
+def typical_service_seconds(now, days):
+    """
+    Median recorded service time per task_type over the last `days` days.
+    """
+    return {
+        group['task_type']: group['p50_seconds']
+        for group in sla_summary('service', ['task_type'], now - timedelta(days=days), now)
+        if group['p50_seconds'] is not None
+    }
+
+
+def refresh_service_seconds(config=None):
+    """
+    Recomputes the typical service times and shares them with every
+    process. Called by update_sla_rollups after each pass.
+    """
+    config = config or get_shift_config()
+    service_seconds = typical_service_seconds(timezone.now(), config['service_days'])
+    get_shared_cache().set(
+        SERVICE_SECONDS_KEY.format(days=config['service_days']), service_seconds,
+        timeout=config['service_cache_seconds']
+    )
+    return service_seconds
+
+
+def get_service_seconds(config=None):
+    """
+    The shared typical service times, computed here only if no process
+    has shared them recently.
+    """
+    config = config or get_shift_config()
+    service_seconds = get_shared_cache().get(SERVICE_SECONDS_KEY.format(days=config['service_days']))
+    if service_seconds is None:
+        service_seconds = refresh_service_seconds(config)
+    return service_seconds
+
+
+def load_calendar(start, end, config=None, version=None):
+    """
+    A ShiftCalendar with the shifts overlapping [start, end).
+    """
+    config = config or get_shift_config()
+    shifts = Shift.objects.filter(end__gt=start, start__lt=end).values_list('staff_id', 'start', 'end')
+    scheduled_ids = Shift.objects.values_list('staff_id', flat=True).distinct()
+    return ShiftCalendar(
+        shifts, scheduled_ids, start, end,
+        service_seconds=get_service_seconds(config),
+        config=config, version=version,
+    )
+
+
+def _current_version():
+    cache = get_shared_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+_calendar = None
+_checked_at = 0.0
+
+
+def get_calendar(now=None):
+    """
+    This process's calendar, reloaded when shifts changed in any process or
+    when half of the loaded horizon has gone by. Its service times follow
+    the shared ones at every version check, without a reload.
+    """
+    global _calendar, _checked_at
+    now = now or timezone.now()
+    checked = time.monotonic()
+    if (_calendar is not None and checked - _checked_at < VERSION_CHECK_SECONDS
+            and _calendar.loaded_from <= now < _calendar.loaded_until):
+        return _calendar
+
+    config = get_shift_config()
+    horizon = timedelta(hours=config['horizon_hours'])
+    version = _current_version()
+    if (_calendar is None or _calendar.version != version or _calendar.config != config
+            or now < _calendar.loaded_from or now + horizon / 2 >= _calendar.loaded_until):
+        _calendar = load_calendar(now, now + horizon, config, version)
+    else:
+        _calendar.service_seconds = get_service_seconds(config)
+    _checked_at = checked
+    return _calendar
+
+
+def invalidate_calendar(**kwargs):
+    """
+    Makes every process reload its calendar. Connected to Shift post_save /
+    post_delete in apps.py.
+    """
+    global _calendar
+    get_shared_cache().set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _calendar = None
+
+
+# --- Capacity Forecast ---
+
+def forecast_capacity(start, end, step=timedelta(hours=1)):
+    """
+    Staff hours on shift per task_type in each `step` of [start, end), from
+    the calendar. A worker counts towards every task type they are skilled
+    for, so the figures per type overlap for multi-skilled staff. Workers
+    not on the calendar are always available and are reported as
+    'unscheduled_workers' instead.
+    """
+    calendar = load_calendar(start, end)
+    workers = list(Staff.objects.exclude(gender='').only('id', 'task_type', 'skills'))
+    buckets = []
+    moment = start
+    while moment < end:
+        buckets.append((moment, min(end, moment + step)))
+        moment += step
+
+    hours = {}
+    unscheduled = {}
+    for worker in workers:
+        task_types = skill_types(worker)
+        if not calendar.is_scheduled(worker):
+            for task_type in task_types:
+                unscheduled[task_type] = unscheduled.get(task_type, 0) + 1
+            continue
+        on_shift = [calendar.on_shift_seconds(worker, *bucket) / 3600 for bucket in buckets]
+        for task_type in task_types:
+            totals = hours.setdefault(task_type, [0.0] * len(buckets))
+            for index, value in enumerate(on_shift):
+                totals[index] += value
+
+    no_hours = [0.0] * len(buckets)
+    return [
+        {
+            'task_type': task_type,
+            'unscheduled_workers': unscheduled.get(task_type, 0),
+            'buckets': [
+                {'start': bucket_start, 'end': bucket_end, 'staff_hours': round(value, 2)}
+                for (bucket_start, bucket_end), value in zip(buckets, hours.get(task_type, no_hours))
+            ],
+        }
+        for task_type in sorted(set(hours) | set(unscheduled))
+    ]
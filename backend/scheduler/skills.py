@@ -0,0 +1,72 @@
+from django.db.models import F
+
+from fms_api.models import skill_bit, skill_names
+
+# --- Multi-Skill Matching ---
+# A worker can take tasks of every type in their skill mask (Staff.skills,
+# one bit per task type, see fms_api.models.SKILL_BITS), not just their
+# primary task_type. Eligibility is a bitwise AND of the worker's mask with
+# the task type's bit; a task type outside TaskTypeChoices has no bit and
+# only matches workers whose primary task_type is that type.
+#
+# Works on Staff instances and on replay workers alike (attributes
+# task_type and skills).
+
+
+def has_skill(worker, task_type):
+    return bool(worker.skills & skill_bit(task_type)) or worker.task_type == task_type
+
+
+def skill_types(worker):
+    """
+    Task types the worker can take, primary first.
+    """
+    return [worker.task_type] + [
+        task_type for task_type in skill_names(worker.skills) if task_type != worker.task_type
+    ]
+
+
+def filter_skilled(queryset, task_type):
+    """
+    Narrows a Staff queryset to workers who can take `task_type`
+    (skills & bit in SQL).
+    """
+    bit = skill_bit(task_type)
+    if not bit:
+        return queryset.filter(task_type=task_type)
+    return queryset.alias(matching_skill=F('skills').bitand(bit)).filter(matching_skill__gt=0)
+
+
+class FreeWorkerIndex:
+    """
+    Free workers by task type they can take, built once per dispatch pass:
+    the free workers skilled for a task are one dict lookup, and a worker
+    with several skills is free capacity in each of those pools until
+    someone hands them a task.
+    """
+    def __init__(self, workers=()):
+        # task_type -> {worker id: worker}, in the order workers were added
+        self._pools = {}
+        self._workers = {}
+        for worker in workers:
+            self.add(worker)
+
+    def __len__(self):
+        return len(self._workers)
+
+    def __iter__(self):
+        # The workers still free, in order (safe to remove() while iterating)
+        return iter(list(self._workers.values()))
+
+    def add(self, worker):
+        self._workers[worker.id] = worker
+        for task_type in skill_types(worker):
+            self._pools.setdefault(task_type, {})[worker.id] = worker
+
+    def remove(self, worker):
+        self._workers.pop(worker.id, None)
+        for task_type in skill_types(worker):
+            self._pools.get(task_type, {}).pop(worker.id, None)
+
+    def workers_for(self, task_type):
+        return list(self._pools.get(task_type, {}).values())
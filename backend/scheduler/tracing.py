@@ -0,0 +1,175 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from fms_api.throttling import get_shared_cache
+
+# --- Scheduler Decision Tracing ---
+# Opt-in: with FMS_SCHEDULER_TRACE['sample_rate'] > 0, that fraction of
+# scheduler decisions is traced. A trace records the candidate count, the
+# top-K candidates with their priority keys, the choice, and per-phase
+# timings in milliseconds:
+#   query        - time inside cursor.execute() for the candidate query
+#   materialise  - fetching the rows and building model instances
+#   sort         - ranking the candidates
+#   save         - writing the assignment (and its event)
+# Finished traces are logged as one JSON line each on the 'scheduler.trace'
+# logger, and the most recent ones are kept in the shared cache for the
+# admin explain endpoint.
+
+trace_logger = logging.getLogger('scheduler.trace')
+
+DEFAULT_TRACE_CONFIG = {
+    'sample_rate': 0.0,  # fraction of decisions traced; 0 disables tracing
+    'top_k': 5,          # candidates kept per trace
+    'keep': 100,         # recent traces kept for the explain endpoint
+}
+
+RECENT_TRACES_KEY = 'fms:scheduler:traces'
+
+
+def get_trace_config():
+    config = dict(DEFAULT_TRACE_CONFIG)
+    config.update(getattr(settings, 'FMS_SCHEDULER_TRACE', {}))
+    return config
+
+
+def _jsonable(value):
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class DecisionTrace:
+    """
+    Collects what one scheduler decision saw and how long each phase took.
+    """
+    def __init__(self, kind, top_k, **context):
+        self.kind = kind
+        self.top_k = top_k
+        self.context = context
+        self.started_at = timezone.now()
+        self.phases = {}
+        self.candidate_count = 0
+        self.candidates = []
+        self.chosen_id = None
+
+    def _add_time(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds * 1000
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_time(name, time.perf_counter() - started)
+
+    @contextmanager
+    def fetch(self):
+        """
+        Times a queryset evaluation, split into 'query' and 'materialise'.
+        """
+        sql_seconds = []
+
+        def timed_execute(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                sql_seconds.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(timed_execute):
+            yield
+        total = time.perf_counter() - started
+        self._add_time('query', sum(sql_seconds))
+        self._add_time('materialise', total - sum(sql_seconds))
+
+    def record_candidates(self, ranked, key):
+        """
+        `ranked` is the sorted candidate list, `key` its sort key.
+        """
+        self.candidate_count = len(ranked)
+        self.candidates = [
+            {'id': candidate.id, 'priority_key': _jsonable(key(candidate))}
+            for candidate in ranked[:self.top_k]
+        ]
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'started_at': self.started_at.isoformat(),
+            **self.context,
+            'candidate_count': self.candidate_count,
+            'top_candidates': self.candidates,
+            'chosen_id': self.chosen_id,
+            'phases_ms': {name: round(ms, 3) for name, ms in self.phases.items()},
+        }
+
+    def finish(self, chosen, publish=True):
+        """
+        Records the decision. Published traces go to the log and the
+        recent-traces list. Returns the trace as a dict.
+        """
+        self.chosen_id = chosen.id if chosen is not None else None
+        data = self.as_dict()
+        if publish:
+            trace_logger.info(json.dumps(data))
+            _remember(data)
+        return data
+
+
+class NullTrace:
+    """
+    Stand-in for decisions that are not sampled; every call is a no-op.
+    """
+    def phase(self, name):
+        return nullcontext()
+
+    def fetch(self):
+        return nullcontext()
+
+    def record_candidates(self, ranked, key):
+        pass
+
+    def finish(self, chosen, publish=True):
+        return None
+
+
+NULL_TRACE = NullTrace()
+
+
+def start_trace(kind, force=False, **context):
+    """
+    Returns a DecisionTrace for a sampled (or forced) decision, else NULL_TRACE.
+    """
+    config = get_trace_config()
+    if force or (config['sample_rate'] > 0 and random.random() < config['sample_rate']):
+        return DecisionTrace(kind, config['top_k'], **context)
+    return NULL_TRACE
+
+
+def _remember(data):
+    # Read-modify-write on the shared cache: under contention a trace may be
+    # dropped, which is fine for a sample
+    cache = get_shared_cache()
+    traces = cache.get(RECENT_TRACES_KEY) or []
+    traces.append(data)
+    cache.set(RECENT_TRACES_KEY, traces[-get_trace_config()['keep']:], timeout=None)
+
+
+def get_recent_traces(limit=None):
+    """
+    Most recent published traces, newest first.
+    """
+    traces = list(reversed(get_shared_cache().get(RECENT_TRACES_KEY) or []))
+    return traces[:limit] if limit else traces